@@ -0,0 +1,14 @@
+import os
+
+
+# Thư mục lưu cache ma trận chi phí (.npy), có thể đổi bằng biến môi trường TSP_MATRIX_CACHE_DIR
+MATRIX_CACHE_DIR = os.environ.get(
+    "TSP_MATRIX_CACHE_DIR",
+    os.path.join(os.path.expanduser("~"), ".cache", "ai-tsp", "matrices")
+)
+
+# Tổng dung lượng tối đa của cache, vượt quá thì xóa các file ít dùng nhất
+MATRIX_CACHE_MAX_BYTES = 2 * 1024 ** 3
+
+# Chế độ đo bộ nhớ của solver: "time" (chỉ thời gian), "rss" (lấy mẫu RSS) hoặc "tracemalloc" (chính xác nhưng chậm)
+BENCH_MODE = os.environ.get("TSP_BENCH_MODE", "rss")
@@ -1,31 +1,245 @@
 import numpy as np
-from sko.ACA import ACA_TSP
-np.int = int # Thư viện sko còn sử dụng API numpy cũ
-
-from core.utils import OptimizationResult, cost_func, time_memory_bench
-
-
-def run(cost_matrix, size_pop, max_iter, alpha, beta, rho) -> OptimizationResult:
-    cost_matrix = np.asarray(cost_matrix, dtype=np.float64)
-    
-    cost_func_call = 0
-    def cost_func_wrap(route):
-        nonlocal cost_func_call
-        cost_func_call += 1
-        return cost_func(cost_matrix, route)
-    
-    n_cities = cost_matrix.shape[0]
-
-    aco = ACA_TSP(func=cost_func_wrap, n_dim=n_cities, size_pop=size_pop, max_iter=max_iter,
-                  distance_matrix=cost_matrix, alpha=alpha, beta=beta, rho=rho)
-
-    bench = time_memory_bench(aco.run)
-    
-    return {
-        "bestCost": float(bench["result"][1]),
-        "bestCostHist": [float(x) for x in aco.y_best_history],
-        "bestRoute": [int(x) for x in bench["result"][0]],
-        "costFuncCall": cost_func_call,
+
+from core.utils import OptimizationResult, CostProvider, time_memory_bench, batch_cost_func, as_cost_matrix
+from core.candidates import candidate_lists
+from core.termination import as_termination
+
+
+VARIANTS = ("as", "elitist", "mmas")
+
+
+class ACO:
+    """
+    Ant Colony Optimization vector hóa: mọi con kiến dựng tour đồng thời (lockstep),
+    mỗi bước chọn thành phố kế tiếp bằng roulette theo trục con kiến.
+
+    Biến thể:
+    - "as": Ant System, mọi con kiến rải pheromone Q / L.
+    - "elitist": như "as", thêm tour tốt nhất từ trước tới nay rải `elitist_weight` lần.
+    - "mmas": MAX-MIN Ant System, chỉ con kiến tốt nhất vòng lặp rải pheromone,
+      pheromone bị kẹp trong [tau_min, tau_max].
+
+    n_candidates > 0: chỉ chọn trong k ứng viên gần nhất (pheromone lưu trên n x k cạnh ứng viên),
+    khi mọi ứng viên đã đi qua thì chọn thành phố chưa đi gần nhất. Mỗi bước O(k) thay vì O(n).
+    """
+
+    def __init__(
+        self,
+        cost_matrix: np.ndarray,
+        n_ants: int = 50,
+        alpha: float = 1.0,
+        beta: float = 2.0,
+        rho: float = 0.1,
+        q: float = 1.0,
+        variant: str = "as",
+        elitist_weight: float | None = None,
+        n_candidates: int = 0,
+        p_best: float = 0.05
+    ):
+        if variant not in VARIANTS:
+            raise ValueError(f"Biến thể ACO không hợp lệ: {variant}")
+
+        self.cost_matrix = as_cost_matrix(cost_matrix)
+        self.n_cities = self.cost_matrix.shape[0]
+        self.n_ants = n_ants
+        self.alpha, self.beta, self.rho, self.q = alpha, beta, rho, q
+        self.variant = variant
+        self.elitist_weight = n_ants if elitist_weight is None else elitist_weight
+        self.p_best = p_best
+
+        n = self.n_cities
+        if n_candidates > 0:
+            self.candidates = candidate_lists(self.cost_matrix, n_candidates)
+            # Chi phí của các cạnh ứng viên (n x k)
+            edge_cost = self.cost_matrix[np.arange(n)[:, None], self.candidates]
+        else:
+            self.candidates = None
+            edge_cost = np.array(self.cost_matrix, dtype=np.float64)
+
+        # Heuristic eta = 1 / chi phí, cạnh bị cấm (inf) có eta = 0
+        self.eta_beta = (1.0 / np.maximum(edge_cost, 1e-10)) ** beta
+        if self.candidates is None:
+            np.fill_diagonal(self.eta_beta, 0.0)
+
+        if isinstance(self.cost_matrix, CostProvider):
+            self.symmetric = len(self.cost_matrix.override_keys) == 0
+        else:
+            self.symmetric = bool(np.array_equal(self.cost_matrix, self.cost_matrix.T))
+
+        self.tau = np.ones_like(self.eta_beta)
+        self.tau_max = np.inf
+        self.tau_min = 0.0
+
+        self.cost_func_call = 0
+        self.np_rng = np.random.default_rng()
+
+
+    def roulette(self, weights):
+        """Chọn 1 cột cho mỗi hàng với xác suất tỉ lệ `weights`; hàng toàn 0 trả về -1"""
+        cum = np.cumsum(weights, axis=1)
+        total = cum[:, -1]
+        r = self.np_rng.random(len(weights)) * total
+        choice = np.argmax(cum > r[:, None], axis=1)
+        choice[total <= 0] = -1
+        return choice
+
+
+    def nearest_unvisited(self, current, visited):
+        """Thành phố chưa đi có chi phí nhỏ nhất từ `current` (dự phòng khi hết ứng viên)"""
+        cost = self.cost_matrix[current[:, None], np.arange(self.n_cities)[None, :]]
+        cost = np.where(visited, np.inf, cost)
+        choice = np.argmin(cost, axis=1)
+
+        # Mọi cạnh còn lại đều vô hạn: lấy thành phố chưa đi đầu tiên
+        stuck = ~np.isfinite(cost[np.arange(len(current)), choice])
+        choice[stuck] = np.argmax(~visited[stuck], axis=1)
+        return choice
+
+
+    def construct(self):
+        """Dựng tour cho mọi con kiến, trả về mảng (n_ants x n_cities)"""
+        m, n = self.n_ants, self.n_cities
+        ants = np.arange(m)
+        weights = self.tau ** self.alpha * self.eta_beta
+
+        tours = np.empty((m, n), dtype=np.intp)
+        visited = np.zeros((m, n), dtype=bool)
+        current = self.np_rng.integers(0, n, m)
+        tours[:, 0] = current
+        visited[ants, current] = True
+
+        for step in range(1, n):
+            if self.candidates is None:
+                w = np.where(visited, 0.0, weights[current])
+                nxt = self.roulette(w)
+                stuck = nxt < 0
+                if stuck.any():
+                    nxt[stuck] = self.nearest_unvisited(current[stuck], visited[stuck])
+            else:
+                cand = self.candidates[current]
+                w = np.where(visited[ants[:, None], cand], 0.0, weights[current])
+                slot = self.roulette(w)
+                stuck = slot < 0
+                nxt = cand[ants, np.maximum(slot, 0)]
+                if stuck.any():
+                    nxt[stuck] = self.nearest_unvisited(current[stuck], visited[stuck])
+
+            tours[:, step] = nxt
+            visited[ants, nxt] = True
+            current = nxt
+
+        return tours
+
+
+    def edge_index(self, tours):
+        """Chỉ số (hàng, cột) trong self.tau của mọi cạnh trong các tour và mask cạnh có trong tau"""
+        frm = tours
+        to = np.roll(tours, -1, axis=1)
+        if self.symmetric:
+            frm, to = np.concatenate([frm, to], axis=1), np.concatenate([to, frm], axis=1)
+
+        if self.candidates is None:
+            return frm, to, np.ones(frm.shape, dtype=bool)
+
+        match = self.candidates[frm] == to[..., None]
+        return frm, np.argmax(match, axis=-1), match.any(axis=-1)
+
+
+    def deposit(self, tours, amounts):
+        """Rải pheromone amounts[i] lên mọi cạnh của tour i (scatter-add)"""
+        rows, cols, present = self.edge_index(tours)
+        amounts = np.broadcast_to(np.asarray(amounts, dtype=np.float64)[:, None], rows.shape)
+        np.add.at(self.tau, (rows[present], cols[present]), amounts[present])
+
+
+    def update_pheromone(self, tours, costs, best_tour, best_cost):
+        self.tau *= 1.0 - self.rho
+
+        with np.errstate(divide="ignore"):
+            amounts = self.q / costs
+
+        if self.variant == "mmas":
+            n = self.n_cities
+            self.tau_max = self.q / (self.rho * best_cost)
+            root = self.p_best ** (1.0 / n)
+            self.tau_min = self.tau_max * (1.0 - root) / (max(n / 2.0 - 1.0, 1.0) * root)
+
+            it_best = np.argmin(costs)
+            self.deposit(tours[it_best:it_best + 1], amounts[it_best:it_best + 1])
+            np.clip(self.tau, self.tau_min, self.tau_max, out=self.tau)
+            return
+
+        self.deposit(tours, amounts)
+        if self.variant == "elitist":
+            self.deposit(best_tour[None, :], [self.elitist_weight * self.q / best_cost])
+
+
+    def run(self, iters=100, seed=None, callback=None, termination=None):
+        """
+        callback(iter, best_cost, best_route) được gọi sau mỗi vòng lặp, trả về False để dừng sớm.
+        termination: `Termination` kiểm tra sau mỗi vòng lặp (xem core.termination).
+        """
+        if termination is not None:
+            termination.start()
+
+        self.np_rng = np.random.default_rng(seed)
+        self.tau[:] = 1.0
+        self.cost_func_call = 0
+
+        best_route, best_cost = None, np.inf
+        best_cost_hist = []
+        avg_cost_hist = []
+
+        for it in range(iters):
+            tours = self.construct()
+            costs = batch_cost_func(self.cost_matrix, tours)
+            self.cost_func_call += self.n_ants
+
+            idx = np.argmin(costs)
+            if costs[idx] < best_cost:
+                best_cost = costs[idx]
+                best_route = tours[idx].copy()
+
+            if self.variant == "mmas" and it == 0 and np.isfinite(best_cost):
+                # Khởi tạo pheromone bằng tau_max ước lượng từ lời giải đầu tiên
+                self.tau[:] = self.q / (self.rho * best_cost)
+
+            if np.isfinite(best_cost):
+                self.update_pheromone(tours, costs, best_route, best_cost)
+
+            best_cost_hist.append(best_cost)
+            avg_cost_hist.append(np.mean(costs))
+
+            if callback is not None and callback(it + 1, best_cost, best_route) is False:
+                break
+            if termination is not None and termination.should_stop(best_cost, self.cost_func_call):
+                break
+
+        return {
+            "avg_cost_hist": avg_cost_hist,
+            "best_cost_hist": best_cost_hist,
+            "best_cost": best_cost,
+            "best_route": best_route
+        }
+
+
+def run(cost_matrix, size_pop, max_iter, alpha, beta, rho, seed=None, variant="as", n_candidates=0, elitist_weight=None, q=1.0, callback=None, termination=None) -> OptimizationResult:
+    termination = as_termination(termination)
+    cost_matrix = as_cost_matrix(cost_matrix)
+    aco = ACO(cost_matrix, size_pop, alpha, beta, rho, q, variant, elitist_weight, n_candidates)
+
+    bench = time_memory_bench(aco.run, max_iter, seed, callback, termination)
+
+    result: OptimizationResult = {
+        "avgCostHist": [float(x) for x in bench["result"]["avg_cost_hist"]],
+        "bestCost": float(bench["result"]["best_cost"]),
+        "bestCostHist": [float(x) for x in bench["result"]["best_cost_hist"]],
+        # Không có tour hữu hạn (mọi cạnh bị cấm): bestCost = inf, bestRoute = None như Held-Karp
+        "bestRoute": None if bench["result"]["best_route"] is None else [int(x) for x in bench["result"]["best_route"]],
+        "costFuncCall": aco.cost_func_call,
         "memory": bench["memory_diff"],
         "time": bench["time"]
-    }
\ No newline at end of file
+    }
+    if termination is not None:
+        result["stopReason"] = termination.reason
+    return result
@@ -1,64 +1,203 @@
 import numpy as np
-import random
-
-from core.utils import OptimizationResult, time_memory_bench, batch_cost_func
-from core.two_opt import two_opt_population
-
-
-def cal_total_distance(routine, points):
-    routine = np.concatenate([routine, [routine[0]]])
-    return np.sum(np.linalg.norm(points[routine[:-1]] - points[routine[1:]], axis=1))
-
-
-def get_neighbor(solution):
-    a, b = random.sample(range(len(solution)), 2)
-    neighbor = solution.copy()
-    neighbor[a], neighbor[b] = neighbor[b], neighbor[a]
-    return neighbor
-
-
-def BCO_TSP(points, n_bees=50, max_iter=200):
-    n_cities = len(points)
-    
-    # Khởi tạo quần thể bee
-    bees = [np.random.permutation(n_cities) for _ in range(n_bees)]
-    best_bee = min(bees, key=lambda s: cal_total_distance(s, points))
-    best_dist = cal_total_distance(best_bee, points)
-    
-    history = [best_dist]  # lưu giá trị hội tụ
-    
-    for it in range(max_iter):
-        new_bees = []
-        for bee in bees:
-            neighbor = get_neighbor(bee)
-            if cal_total_distance(neighbor, points) < cal_total_distance(bee, points):
-                new_bees.append(neighbor)
-            else:
-                new_bees.append(bee)
-        
-        # backward pass: chia sẻ thông tin
-        bees = sorted(new_bees, key=lambda s: cal_total_distance(s, points))[:n_bees]
-        current_best = bees[0]
-        current_best_dist = cal_total_distance(current_best, points)
-        if current_best_dist < best_dist:
-            best_bee = current_best
-            best_dist = current_best_dist
-        
-        history.append(best_dist)
-        if it % 20 == 0:
-            print(f"Iter {it}: Best distance = {best_dist:.4f}")
-    
-    return best_bee, best_dist, history
-    
-
-def run(points, n_bees=50, max_iter=200) -> OptimizationResult:
-    bench = time_memory_bench(BCO_TSP, points, n_bees, max_iter)
-
-    return {
-        "bestCost": float(bench["result"][1]),
-        "bestCostHist": [float(x) for x in bench["result"][2]],
-        "bestRoute": bench["result"][0].tolist(),
-        "costFuncCall": 0,
+
+from core.utils import OptimizationResult, time_memory_bench, batch_cost_func, as_cost_matrix
+from core.termination import as_termination
+
+
+class BCO:
+    """
+    Bee Colony Optimization trên ma trận chi phí, cả đàn ong là 1 mảng (n_bees x n_cities).
+
+    Mỗi vòng lặp gồm:
+    - Forward pass: mỗi con ong thử `n_moves` bước swap và `n_moves` bước chèn ngẫu nhiên,
+      delta chi phí tính O(1) từ các cạnh thay đổi, giữ bước tốt nhất nếu nó cải thiện tour.
+    - Backward pass: chi phí của cả đàn được tính lại bằng 1 lần `batch_cost_func`, mỗi con ong
+      trung thành với lời giải của mình với xác suất exp(-(O_max - O_b) / u), các con ong bỏ cuộc
+      chọn 1 con ong trung thành làm người tuyển (roulette theo O_b) và sao chép tour của nó.
+
+    Swap và chèn đều giữ nguyên chiều của tour nên đúng với cả ma trận bất đối xứng.
+    """
+
+    def __init__(
+        self,
+        cost_matrix: np.ndarray,
+        n_bees: int = 50,
+        n_moves: int = 8
+    ):
+        self.cost_matrix = as_cost_matrix(cost_matrix)
+        self.n_cities = self.cost_matrix.shape[0]
+        self.n_bees = n_bees
+        self.n_moves = n_moves
+
+        self.cost_func_call = 0
+        self.np_rng = np.random.default_rng()
+
+
+    def swap_moves(self):
+        """Delta của n_moves bước đổi chỗ 2 vị trí không kề nhau cho mỗi con ong, shape (n_bees x n_moves)"""
+        n, C, x = self.n_cities, self.cost_matrix, self.bees
+        shape = (self.n_bees, self.n_moves)
+        rows = np.arange(self.n_bees)[:, None]
+
+        i = self.np_rng.integers(0, n, shape)
+        j = (i + self.np_rng.integers(2, n - 1, shape)) % n
+        lo, hi = np.minimum(i, j), np.maximum(i, j)
+
+        a, b = x[rows, lo], x[rows, hi]
+        ap, an = x[rows, lo - 1], x[rows, (lo + 1) % n]
+        bp, bn = x[rows, hi - 1], x[rows, (hi + 1) % n]
+        delta = (
+            C[ap, b] + C[b, an] + C[bp, a] + C[a, bn] -
+            C[ap, a] - C[a, an] - C[bp, b] - C[b, bn]
+        )
+        return delta, lo, hi
+
+
+    def insert_moves(self):
+        """Delta của n_moves bước chuyển thành phố ở vị trí i ra sau vị trí t, shape (n_bees x n_moves)"""
+        n, C, x = self.n_cities, self.cost_matrix, self.bees
+        shape = (self.n_bees, self.n_moves)
+        rows = np.arange(self.n_bees)[:, None]
+
+        i = self.np_rng.integers(0, n, shape)
+        t = self.np_rng.integers(0, n, shape)
+
+        a = x[rows, i]
+        p, s = x[rows, i - 1], x[rows, (i + 1) % n]
+        u, v = x[rows, t], x[rows, (t + 1) % n]
+        delta = C[p, s] - C[p, a] - C[a, s] + C[u, a] + C[a, v] - C[u, v]
+        delta[(t == i) | (t == (i - 1) % n)] = np.inf
+        return delta, i, t
+
+
+    def forward_pass(self):
+        """Mỗi con ong đi tới lời giải láng giềng tốt nhất trong 2 * n_moves bước, nếu nó tốt hơn"""
+        n, m = self.n_cities, self.n_moves
+        if n < 4:
+            return
+
+        swap_delta, lo, hi = self.swap_moves()
+        insert_delta, i, t = self.insert_moves()
+        self.cost_func_call += 2 * self.n_bees * m
+
+        delta = np.concatenate([swap_delta, insert_delta], axis=1)
+        choice = np.argmin(delta, axis=1)
+        improved = delta[np.arange(self.n_bees), choice] < 0
+        if not improved.any():
+            return
+
+        # Chỉ số nguồn cho từng vị trí: tour mới = take_along_axis(tour cũ, src)
+        cols = np.arange(n)[None, :]
+        src = np.broadcast_to(cols, (self.n_bees, n)).copy()
+
+        is_swap = improved & (choice < m)
+        bees = np.flatnonzero(is_swap)
+        k = choice[bees]
+        src[bees, lo[bees, k]] = hi[bees, k]
+        src[bees, hi[bees, k]] = lo[bees, k]
+
+        # Chèn: t > i xoay trái đoạn [i, t], t < i xoay phải đoạn [t + 1, i]
+        bees = np.flatnonzero(improved & ~is_swap)
+        k = choice[bees] - m
+        a, b = i[bees, k], t[bees, k]
+        forward = b > a
+        start = np.where(forward, a, b + 1)[:, None]
+        stop = np.where(forward, b, a)[:, None]
+        shift = np.where(forward, 1, -1)[:, None]
+        inside = (cols >= start) & (cols <= stop)
+        src[bees] = np.where(inside, start + (cols - start + shift) % (stop - start + 1), cols)
+
+        self.bees = np.take_along_axis(self.bees, src, axis=1)
+
+
+    def backward_pass(self, u):
+        """Quyết định trung thành và tuyển mộ sau forward pass thứ u"""
+        costs = self.costs
+        c_min, c_max = np.min(costs), np.max(costs)
+        if not np.isfinite(c_max) or c_max - c_min <= 0:
+            # Cả đàn bằng nhau (hoặc có tour vô hạn): chuẩn hóa theo thứ hạng
+            score = 1.0 - np.argsort(np.argsort(costs, kind="stable"), kind="stable") / max(self.n_bees - 1, 1)
+        else:
+            score = (c_max - costs) / (c_max - c_min)
+
+        loyal = self.np_rng.random(self.n_bees) < np.exp(-(score.max() - score) / u)
+        loyal[np.argmax(score)] = True
+        uncommitted = np.flatnonzero(~loyal)
+        if len(uncommitted) == 0:
+            return
+
+        recruiters = np.flatnonzero(loyal)
+        weights = score[recruiters] + 1e-12
+        chosen = recruiters[self.np_rng.choice(len(recruiters), len(uncommitted), p=weights / weights.sum())]
+        self.bees[uncommitted] = self.bees[chosen]
+        self.costs[uncommitted] = self.costs[chosen]
+
+
+    def run(self, iters=200, seed=None, callback=None, termination=None):
+        """
+        callback(iter, best_cost, best_route) được gọi sau mỗi vòng lặp, trả về False để dừng sớm.
+        termination: `Termination` kiểm tra sau mỗi vòng lặp (xem core.termination).
+        """
+        if termination is not None:
+            termination.start()
+
+        self.np_rng = np.random.default_rng(seed)
+        n = self.n_cities
+
+        self.bees = self.np_rng.permuted(np.tile(np.arange(n), (self.n_bees, 1)), axis=1)
+        self.costs = batch_cost_func(self.cost_matrix, self.bees)
+        self.cost_func_call = self.n_bees
+
+        idx = np.argmin(self.costs)
+        best_cost, best_route = self.costs[idx], self.bees[idx].copy()
+        best_cost_hist = [best_cost]
+        avg_cost_hist = [np.mean(self.costs)]
+
+        for it in range(iters):
+            self.forward_pass()
+
+            # 1 lần đánh giá cả đàn mỗi vòng lặp
+            self.costs = batch_cost_func(self.cost_matrix, self.bees)
+            self.cost_func_call += self.n_bees
+
+            idx = np.argmin(self.costs)
+            if self.costs[idx] < best_cost:
+                best_cost, best_route = self.costs[idx], self.bees[idx].copy()
+
+            best_cost_hist.append(best_cost)
+            avg_cost_hist.append(np.mean(self.costs))
+
+            self.backward_pass(it + 1)
+
+            if callback is not None and callback(it + 1, best_cost, best_route) is False:
+                break
+            if termination is not None and termination.should_stop(best_cost, self.cost_func_call):
+                break
+
+        return {
+            "avg_cost_hist": avg_cost_hist,
+            "best_cost_hist": best_cost_hist,
+            "best_cost": best_cost,
+            "best_route": best_route
+        }
+
+
+def run(cost_matrix: np.ndarray, n_bees=50, max_iter=200, seed=None, n_moves=8, callback=None, termination=None) -> OptimizationResult:
+    termination = as_termination(termination)
+    cost_matrix = as_cost_matrix(cost_matrix)
+    bco = BCO(cost_matrix, n_bees, n_moves)
+
+    bench = time_memory_bench(bco.run, max_iter, seed, callback, termination)
+
+    result: OptimizationResult = {
+        "avgCostHist": [float(x) for x in bench["result"]["avg_cost_hist"]],
+        "bestCost": float(bench["result"]["best_cost"]),
+        "bestCostHist": [float(x) for x in bench["result"]["best_cost_hist"]],
+        "bestRoute": [int(x) for x in bench["result"]["best_route"]],
+        "costFuncCall": bco.cost_func_call,
         "memory": bench["memory_diff"],
         "time": bench["time"]
-    }
\ No newline at end of file
+    }
+    if termination is not None:
+        result["stopReason"] = termination.reason
+    return result
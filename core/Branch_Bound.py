@@ -0,0 +1,313 @@
+import heapq
+import itertools
+import time
+import numpy as np
+
+from core.utils import OptimizationResult, time_memory_bench, cost_func
+
+
+class Assignment:
+    """
+    Bài toán phân công (AP) giải bằng thuật toán Hungary (đường tăng ngắn nhất, O(n^3)),
+    vòng lặp trong vector hóa trên trục cột.
+
+    Trạng thái (u, v, p) dùng chỉ số từ 1, cột 0 là cột ảo:
+    u, v là biến đối ngẫu của hàng / cột, p[j] là hàng được gán cho cột j (0 = chưa gán).
+    Bất biến: c[i, j] - u[i] - v[j] >= 0 với mọi cạnh, = 0 với cạnh đã gán. Khi chỉ tăng
+    chi phí (cấm cạnh) và bỏ gán 1 hàng, 1 lần `augment` là đủ để có lại lời giải tối ưu.
+    """
+
+    def __init__(self, cost, u=None, v=None, p=None):
+        n = cost.shape[0]
+        self.n = n
+        # Ma trận chỉ số từ 1, hàng / cột 0 không dùng
+        self.cost = np.full((n + 1, n + 1), np.inf)
+        self.cost[1:, 1:] = cost
+        self.u = np.zeros(n + 1) if u is None else u.copy()
+        self.v = np.zeros(n + 1) if v is None else v.copy()
+        self.p = np.zeros(n + 1, dtype=np.intp) if p is None else p.copy()
+
+
+    def augment(self, row):
+        """Gán thêm hàng `row` (từ 1) theo đường tăng ngắn nhất, False nếu không có phân công hữu hạn"""
+        n, cost, u, v, p = self.n, self.cost, self.u, self.v, self.p
+        p[0] = row
+        j0 = 0
+        minv = np.full(n + 1, np.inf)
+        used = np.zeros(n + 1, dtype=bool)
+        way = np.zeros(n + 1, dtype=np.intp)
+
+        while True:
+            used[j0] = True
+            i0 = p[j0]
+            reduced = cost[i0, 1:] - u[i0] - v[1:]
+            free = ~used[1:]
+            better = free & (reduced < minv[1:])
+            minv[1:][better] = reduced[better]
+            way[1:][better] = j0
+
+            candidates = np.where(free, minv[1:], np.inf)
+            j1 = int(np.argmin(candidates)) + 1
+            delta = candidates[j1 - 1]
+            if not np.isfinite(delta):
+                return False
+
+            u[p[used]] += delta
+            v[used] -= delta
+            minv[1:][free] -= delta
+            j0 = j1
+            if p[j0] == 0:
+                break
+
+        while j0:
+            j1 = way[j0]
+            p[j0] = p[j1]
+            j0 = j1
+        return True
+
+
+    def solve(self):
+        for row in range(1, self.n + 1):
+            if not self.augment(row):
+                return False
+        return True
+
+
+    def successors(self):
+        """succ[i] = thành phố đi sau i (chỉ số từ 0)"""
+        succ = np.empty(self.n, dtype=np.intp)
+        succ[self.p[1:] - 1] = np.arange(self.n)
+        return succ
+
+
+    def value(self):
+        return float(self.cost[self.p[1:], np.arange(1, self.n + 1)].sum())
+
+
+def subtours(succ):
+    """Tách hoán vị succ thành các chu trình"""
+    seen = np.zeros(len(succ), dtype=bool)
+    cycles = []
+    for start in range(len(succ)):
+        if seen[start]:
+            continue
+        cycle = []
+        city = start
+        while not seen[city]:
+            seen[city] = True
+            cycle.append(city)
+            city = succ[city]
+        cycles.append(cycle)
+    return cycles
+
+
+class Branch_Bound:
+    """
+    Branch-and-bound chính xác cho TSP (đặc biệt là bất đối xứng) với cận dưới bài toán phân công.
+
+    - Cận dưới: chi phí AP (mỗi thành phố 1 cạnh ra, 1 cạnh vào, cho phép chu trình con).
+      Nếu lời giải AP là 1 chu trình duy nhất thì nó là tour tối ưu của nút.
+    - Phân nhánh (Carpaneto-Toth): chọn chu trình con có ít cạnh tự do nhất e_1..e_k,
+      nhánh thứ i cấm e_i và bắt buộc e_1..e_{i-1}, các nhánh rời nhau.
+      Mỗi nút con chỉ cần 1 lần augment từ trạng thái đối ngẫu của nút cha.
+    - Duyệt: lặn sâu theo nút con có cận nhỏ nhất, các nút con còn lại vào hàng đợi ưu tiên;
+      hết đường lặn thì khởi động lại từ nút có cận nhỏ nhất (best-first).
+    - Cận trên ban đầu: GA + local search nhanh (Or-opt với ma trận bất đối xứng, 2-opt nếu đối xứng).
+      Ở gốc, cạnh có chi phí rút gọn > UB - LB bị loại vì không thể nằm trong tour tốt hơn.
+
+    Cận AP chặt với ma trận bất đối xứng (thường giải chính xác 30-60 thành phố),
+    nhưng yếu với ma trận đối xứng (nhiều chu trình 2 thành phố), khi đó số nút tăng nhanh.
+    """
+
+    def __init__(self, cost_matrix, time_limit=None, max_nodes=None, initial_ga=True, seed=None):
+        self.cost_matrix = np.array(cost_matrix, dtype=np.float64)
+        self.n_cities = self.cost_matrix.shape[0]
+        self.time_limit = time_limit
+        self.max_nodes = max_nodes
+        self.initial_ga = initial_ga
+        self.seed = seed
+
+        self.base = self.cost_matrix.copy()
+        np.fill_diagonal(self.base, np.inf)
+
+        self.nodes = 0
+        self.lower_bound = 0.0
+        self.best_cost = np.inf
+        self.best_route = None
+
+
+    def initial_upper_bound(self):
+        from core.GA import run as run_GA
+
+        symmetric = bool(np.array_equal(self.cost_matrix, self.cost_matrix.T))
+        result = run_GA(
+            self.cost_matrix, 40, 0.9, 0.05, 2, 3, 3, 60, self.seed, False,
+            local_search="2opt" if symmetric else "or_opt", n_candidates=min(8, self.n_cities - 1)
+        )
+        self.update_best(result["bestRoute"])
+
+
+    def update_best(self, route):
+        cost = cost_func(self.cost_matrix, route)
+        if cost < self.best_cost:
+            self.best_cost = cost
+            self.best_route = [int(x) for x in route]
+            return True
+        return False
+
+
+    def node_matrix(self, excluded, included):
+        cost = self.base.copy()
+        for a, b in excluded:
+            cost[a, b] = np.inf
+        for a, b in included:
+            keep = cost[a, b]
+            cost[a, :] = np.inf
+            cost[:, b] = np.inf
+            cost[a, b] = keep
+        return cost
+
+
+    def children(self, node):
+        """Các nút con đã giải AP (cận hữu hạn và < UB) của 1 nút có lời giải AP gồm nhiều chu trình con"""
+        bound, _, excluded, included, ap = node
+        succ = ap.successors()
+        fixed = set(included)
+
+        # Chu trình con có ít cạnh tự do nhất (ít nút con nhất)
+        cycles = [[(a, int(succ[a])) for a in cycle] for cycle in subtours(succ)]
+        free = min(([e for e in cycle if e not in fixed] for cycle in cycles), key=len)
+
+        result = []
+        for k, (a, b) in enumerate(free):
+            child_excluded = excluded + ((a, b),)
+            child_included = included + tuple(free[:k])
+            child = Assignment(self.node_matrix(child_excluded, child_included), ap.u, ap.v, ap.p)
+            # Bỏ gán cạnh bị cấm rồi augment lại hàng của nó
+            child.p[b + 1] = 0
+            self.nodes += 1
+            if not child.augment(a + 1):
+                continue
+            child_bound = child.value()
+            if child_bound < self.best_cost - 1e-9:
+                result.append((child_bound, next(self.counter), child_excluded, child_included, child))
+        return result
+
+
+    def evaluate(self, node):
+        """True nếu lời giải AP của nút là tour (đã cập nhật UB), ngược lại False"""
+        succ = node[4].successors()
+        if len(subtours(succ)) > 1:
+            return False
+
+        route, city = [], 0
+        for _ in range(self.n_cities):
+            route.append(city)
+            city = int(succ[city])
+        self.update_best(route)
+        return True
+
+
+    def out_of_budget(self, start):
+        if self.max_nodes is not None and self.nodes >= self.max_nodes:
+            return True
+        return self.time_limit is not None and time.perf_counter() - start >= self.time_limit
+
+
+    def run(self, callback=None):
+        """
+        callback(nodes, best_cost, best_route) được gọi mỗi khi tìm được tour tốt hơn, trả về False để dừng.
+
+        Returns
+        -------
+        tuple
+            (best_route, best_cost, lower_bound, optimal, best_cost_hist)
+        """
+        start = time.perf_counter()
+        n = self.n_cities
+        self.counter = itertools.count()
+        best_cost_hist = []
+
+        if n == 0:
+            return [], 0.0, 0.0, True, [0.0]
+
+        if n <= 3:
+            # n <= 3 có tối đa 2 tour (2 chiều của 3 thành phố, khác nhau khi ma trận bất đối xứng), so trực tiếp
+            for route in ([0, 1, 2], [0, 2, 1])[:1 if n < 3 else 2]:
+                self.update_best(route[:n])
+            return self.best_route, self.best_cost, self.best_cost, True, [self.best_cost]
+
+        if self.initial_ga:
+            self.initial_upper_bound()
+            best_cost_hist.append(self.best_cost)
+
+        root = Assignment(self.base)
+        self.nodes = 1
+        if not root.solve():
+            # Không có phân công hữu hạn -> không có tour hữu hạn
+            return self.best_route, self.best_cost, np.inf, True, best_cost_hist
+
+        root_bound = root.value()
+        if np.isfinite(self.best_cost):
+            # Loại cạnh theo chi phí rút gọn: mọi tour chứa (i, j) có chi phí >= LB + rc(i, j)
+            reduced = root.cost[1:, 1:] - root.u[1:, None] - root.v[None, 1:]
+            self.base[reduced > self.best_cost - root_bound + 1e-9] = np.inf
+
+        heap = [(root_bound, next(self.counter), (), (), root)]
+        optimal = True
+
+        while heap:
+            node = heapq.heappop(heap)
+            self.lower_bound = node[0]
+            if node[0] >= self.best_cost - 1e-9:
+                break
+
+            # Lặn sâu theo nút con tốt nhất
+            while node is not None:
+                if self.out_of_budget(start):
+                    optimal = False
+                    heap.append(node)
+                    break
+
+                improved_before = self.best_cost
+                if self.evaluate(node):
+                    if self.best_cost < improved_before:
+                        best_cost_hist.append(self.best_cost)
+                        if callback is not None and callback(self.nodes, self.best_cost, self.best_route) is False:
+                            optimal = False
+                            heap.append(node)
+                            break
+                    node = None
+                    continue
+
+                kids = sorted(self.children(node), key=lambda c: c[0])
+                node = kids[0] if kids else None
+                for kid in kids[1:]:
+                    heapq.heappush(heap, kid)
+
+            if not optimal:
+                break
+
+        if optimal:
+            self.lower_bound = self.best_cost
+        else:
+            self.lower_bound = min((c[0] for c in heap), default=self.best_cost)
+
+        return self.best_route, self.best_cost, min(self.lower_bound, self.best_cost), optimal, best_cost_hist
+
+
+def run(cost_matrix, time_limit=None, max_nodes=None, initial_ga=True, seed=None, callback=None) -> OptimizationResult:
+    branch_bound = Branch_Bound(cost_matrix, time_limit, max_nodes, initial_ga, seed)
+    bench = time_memory_bench(branch_bound.run, callback)
+    route, best_cost, lower_bound, optimal, best_cost_hist = bench["result"]
+
+    return {
+        "bestCost": float(best_cost),
+        "bestCostHist": [float(x) for x in best_cost_hist],
+        "bestRoute": route,
+        "costFuncCall": branch_bound.nodes,
+        "lowerBound": float(lower_bound),
+        "memory": bench["memory_diff"],
+        "optimal": optimal,
+        "time": bench["time"]
+    }
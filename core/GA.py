@@ -1,7 +1,15 @@
 import numpy as np
 
-from core.utils import OptimizationResult, time_memory_bench, batch_cost_func
-from core.two_opt import two_opt_population
+from core.utils import OptimizationResult, CostProvider, time_memory_bench, batch_cost_func, as_cost_matrix
+from core.two_opt import TwoOpt
+from core.local_search import local_search_op
+from core.candidates import candidate_lists, DEFAULT_CANDIDATES
+from core.termination import as_termination
+from core.profiling import PhaseTimer
+
+
+# Số phần tử tối đa của mỗi khối khi xử lý quần thể theo khối hàng
+BLOCK_ELEMENTS = 1 << 15
 
 
 class GA:
@@ -13,9 +21,16 @@ class GA:
         mutation_rate: float = 0.02,
         elite_size: int = 1,
         tournament_size: int = 3,
-        two_opt_max: int = 5
+        two_opt_max: int = 5,
+        two_opt_neighbors: int = 0,
+        local_search: str = "2opt",
+        crossover: str = "ox",
+        mutation: str = "swap",
+        double_buffer: bool = False,
+        n_candidates: int = DEFAULT_CANDIDATES
     ):
-        self.cost_matrix = cost_matrix.astype(np.float64)
+        # Không copy khi ma trận đã là float64 (vd. view trên shared memory), CostProvider giữ nguyên
+        self.cost_matrix = as_cost_matrix(cost_matrix)
         self.n_cities = cost_matrix.shape[0]
         self.pop_size = population_size
         self.crossover_rate = crossover_rate
@@ -23,104 +38,413 @@ class GA:
         self.elite_size = elite_size
         self.tournament_size = tournament_size
         self.two_opt_max = two_opt_max
+        # two_opt_neighbors > 0: dùng 2-opt theo danh sách láng giềng thay vì quét mọi cặp.
+        # CostProvider mặc định dùng danh sách láng giềng: quét mọi cặp cần các mảng O(n^2)
+        if two_opt_neighbors <= 0 and isinstance(self.cost_matrix, CostProvider):
+            two_opt_neighbors = n_candidates
+        self.two_opt = TwoOpt(self.cost_matrix, two_opt_neighbors) if two_opt_neighbors > 0 else None
+        # Toán tử local search: "2opt", "or_opt", "3opt" hoặc "lk" (3 loại sau đúng với ma trận bất đối xứng)
+        self.local_search = local_search_op(local_search, self.cost_matrix)
+        self.use_two_opt_engine = self.two_opt is not None and local_search == "2opt"
+        # Toán tử lai ghép theo lô: "ox", "pmx" hoặc "erx" (giữ cạnh của cha mẹ)
+        self.crossover_op = {"ox": self.order_crossover, "pmx": self.pmx_crossover, "erx": self.edge_crossover}[crossover]
+        # Toán tử đột biến tại chỗ: "swap", "inversion", "scramble" hoặc "neighbor"
+        self.mutate_op = {
+            "swap": self.per_gen_mutate,
+            "inversion": self.inversion_mutate,
+            "scramble": self.scramble_mutate,
+            "neighbor": self.neighbor_mutate
+        }[mutation]
+        # Đột biến "neighbor" chỉ nối 1 thành phố với 1 trong n_candidates láng giềng gần nhất
+        self.n_candidates = n_candidates
 
         self.population = np.array([])
         self.costs = np.zeros(self.pop_size)
 
+        # double_buffer: quần thể và mating pool nằm trong 2 buffer cấp phát sẵn,
+        # mỗi thế hệ chỉ ghi đè lên chúng thay vì tạo mảng mới
+        self.double_buffer = double_buffer
+        self.pop_dtype = np.int16 if self.n_cities < 32768 else np.int32
+        self.buffers = None
+        self.elite_buffer = None
+
         # Sử dụng để đánh giá
         self.cost_func_call = 0
         self.np_rng = np.random.default_rng()
+        # Thời gian cộng dồn của từng pha trong evolve (selection, crossover, mutation, local_search, evaluation)
+        self.timer = PhaseTimer()
 
 
     def evaluate(self):
         self.cost_func_call += self.pop_size # Chức năng đếm số lần gọi cost function
-        self.costs = batch_cost_func(self.cost_matrix, self.population)
+        if self.double_buffer:
+            batch_cost_func(self.cost_matrix, self.population, out=self.costs)
+        else:
+            self.costs = batch_cost_func(self.cost_matrix, self.population)
         
         return self.costs
 
 
-    def tournament_selection(self):
+    def tournament_winners(self):
         # Tạo ma trận random indices (pop_size x k)
         candidates = self.np_rng.integers(0, self.pop_size, size=(self.pop_size, self.tournament_size))
         # Lấy index cá thể thắng từng tournament
         winner_idx = np.argmin(self.costs[candidates], axis=1)
-        winner_idx = candidates[np.arange(self.pop_size), winner_idx]
-        return self.population[winner_idx]
+        return candidates[np.arange(self.pop_size), winner_idx]
+
+
+    def tournament_selection(self):
+        return self.population[self.tournament_winners()]
     
 
-    def order_crossover(self, parent1, parent2):
+    def cut_points(self, size):
+        """Mỗi hàng 1 cặp điểm cắt start < end, phân phối đều như choice(N, 2, replace=False)"""
         N = self.n_cities
-        # Lựa chọn 2 phần tử không trùng lặp trong dãy [0, n)
-        # Sắp xếp 2 phần tử này để start < end
-        start, end = sorted(self.np_rng.choice(N, 2, replace=False))
-        child = np.full(N, -1)
-        child[start:end] = parent1[start:end]
+        a = self.np_rng.integers(0, N, size)
+        b = self.np_rng.integers(0, N - 1, size)
+        b += b >= a
+        return np.minimum(a, b), np.maximum(a, b)
+
+
+    def segment_mask(self, start, end):
+        # in_seg[b, i] = start[b] <= i < end[b]
+        cols = np.arange(self.n_cities)
+        return (cols >= start[:, None]) & (cols < end[:, None])
+
+
+    def blocks(self, n_rows):
+        """Chia n_rows hàng thành các khối ~BLOCK_ELEMENTS phần tử để giới hạn bộ nhớ tạm"""
+        step = max(1, BLOCK_ELEMENTS // max(1, self.n_cities))
+        for start in range(0, n_rows, step):
+            yield slice(start, min(start + step, n_rows))
+
+
+    def order_crossover(self, parents1, parents2, out=None):
+        """
+        OX cho cả lô cặp cha mẹ cùng lúc (mỗi hàng 1 cặp).
+        Con giữ đoạn [start, end) của parent1, các gen còn lại lấy theo thứ tự
+        trong parent2 và lấp từ vị trí end trở đi (vòng).
+        """
+        parents1, parents2 = np.atleast_2d(parents1), np.atleast_2d(parents2)
+        B, N = parents1.shape
+        if out is None:
+            out = np.empty((B, N), dtype=np.int32)
+
+        start, end = self.cut_points(B)
+        for sl in self.blocks(B):
+            self.ox_block(parents1[sl], parents2[sl], start[sl], end[sl], out[sl])
+        return out
+
+
+    def ox_block(self, parents1, parents2, start, end, out):
+        B, N = parents1.shape
+        in_seg = self.segment_mask(start, end)
 
-        used = np.zeros(N, dtype=bool)
         # Đánh dấu đoạn gen của parent1, để tránh lấp vào
-        used[parent1[start:end]] = True
+        used = np.zeros((B, N), dtype=bool)
+        np.put_along_axis(used, parents1, in_seg, axis=1)
+        keep = ~np.take_along_axis(used, parents2, axis=1)
 
-        pos = end
-        for city in parent2:
-            if not used[city]:
-                child[pos] = city
-                used[city] = True
-                pos = (pos + 1) % N
+        # Gen thứ r (theo thứ tự parent2) được đặt ở vị trí (end + r) % N
+        rank = np.cumsum(keep, axis=1) - 1
+        target = (end[:, None] + rank) % N
+        rows = np.broadcast_to(np.arange(B)[:, None], (B, N))
 
-        return child
-    
+        out[in_seg] = parents1[in_seg]
+        out[rows[keep], target[keep]] = parents2[keep]
+
+
+    def pmx_crossover(self, parents1, parents2, out=None):
+        """
+        PMX cho cả lô cặp cha mẹ cùng lúc (mỗi hàng 1 cặp).
+        Con giữ đoạn [start, end) của parent1, gen của parent2 ngoài đoạn bị trùng
+        được ánh xạ qua cặp (parent1[i] -> parent2[i]) đến khi không còn trùng.
+        """
+        parents1, parents2 = np.atleast_2d(parents1), np.atleast_2d(parents2)
+        B, N = parents1.shape
+        if out is None:
+            out = np.empty((B, N), dtype=np.int32)
+
+        start, end = self.cut_points(B)
+        for sl in self.blocks(B):
+            self.pmx_block(parents1[sl], parents2[sl], start[sl], end[sl], out[sl])
+        return out
+
+
+    def pmx_block(self, parents1, parents2, start, end, out):
+        B, N = parents1.shape
+        in_seg = self.segment_mask(start, end)
+        rows = np.arange(B)[:, None]
+
+        # pos1[b, c] = vị trí của thành phố c trong parent1
+        pos1 = np.empty((B, N), dtype=np.intp)
+        np.put_along_axis(pos1, parents1, np.arange(N)[None, :], axis=1)
+
+        genes = parents2.copy()
+        conflict = in_seg[rows, pos1[rows, genes]] & ~in_seg
+        while conflict.any():
+            r, c = np.nonzero(conflict)
+            genes[r, c] = parents2[r, pos1[r, genes[r, c]]]
+            conflict[r, c] = in_seg[r, pos1[r, genes[r, c]]]
 
-    def crossover_population(self, selected):
-        new_pop = []
-        for i in range(0, self.pop_size, 2):
-            p1, p2 = selected[i], selected[(i + 1) % self.pop_size]
-            if self.np_rng.random() < self.crossover_rate:
-                c1 = self.order_crossover(p1, p2)
-                c2 = self.order_crossover(p2, p1)
-            else:
-                c1, c2 = p1.copy(), p2.copy()
-            new_pop.extend([c1, c2])
-        return np.array(new_pop[:self.pop_size])
+        out[:] = np.where(in_seg, parents1, genes)
+
+
+    def edge_crossover(self, parents1, parents2, out=None):
+        """
+        Edge recombination (ERX) cho cả lô cặp cha mẹ cùng lúc (mỗi hàng 1 cặp).
+
+        Bảng cạnh adj[b, c] = (pred, succ của c trong parent1, pred, succ của c trong parent2)
+        là 1 mảng (B x N x 4). Con bắt đầu từ parent1[0], mỗi bước đi tới láng giềng chưa thăm
+        của thành phố hiện tại: ưu tiên cạnh chung của 2 cha mẹ, sau đó láng giềng còn ít
+        láng giềng chưa thăm nhất, hòa thì chọn ngẫu nhiên. Hết láng giềng thì chọn ngẫu nhiên
+        1 thành phố chưa thăm. Mọi hàng đi cùng 1 bước nên vòng lặp Python chỉ có N bước.
+        """
+        parents1, parents2 = np.atleast_2d(parents1), np.atleast_2d(parents2)
+        B, N = parents1.shape
+        if out is None:
+            out = np.empty((B, N), dtype=np.int32)
+
+        rows = np.arange(B)
+        cols = rows[:, None]
+        adj = np.empty((B, N, 4), dtype=np.intp)
+        for k, parents in enumerate((parents1, parents2)):
+            parents = parents.astype(np.intp)
+            adj[cols, parents, 2 * k] = np.roll(parents, 1, axis=1)
+            adj[cols, parents, 2 * k + 1] = np.roll(parents, -1, axis=1)
+
+        # Bảng cạnh không đổi trong lúc dựng con: tính 1 lần ô trùng (láng giềng xuất hiện ở
+        # ô trước đó) và ô là cạnh chung (láng giềng xuất hiện 2 lần)
+        same = adj[..., :, None] == adj[..., None, :]
+        distinct = ~(same & np.tri(4, k=-1, dtype=bool)).any(axis=3)
+        shared = same.sum(axis=3) > 1
+
+        # degree[b, c] = số láng giềng phân biệt chưa thăm của c, giảm dần khi thăm thành phố
+        degree = distinct.sum(axis=2)
+        visited = np.zeros((B, N), dtype=bool)
+        cur = parents1[:, 0].astype(np.intp)
+
+        for k in range(N):
+            out[:, k] = cur
+            visited[rows, cur] = True
+            if k == N - 1:
+                break
+
+            cand = adj[rows, cur]
+            np.subtract.at(degree, (cols, cand), distinct[rows, cur])
+            valid = ~visited[cols, cand]
+
+            score = degree[cols, cand] - 4.0 * shared[rows, cur] + self.np_rng.random((B, 4))
+            score[~valid] = np.inf
+            nxt = cand[rows, np.argmin(score, axis=1)]
+
+            stuck = np.flatnonzero(~valid.any(axis=1))
+            if len(stuck) > 0:
+                nxt[stuck] = np.argmax(np.where(visited[stuck], -1.0, self.np_rng.random((len(stuck), N))), axis=1)
+            cur = nxt
+
+        return out
+
+
+    def crossover_population(self, selected, out=None):
+        if out is None:
+            out = np.empty((self.pop_size, self.n_cities), dtype=np.int32)
+
+        # Cặp (i, i + 1) với i chẵn, cặp cuối quay vòng về 0 khi pop_size lẻ
+        n_pairs = (self.pop_size + 1) // 2
+        do = self.np_rng.random(n_pairs) < self.crossover_rate
+
+        # Mặc định con là bản sao cha mẹ (out[i] = selected[i]), sau đó ghi đè các cặp được lai
+        np.copyto(out, selected, casting="unsafe")
+
+        # Lai theo khối cặp để mảng tạm của toán tử lai ghép không vượt quá ~BLOCK_ELEMENTS phần tử
+        crossover = self.crossover_op
+        pairs = np.flatnonzero(do)
+        for sl in self.blocks(len(pairs)):
+            first = 2 * pairs[sl]
+            out[first] = crossover(selected[first], selected[(first + 1) % self.pop_size])
+
+        pairs = pairs[2 * pairs + 1 < self.pop_size]
+        for sl in self.blocks(len(pairs)):
+            second = 2 * pairs[sl] + 1
+            out[second] = crossover(selected[second], selected[second - 1])
+
+        return out
     
 
+    def mutation_points(self):
+        """
+        Chọn 2 vị trí (a < b) cho mỗi cá thể đột biến, hoàn toàn theo lô.
+        Mỗi gen bị đánh dấu với xác suất mutation_rate, chỉ cá thể có >= 2 gen được đánh dấu mới đột biến.
+        Giá trị ngẫu nhiên u của các gen được đánh dấu vẫn phân phối đều, nên 2 gen có u nhỏ nhất
+        là 1 cặp đều trong các gen được đánh dấu (giống choice(..., 2, replace=False)).
+        """
+        N = self.n_cities
+        valid, a, b = [], [], []
+
+        # Sinh theo khối hàng: luồng số ngẫu nhiên giống hệt 1 lần random((pop_size, N))
+        for sl in self.blocks(self.pop_size):
+            # Mask per-gene
+            u = self.np_rng.random((sl.stop - sl.start, N))
+
+            # Chỉ lấy các cá thể có >=2 True
+            rows = np.flatnonzero(np.count_nonzero(u < self.mutation_rate, axis=1) >= 2)
+            if len(rows) == 0 or N < 2:
+                continue
+
+            keys = u[rows]
+            keys[keys >= self.mutation_rate] = np.inf
+            pos = np.argpartition(keys, 1, axis=1)[:, :2]
+
+            valid.append(rows + sl.start)
+            a.append(pos.min(axis=1))
+            b.append(pos.max(axis=1))
+
+        if not valid:
+            empty = np.empty(0, dtype=np.intp)
+            return empty, empty, empty
+        return np.concatenate(valid), np.concatenate(a), np.concatenate(b)
+
+
     # Cải thiện bằng mutate per gene
     def per_gen_mutate(self, population):
-        N = self.n_cities
-        pop_size = self.pop_size
+        valid, a, b = self.mutation_points()
+        if len(valid) == 0:
+            return
+
+        # Thực hiện swap vectorized
+        population[valid, a], population[valid, b] = population[valid, b], population[valid, a]
+
+
+    def segment_positions(self, valid, a, b):
+        # Các cặp (hàng, cột) thuộc đoạn [a, b] của từng cá thể, sắp theo hàng rồi theo cột
+        lengths = b - a + 1
+        rows = np.repeat(valid, lengths)
+        starts = np.repeat(a, lengths)
+        offsets = np.arange(lengths.sum()) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+        return rows, starts + offsets, np.repeat(a + b, lengths)
 
-        # Mask per-gene
-        mask = self.np_rng.random((pop_size, N)) < self.mutation_rate
 
-        # Chỉ lấy các cá thể có >=2 True
-        valid = np.where(mask.sum(axis=1) >= 2)[0]
+    def inversion_mutate(self, population):
+        """Đảo ngược đoạn [a, b] tại chỗ trên buffer quần thể"""
+        valid, a, b = self.mutation_points()
         if len(valid) == 0:
             return
 
-        # Chọn 2 vị trí swap cho mỗi cá thể valid
-        swap_pos = np.array([self.np_rng.choice(np.where(mask[i])[0], 2, replace=False) for i in valid])
+        rows, cols, mirror = self.segment_positions(valid, a, b)
+        population[rows, cols] = population[rows, mirror - cols]
 
-        # Thực hiện swap vectorized
-        population[valid, swap_pos[:, 0]], population[valid, swap_pos[:, 1]] = \
-            population[valid, swap_pos[:, 1]], population[valid, swap_pos[:, 0]]
+
+    def scramble_mutate(self, population):
+        """Xáo trộn ngẫu nhiên đoạn [a, b] tại chỗ trên buffer quần thể"""
+        valid, a, b = self.mutation_points()
+        if len(valid) == 0:
+            return
+
+        rows, cols, _ = self.segment_positions(valid, a, b)
+        # Hoán vị ngẫu nhiên trong từng hàng: sắp theo hàng, sau đó theo khóa ngẫu nhiên
+        perm = np.lexsort((self.np_rng.random(len(rows)), rows))
+        population[rows, cols] = population[rows, cols[perm]]
         
 
-    def evolve(self):
+    def neighbor_mutate(self, population):
+        """
+        Đảo đoạn để thành phố ở vị trí a đứng cạnh 1 láng giềng ngẫu nhiên trong danh sách ứng viên
+        (bước 2-opt có định hướng), thay vì đổi chỗ 2 vị trí ngẫu nhiên.
+        """
+        valid, a, _ = self.mutation_points()
+        if len(valid) == 0:
+            return
+
+        candidates = candidate_lists(self.cost_matrix, self.n_candidates)
+        city = population[valid, a]
+        target = candidates[city, self.np_rng.integers(0, candidates.shape[1], len(valid))]
+        j = np.argmax(population[valid] == target[:, None], axis=1)
+
+        # j > a: đảo [a + 1, j] -> target đứng sau city; j < a: đảo [j, a - 1] -> target đứng trước city
+        lo = np.where(j > a, a + 1, j)
+        hi = np.where(j > a, j, a - 1)
+        keep = hi > lo
+        if not keep.any():
+            return
+
+        rows, cols, mirror = self.segment_positions(valid[keep], lo[keep], hi[keep])
+        population[rows, cols] = population[rows, mirror - cols]
+
+
+    def evolve_buffered(self):
+        """
+        Giống `evolve` nhưng dùng 2 buffer cấp phát sẵn: buffers[0] là quần thể,
+        buffers[1] là mating pool. Chọn lọc ghi vào pool, lai ghép ghi ngược lại
+        vào quần thể, đột biến và local search sửa tại chỗ, chi phí ghi vào self.costs.
+
+        Không có mảng cỡ quần thể (pop_size x n_cities) nào được cấp phát lại mỗi thế hệ,
+        nhưng vẫn còn cấp phát tạm: các mảng chỉ số O(pop_size) (elite, tournament) và
+        mảng tạm của lai ghép / đột biến, giới hạn theo khối ~BLOCK_ELEMENTS phần tử
+        nên đỉnh bộ nhớ không tăng theo pop_size.
+        """
+        population, pool = self.buffers # type: ignore
+        phase = self.timer.phase
+
+        with phase("selection"):
+            if self.elite_size > 0:
+                elite_idx = np.argsort(self.costs)[:self.elite_size]
+                np.take(population, elite_idx, axis=0, out=self.elite_buffer)
+
+            np.take(population, self.tournament_winners(), axis=0, out=pool)
+
+        with phase("crossover"):
+            self.crossover_population(pool, out=population)
+
+        with phase("mutation"):
+            self.mutate_op(population)
+
+        if self.two_opt_max > 0:
+            with phase("local_search"):
+                if self.use_two_opt_engine:
+                    self.two_opt.improve_population(population, self.two_opt_max, inplace=True) # type: ignore
+                else:
+                    self.local_search(population, self.cost_matrix, self.two_opt_max, inplace=True)
+
         if self.elite_size > 0:
-            elite_idx = np.argsort(self.costs)[:self.elite_size]
-            elite = self.population[elite_idx].copy()
-        
-        selected = self.tournament_selection()
-        offspring = self.crossover_population(selected)
-        self.per_gen_mutate(offspring)
+            population[:self.elite_size] = self.elite_buffer
+
+        with phase("evaluation"):
+            self.evaluate()
+
+
+    def evolve(self):
+        if self.double_buffer:
+            return self.evolve_buffered()
+
+        phase = self.timer.phase
+
+        with phase("selection"):
+            if self.elite_size > 0:
+                elite_idx = np.argsort(self.costs)[:self.elite_size]
+                elite = self.population[elite_idx].copy()
+
+            selected = self.tournament_selection()
+
+        with phase("crossover"):
+            offspring = self.crossover_population(selected)
+
+        with phase("mutation"):
+            self.mutate_op(offspring)
 
         if self.two_opt_max > 0:
-            offspring = two_opt_population(offspring, self.cost_matrix, self.two_opt_max)
-        
+            with phase("local_search"):
+                if self.use_two_opt_engine:
+                    offspring = self.two_opt.improve_population(offspring, self.two_opt_max) # type: ignore
+                else:
+                    offspring = self.local_search(offspring, self.cost_matrix, self.two_opt_max)
+
         if self.elite_size > 0:
             offspring[:self.elite_size] = elite
 
         self.population = offspring
-        self.evaluate()
+        with phase("evaluation"):
+            self.evaluate()
 
 
     def best(self):
@@ -128,26 +452,51 @@ class GA:
         return self.population[idx], self.costs[idx]
     
 
-    def run(self, generations=100, seed=None, verbose=True):
+    def initialize(self, seed=None):
+        """Khởi tạo bộ sinh số ngẫu nhiên và quần thể ban đầu"""
         self.np_rng = np.random.default_rng(seed)
         
         self.population = self.np_rng.permutation(
-            np.tile(np.arange(self.n_cities), (self.pop_size, 1))
+            np.tile(np.arange(self.n_cities, dtype=np.int32), (self.pop_size, 1))
         )
 
+        if self.double_buffer:
+            shape = (self.pop_size, self.n_cities)
+            self.buffers = (np.empty(shape, dtype=self.pop_dtype), np.empty(shape, dtype=self.pop_dtype))
+            self.elite_buffer = np.empty((self.elite_size, self.n_cities), dtype=self.pop_dtype)
+            self.buffers[0][:] = self.population
+            self.population = self.buffers[0]
+            self.costs = np.zeros(self.pop_size)
+
+
+    def run(self, generations=100, seed=None, verbose=True, callback=None, termination=None):
+        """
+        callback(gen, best_cost, best_route) được gọi sau mỗi thế hệ, trả về False để dừng sớm.
+        termination: `Termination` kiểm tra sau mỗi thế hệ (xem core.termination).
+        """
+        self.initialize(seed)
+        self.timer.reset()
+        if termination is not None:
+            termination.start()
+
         best_cost_hist = []
         avg_cost_hist = []
         self.cost_func_call = 0
 
         for gen in range(generations):
             self.evolve()
-            _, best_cost = self.best()
+            best_route, best_cost = self.best()
             best_cost_hist.append(best_cost)
             avg_cost = np.mean(self.costs)
             avg_cost_hist.append(avg_cost)
             
             if verbose: 
                 print(f"Gen {gen+1:3d} | Best = {best_cost:.3f} | Avg Cost = {avg_cost:.3f}")
+
+            if callback is not None and callback(gen + 1, best_cost, best_route) is False:
+                break
+            if termination is not None and termination.should_stop(best_cost, self.cost_func_call):
+                break
         
         best_route, best_cost = self.best()
         return {
@@ -158,18 +507,23 @@ class GA:
         }
     
 
-def run(cost_matrix, pop_size, crossover_rate, mutation_rate, elite_size, tournament_size, two_opt_max, max_iter, seed, verbose=True) -> OptimizationResult:
-    cost_matrix = np.asarray(cost_matrix, dtype=np.float64)
-    ga = GA(cost_matrix, pop_size, crossover_rate, mutation_rate, elite_size, tournament_size, two_opt_max)
+def run(cost_matrix, pop_size, crossover_rate, mutation_rate, elite_size, tournament_size, two_opt_max, max_iter, seed, verbose=True, two_opt_neighbors=0, local_search="2opt", crossover="ox", mutation="swap", double_buffer=False, callback=None, n_candidates=DEFAULT_CANDIDATES, termination=None) -> OptimizationResult:
+    cost_matrix = as_cost_matrix(cost_matrix)
+    termination = as_termination(termination)
+    ga = GA(cost_matrix, pop_size, crossover_rate, mutation_rate, elite_size, tournament_size, two_opt_max, two_opt_neighbors, local_search, crossover, mutation, double_buffer, n_candidates)
 
-    bench = time_memory_bench(ga.run, max_iter, seed, verbose)
+    bench = time_memory_bench(ga.run, max_iter, seed, verbose, callback, termination)
 
-    return {
+    result: OptimizationResult = {
         "avgCostHist": [float(x) for x in bench["result"]["avg_cost_hist"]],
         "bestCost": float(bench["result"]["best_cost"]),
         "bestCostHist": [float(x) for x in bench["result"]["best_cost_hist"]],
         "bestRoute": bench["result"]["best_route"].tolist(),
         "costFuncCall": ga.cost_func_call,
         "memory": bench["memory_diff"],
+        "phaseTimes": dict(ga.timer.totals),
         "time": bench["time"]
-    }
\ No newline at end of file
+    }
+    if termination is not None:
+        result["stopReason"] = termination.reason
+    return result
\ No newline at end of file
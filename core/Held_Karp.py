@@ -1,100 +1,147 @@
-import math
-from itertools import combinations
+import numpy as np
 
 from core.utils import OptimizationResult, time_memory_bench
 
 
+# Giới hạn số phần tử của mảng tạm (chunk x m x m) khi tính một lớp DP
+CHUNK_ELEMENTS = 1 << 22
+
+
+def memory_required(n, dtype=np.float64):
+    """
+    Ước lượng bộ nhớ (byte) cho bảng DP và bảng parent của Held-Karp.
+
+    Bảng DP có kích thước (2^(n-1), n-1) vì thành phố 0 luôn là điểm xuất phát
+    nên không cần bit cho nó. Bảng parent dùng int8 (n <= 128) hoặc int16.
+
+    Bộ nhớ tối đa (xấp xỉ, chưa tính mảng tạm ~ 32 MB):
+
+    ===  ============  ============
+     n    float64       float32
+    ===  ============  ============
+     16   ~ 4.4 MB      ~ 2.5 MB
+     20   ~ 90 MB       ~ 50 MB
+     22   ~ 400 MB      ~ 220 MB
+     24   ~ 1.7 GB      ~ 965 MB
+     25   ~ 3.6 GB      ~ 2.0 GB
+     26   ~ 7.5 GB      ~ 4.2 GB
+     27   ~ 15.7 GB     ~ 8.7 GB
+    ===  ============  ============
+    """
+    if n <= 1:
+        return 0
+    m = n - 1
+    cost_size = np.dtype(dtype).itemsize
+    parent_size = np.dtype(parent_dtype(n)).itemsize
+    return (1 << m) * m * (cost_size + parent_size)
+
+
+def max_cities(available_bytes, dtype=np.float64):
+    """Số thành phố lớn nhất mà bảng DP vừa với `available_bytes` byte RAM."""
+    n = 1
+    while memory_required(n + 1, dtype) <= available_bytes:
+        n += 1
+    return n
+
+
+def parent_dtype(n):
+    return np.int8 if n <= 128 else np.int16
+
+
 class Held_Karp:
-    def __init__(self, cost_matrix):
-        self.cost_matrix = cost_matrix
+    """
+    Held-Karp quy hoạch động trên bitmask, lưu DP bằng mảng NumPy dày đặc.
+
+    dp[mask, j] = chi phí ngắn nhất đi từ thành phố 0, qua tập mask
+    (bit i ứng với thành phố i + 1) và kết thúc tại thành phố j + 1.
+    Mỗi lớp (các mask có cùng số bit) được tính vector hóa trên toàn bộ
+    các thành phố kết thúc cùng lúc, chia chunk để giới hạn bộ nhớ tạm.
+
+    Xem `memory_required` để biết số thành phố tối đa theo RAM.
+    """
+
+    def __init__(self, cost_matrix, dtype=np.float64):
+        self.cost_matrix = np.asarray(cost_matrix, dtype=np.float64)
+        self.dtype = np.dtype(dtype)
         self.cost_matrix_call = 0
 
-    
-    def get_cost_matrix(self):
-        self.cost_matrix_call += 1
-        return self.cost_matrix
 
+    def layers(self, m):
+        """Nhóm tất cả mask trên m bit theo số bit bật."""
+        masks = np.arange(1 << m, dtype=np.int64)
+        popcount = np.zeros(1 << m, dtype=np.uint8)
+        for b in range(m):
+            popcount += ((masks >> b) & 1).astype(np.uint8)
 
-    def generate_subsets(self, n, k):
-        """Sinh tất cả subset gồm k phần tử của {0,...,n-1} dưới dạng bitmask."""
-        for comb in combinations(range(n), k):
-            mask = 0
-            for c in comb:
-                mask |= (1 << c)
-            yield mask
+        order = np.argsort(popcount, kind="stable")
+        bounds = np.searchsorted(popcount[order], np.arange(m + 2))
+        return [order[bounds[k]:bounds[k + 1]] for k in range(m + 1)]
 
 
     def run(self):
         self.cost_matrix_call = 0
-        n = len(self.cost_matrix)
+        C = self.cost_matrix
+        n = len(C)
 
-        # dp[(mask, j)] = chi phí ngắn nhất để đi qua tập mask và kết thúc tại j
-        dp = {}
-        parent = {}
+        if n <= 1:
+            return [0, 0], float(C[0, 0]) if n == 1 else 0.0
 
-        # Khởi tạo subset với số lượng 2
-        for k in range(1, n):
-            mask = (1 << 0) | (1 << k)
-            dp[(mask, k)] = self.get_cost_matrix()[0][k]
-            parent[(mask, k)] = 0
+        m = n - 1
+        bits = (np.int64(1) << np.arange(m, dtype=np.int64))
+        # sub[j, i] = chi phí đi từ thành phố i + 1 đến j + 1
+        sub = C[1:, 1:].T.astype(self.dtype)
 
-        # Khởi tạo subset với số lượng 3 trở lên
-        for subset_size in range(3, n + 1):
-            for mask in self.generate_subsets(n, subset_size):
+        dp = np.full((1 << m, m), np.inf, dtype=self.dtype)
+        parent = np.full((1 << m, m), -1, dtype=parent_dtype(n))
 
-                if not (mask & 1): 
-                    continue # Phải có điểm đầu
+        # Khởi tạo subset chỉ gồm 1 thành phố (ngoài thành phố 0)
+        dp[bits, np.arange(m)] = C[0, 1:]
+        self.cost_matrix_call += m
 
-                for j in range(1, n):
-                    if not (mask & (1 << j)):
-                        continue # j không nằm trong subset
+        layers = self.layers(m)
+        chunk = max(1, CHUNK_ELEMENTS // (m * m))
 
-                    prev_mask = mask ^ (1 << j) # Bỏ j ra khỏi mask
-                    best_cost = math.inf
-                    best_prev = None
+        for k in range(2, m + 1):
+            masks = layers[k]
+            self.cost_matrix_call += len(masks) * k * (k - 1)
 
-                    for k in range(1, n):
-                        if k == j:
-                            continue
+            for start in range(0, len(masks), chunk):
+                mc = masks[start:start + chunk]
 
-                        if not (prev_mask & (1 << k)):
-                            continue # Kiểm tra k có trong pre_mask không
+                # prev[b, j] = mask bỏ j ra (nếu j không thuộc mask thì kết quả bị loại bên dưới)
+                prev = mc[:, None] ^ bits[None, :]
+                # cand[b, j, i] = dp[prev, i] + cost(i -> j)
+                cand = dp[prev] + sub[None, :, :]
 
-                        if (prev_mask, k) not in dp:
-                            continue
+                best_prev = np.argmin(cand, axis=2)
+                best_cost = np.take_along_axis(cand, best_prev[:, :, None], axis=2)[:, :, 0]
 
-                        cost = dp[(prev_mask, k)] + self.get_cost_matrix()[k][j]
+                in_mask = (mc[:, None] & bits[None, :]) != 0
+                best_cost[~in_mask] = np.inf
+                best_prev[~in_mask] = -1
 
-                        if cost < best_cost:
-                            best_cost = cost
-                            best_prev = k
-
-                    dp[(mask, j)] = best_cost
-                    parent[(mask, j)] = best_prev
+                dp[mc] = best_cost
+                parent[mc] = best_prev
 
         # Quay về 0
-        full_mask = (1 << n) - 1
-        best_cost = math.inf
-        last_city = None
-
-        for j in range(1, n):
-            if (full_mask, j) not in dp:
-                continue
-
-            cost = dp[(full_mask, j)] + self.get_cost_matrix()[j][0]
-            if cost < best_cost:
-                best_cost = cost
-                last_city = j
+        full_mask = (1 << m) - 1
+        total = dp[full_mask].astype(np.float64) + C[1:, 0]
+        self.cost_matrix_call += m
+        last = int(np.argmin(total))
+        best_cost = float(total[last])
+        if not np.isfinite(best_cost):
+            # Không có tour hữu hạn (vd. mọi cạnh bị cấm), parent không tạo thành đường đi hợp lệ
+            return None, best_cost
 
         # Khôi phục đường đi
         path = [0]
         mask = full_mask
-        j = last_city
+        j = last
 
-        while j != 0:
-            path.append(j) # type: ignore
-            prev = parent[(mask, j)]
-            mask = mask ^ (1 << j) # type: ignore
+        while j >= 0:
+            path.append(j + 1)
+            prev = int(parent[mask, j])
+            mask ^= (1 << j)
             j = prev
 
         path.append(0)
@@ -103,14 +150,14 @@ class Held_Karp:
         return path, best_cost
 
 
-def run(cost_matrix) -> OptimizationResult:
-    held_karp = Held_Karp(cost_matrix)
+def run(cost_matrix, dtype=np.float64) -> OptimizationResult:
+    held_karp = Held_Karp(cost_matrix, dtype)
     bench = time_memory_bench(held_karp.run)
-    
+
     return {
         "bestCost": bench["result"][1],
         "bestRoute": bench["result"][0],
         "costFuncCall": held_karp.cost_matrix_call,
         "time": bench["time"],
         "memory": bench["memory_diff"]
-    }
\ No newline at end of file
+    }
@@ -1,102 +1,267 @@
 import numpy as np
 
-from core.utils import OptimizationResult, time_memory_bench, batch_cost_func
-from core.two_opt import two_opt_population
+from core.utils import OptimizationResult, time_memory_bench, batch_cost_func, as_cost_matrix
+from core.local_search import local_search_op
+from core.termination import as_termination
+from core.profiling import PhaseTimer
+
+
+MODES = ("random_key", "swap")
 
 
 class PSO:
-    """Optimized Particle Swarm Optimization for TSP (vectorized version)"""
-    
+    """
+    Optimized Particle Swarm Optimization for TSP (vectorized version)
+
+    Chế độ biểu diễn:
+    - "random_key": vị trí là vector số thực, tour = argsort(vị trí). Vận tốc, số ngẫu nhiên
+      và phép chuẩn hóa dùng các buffer cấp phát 1 lần.
+    - "swap": vị trí là chính tour (hoán vị). Mỗi vòng lặp thực hiện ceil(v_max * n) bước,
+      mỗi bước mọi hạt chọn 1 vị trí j và đổi chỗ để đưa về j thành phố của pbest hoặc gbest
+      (1 phần tử của dãy swap từ tour hiện tại tới tour dẫn đường), hoặc đổi ngẫu nhiên (quán tính).
+      Xác suất chọn tỉ lệ với w, c1 * r1, c2 * r2. init_velocity không dùng ở chế độ này.
+
+    local_search_on:
+    - "swarm": chạy local search trên tour của mọi hạt mỗi vòng lặp.
+    - "pbest": chỉ chạy trên các pbest (gồm cả gbest) chưa là tối ưu cục bộ: pbest vừa thay đổi
+      hoặc vẫn còn cải thiện ở lần local search trước. Rẻ hơn nhiều khi bầy lớn.
+    """
+
     def __init__(
-        self, cost_matrix: np.ndarray, n_particles=30, init_velocity=0.5, 
-        w=0.7, c1=1.5, c2=1.5, v_max=0.5
+        self, cost_matrix: np.ndarray, n_particles=30, init_velocity=0.5,
+        w=0.7, c1=1.5, c2=1.5, v_max=0.5, local_search_max=0, local_search="2opt",
+        mode="random_key", local_search_on="swarm"
     ):
-        self.cost_matrix = cost_matrix.astype(np.float64)
+        if mode not in MODES:
+            raise ValueError(f"Chế độ PSO không hợp lệ: {mode}")
+        if local_search_on not in ("swarm", "pbest"):
+            raise ValueError(f"local_search_on không hợp lệ: {local_search_on}")
+
+        self.cost_matrix = as_cost_matrix(cost_matrix)
         self.n_cities = cost_matrix.shape[0]
         self.n_particles = n_particles
         self.init_velocity = init_velocity
         self.w, self.c1, self.c2, self.v_max = w, c1, c2, v_max
-                
+        self.local_search_max = local_search_max
+        self.local_search = local_search_op(local_search, self.cost_matrix)
+        self.mode = mode
+        self.local_search_on = local_search_on
+
         self.gbest_cost = np.inf
-        
+        # Thời gian cộng dồn của từng pha (decode, local_search, evaluation, move)
+        self.timer = PhaseTimer()
+
 
     def decode_route(self, positions: np.ndarray):
         """Evaluate all particles' tours at once"""
+        if self.mode == "swap":
+            return positions
         if positions.ndim == 1:
             return np.argsort(positions)
         return np.argsort(positions, axis=1)
-    
+
+
+    def encode_route(self, positions: np.ndarray, routes: np.ndarray):
+        """Gán lại giá trị vị trí để decode_route(positions) == routes, giữ nguyên tập giá trị mỗi hàng"""
+        if self.mode == "swap":
+            return routes
+        encoded = np.empty_like(positions)
+        np.put_along_axis(encoded, routes, np.sort(positions, axis=1), axis=1)
+        return encoded
+
 
     def evaluate(self):
+        """Tour và chi phí hiện tại của mọi hạt"""
+        phase = self.timer.phase
         self.cost_func_call += self.n_particles
-        routes = self.decode_route(self.positions)
-        self.pbest_cost = batch_cost_func(self.cost_matrix, routes)
+        with phase("decode"):
+            routes = self.decode_route(self.positions)
+
+        if self.local_search_max > 0 and self.local_search_on == "swarm":
+            with phase("local_search"):
+                routes = self.local_search(routes, self.cost_matrix, self.local_search_max)
+                self.positions = self.encode_route(self.positions, routes)
+                if self.mode == "swap":
+                    self.pos[self.rows[:, None], routes] = np.arange(self.n_cities)
+
+        with phase("evaluation"):
+            return routes, batch_cost_func(self.cost_matrix, routes)
+
+
+    def update_best(self, routes, costs):
+        improved = costs < self.pbest_cost
+        self.pbest_routes[improved] = routes[improved]
+        self.pbest_cost[improved] = costs[improved]
+        if self.mode == "random_key":
+            self.pbest_positions[improved] = self.positions[improved]
+
+        self.pbest_open |= improved
+        if self.local_search_max > 0 and self.local_search_on == "pbest" and self.pbest_open.any():
+            # Local search chỉ trên các pbest chưa là tối ưu cục bộ
+            idx = np.flatnonzero(self.pbest_open)
+            with self.timer.phase("local_search"):
+                better = self.local_search(self.pbest_routes[idx], self.cost_matrix, self.local_search_max, inplace=True)
+            with self.timer.phase("evaluation"):
+                better_cost = batch_cost_func(self.cost_matrix, better)
+            self.cost_func_call += len(idx)
+
+            self.pbest_open[idx] = better_cost < self.pbest_cost[idx] - 1e-10
+            self.pbest_routes[idx] = better
+            self.pbest_cost[idx] = better_cost
+            if self.mode == "random_key":
+                self.pbest_positions[idx] = self.encode_route(self.pbest_positions[idx], better)
+
+        best = np.argmin(self.pbest_cost)
+        if self.pbest_cost[best] < self.gbest_cost:
+            self.gbest_cost = self.pbest_cost[best]
+            self.gbest_route = self.pbest_routes[best].copy()
+            if self.mode == "random_key":
+                self.gbest_position[:] = self.pbest_positions[best]
+
+
+    def move_random_key(self):
+        """v = w * v + c1 * r1 * (pbest - x) + c2 * r2 * (gbest - x), tính tại chỗ trên các buffer"""
+        rand, step = self.rand, self.step
 
-        return self.pbest_cost
+        self.velocities *= self.w
 
+        self.np_rng.random(out=rand)
+        np.subtract(self.pbest_positions, self.positions, out=step)
+        step *= rand
+        step *= self.c1
+        self.velocities += step
+
+        self.np_rng.random(out=rand)
+        np.subtract(self.gbest_position, self.positions, out=step)
+        step *= rand
+        step *= self.c2
+        self.velocities += step
+
+        np.clip(self.velocities, -self.v_max, self.v_max, out=self.velocities)
+        self.positions += self.velocities
+
+        # Chuẩn hoá tránh tràn khỏi [0, 1]
+        np.min(self.positions, axis=1, keepdims=True, out=self.low)
+        np.max(self.positions, axis=1, keepdims=True, out=self.span)
+        self.span -= self.low
+        self.span += 1e-10
+        self.positions -= self.low
+        self.positions /= self.span
+
+
+    def move_swap(self):
+        """Các bước swap hướng về pbest / gbest (hoặc ngẫu nhiên), mỗi bước vector hóa trên cả bầy"""
+        n, rows = self.n_cities, self.rows
+        x, pos = self.positions, self.pos
+
+        # Xác suất quán tính / pbest / gbest của từng hạt trong vòng lặp này
+        self.np_rng.random(out=self.guide_rand)
+        weights = self.guide_rand * [self.c1, self.c2]
+        total = self.w + weights.sum(axis=1)
+        p_inertia = self.w / total
+        p_pbest = p_inertia + weights[:, 0] / total
+
+        for _ in range(max(1, int(np.ceil(self.v_max * n)))):
+            j = self.np_rng.integers(0, n, self.n_particles)
+            r = self.np_rng.random(self.n_particles)
+
+            k = np.where(
+                r < p_inertia,
+                self.np_rng.integers(0, n, self.n_particles),
+                np.where(
+                    r < p_pbest,
+                    pos[rows, self.pbest_routes[rows, j]],
+                    pos[rows, self.gbest_route[j]]
+                )
+            )
+
+            a, b = x[rows, j], x[rows, k]
+            x[rows, j], x[rows, k] = b, a
+            pos[rows, a] = k
+            pos[rows, b] = j
+
+
+    def run(self, iters=100, seed=None, callback=None, termination=None):
+        """
+        callback(iter, best_cost, best_route) được gọi sau mỗi vòng lặp, trả về False để dừng sớm.
+        termination: `Termination` kiểm tra sau mỗi vòng lặp (xem core.termination).
+        """
+        if termination is not None:
+            termination.start()
 
-    def run(self, iters=100, seed=None):
         self.np_rng = np.random.default_rng(seed)
+        self.timer.reset()
+        shape = (self.n_particles, self.n_cities)
+        self.rows = np.arange(self.n_particles)
+
+        if self.mode == "random_key":
+            self.positions = self.np_rng.random(shape)
+            self.velocities = self.np_rng.uniform(-self.init_velocity, self.init_velocity, shape)
+            self.pbest_positions = self.positions.copy()
+            self.gbest_position = np.empty(self.n_cities)
+            # Buffer dùng lại mỗi vòng lặp
+            self.rand = np.empty(shape)
+            self.step = np.empty(shape)
+            self.low = np.empty((self.n_particles, 1))
+            self.span = np.empty((self.n_particles, 1))
+        else:
+            self.positions = self.np_rng.permuted(np.tile(np.arange(self.n_cities), (self.n_particles, 1)), axis=1)
+            self.pos = np.empty_like(self.positions)
+            np.put_along_axis(self.pos, self.positions, np.arange(self.n_cities)[None, :], axis=1)
+            self.guide_rand = np.empty((self.n_particles, 2))
 
-        self.positions = self.np_rng.random((self.n_particles, self.n_cities))
-        self.velocities = self.np_rng.uniform(-self.init_velocity, self.init_velocity, (self.n_particles, self.n_cities))
-        self.pbest_positions = self.positions.copy()
+        self.pbest_routes = np.empty(shape, dtype=np.intp)
         self.pbest_cost = np.full(self.n_particles, np.inf)
+        self.pbest_open = np.zeros(self.n_particles, dtype=bool)
+        self.gbest_cost = np.inf
 
         self.cost_func_call = 0
         best_cost_hist = []
         avg_cost_hist = []
 
-        for _ in range(iters):
-            costs = self.evaluate()
-            
-            improved = costs < self.pbest_cost
-            self.pbest_positions[improved] = self.positions[improved]
-            self.pbest_cost[improved] = costs[improved]
-
-            min_idx = np.argmin(costs)
-            if costs[min_idx] < self.gbest_cost:
-                self.gbest_cost = costs[min_idx]
-                # Vì gbest_cost = np.inf nên gbest_position chắc nhắn được tạo
-                self.gbest_position = self.positions[min_idx].copy()
+        for it in range(iters):
+            routes, costs = self.evaluate()
+            self.update_best(routes, costs)
 
-            r1 = self.np_rng.random((self.n_particles, self.n_cities))
-            r2 = self.np_rng.random((self.n_particles, self.n_cities))
+            with self.timer.phase("move"):
+                if self.mode == "random_key":
+                    self.move_random_key()
+                else:
+                    self.move_swap()
 
-            cognitive = self.c1 * r1 * (self.pbest_positions - self.positions)
-            social = self.c2 * r2 * (self.gbest_position - self.positions) # type: ignore vì gbest_position luôn được tạo ra ở vòng lặp trên
-
-            self.velocities = self.w * self.velocities + cognitive + social
-            self.velocities = np.clip(self.velocities, -self.v_max, self.v_max)
-
-            self.positions += self.velocities
-            # Chuẩn hoá tránh tràn khỏi [0, 1]
-            self.positions = (self.positions - self.positions.min(axis=1, keepdims=True)) / \
-                 (self.positions.max(axis=1, keepdims=True) - self.positions.min(axis=1, keepdims=True) + 1e-10)            
-            
             avg_cost_hist.append(np.mean(costs))
             best_cost_hist.append(self.gbest_cost)
-        
+
+            if callback is not None and callback(it + 1, self.gbest_cost, self.gbest_route) is False:
+                break
+            if termination is not None and termination.should_stop(self.gbest_cost, self.cost_func_call):
+                break
+
         return {
             "avg_cost_hist": avg_cost_hist,
             "best_cost_hist": [float(x) for x in best_cost_hist],
-            "best_cost": self.gbest_cost, 
-            "best_route": self.decode_route(self.gbest_position)
+            "best_cost": self.gbest_cost,
+            "best_route": self.gbest_route
         }
-    
 
-def run(cost_matrix, n_particles, init_velocity, w, c1, c2, v_max, max_iter, seed) -> OptimizationResult:
-    cost_matrix = np.asarray(cost_matrix, dtype=np.float64)
-    pso = PSO(cost_matrix, n_particles, init_velocity, w, c1, c2, v_max)
 
-    bench = time_memory_bench(pso.run, max_iter, seed)
+def run(cost_matrix, n_particles, init_velocity, w, c1, c2, v_max, max_iter, seed, local_search_max=0, local_search="2opt", callback=None, mode="random_key", local_search_on="swarm", termination=None) -> OptimizationResult:
+    termination = as_termination(termination)
+    cost_matrix = as_cost_matrix(cost_matrix)
+    pso = PSO(cost_matrix, n_particles, init_velocity, w, c1, c2, v_max, local_search_max, local_search, mode, local_search_on)
+
+    bench = time_memory_bench(pso.run, max_iter, seed, callback, termination)
 
-    return {
+    result: OptimizationResult = {
         "avgCostHist": [float(x) for x in bench["result"]["avg_cost_hist"]],
         "bestCost": float(bench["result"]["best_cost"]),
         "bestCostHist": [float(x) for x in bench["result"]["best_cost_hist"]],
         "bestRoute": bench["result"]["best_route"].tolist(),
         "costFuncCall": pso.cost_func_call,
         "memory": bench["memory_diff"],
+        "phaseTimes": dict(pso.timer.totals),
         "time": bench["time"]
-    }
\ No newline at end of file
+    }
+    if termination is not None:
+        result["stopReason"] = termination.reason
+    return result
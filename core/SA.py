@@ -1,31 +1,258 @@
 import numpy as np
-from sko.SA import SA_TSP
-np.int = int # Thư viện sko còn sử dụng API numpy cũ
 
-from core.utils import OptimizationResult, cost_func, time_memory_bench
+from core.utils import OptimizationResult, CostProvider, time_memory_bench, batch_cost_func, as_cost_matrix
+from core.candidates import candidate_lists
+from core.termination import as_termination
 
 
-def run(cost_matrix: np.ndarray, T_max, T_min, L) -> OptimizationResult:
-    cost_matrix = np.asarray(cost_matrix, dtype=np.float64)
+MOVES = ("swap", "2opt", "insert")
 
-    cost_func_call = 0
-    def cost_func_wrap(route):
-        nonlocal cost_func_call
-        cost_func_call += 1
-        return cost_func(cost_matrix, route)
-    
-    n_cities = cost_matrix.shape[0]
-    x0 = np.random.permutation(n_cities)
 
-    sa = SA_TSP(func=cost_func_wrap, x0=x0, T_max=T_max, T_min=T_min, L=L)
-    
-    bench = time_memory_bench(sa.run)
+class SA:
+    """
+    Simulated Annealing chạy nhiều chuỗi độc lập cùng lúc, mỗi chuỗi là 1 hàng của mảng tour.
 
-    return {
-        "bestCost": float(bench["result"][1]),
-        "bestCostHist": [float(x) for x in sa.best_y_history],
-        "bestRoute": [int(x) for x in bench["result"][0]],
-        "costFuncCall": cost_func_call,
+    Mỗi bước, mọi chuỗi đề xuất 1 bước chuyển (swap, 2-opt hoặc chèn 1 thành phố), delta chi phí
+    tính O(1) từ các cạnh thay đổi, chấp nhận theo Metropolis vector hóa trên trục chuỗi.
+    Nhiệt độ giảm theo cấp số nhân từ T_max xuống T_min, mỗi mức nhiệt L bước.
+
+    2-opt đảo chiều đoạn nên delta O(1) chỉ đúng với ma trận đối xứng; với ma trận bất đối xứng
+    chỉ dùng swap và chèn (giữ nguyên chiều).
+    n_candidates > 0: thành phố đích của 2-opt và chèn được chọn trong k ứng viên gần nhất.
+    """
+
+    def __init__(
+        self,
+        cost_matrix: np.ndarray,
+        T_max: float = 100.0,
+        T_min: float = 1e-3,
+        L: int = 100,
+        n_chains: int = 8,
+        cooling: float = 0.9,
+        moves=MOVES,
+        n_candidates: int = 0
+    ):
+        self.cost_matrix = as_cost_matrix(cost_matrix)
+        self.n_cities = self.cost_matrix.shape[0]
+        self.T_max, self.T_min, self.L = T_max, T_min, L
+        self.n_chains = n_chains
+        self.cooling = cooling
+
+        if isinstance(self.cost_matrix, CostProvider):
+            symmetric = len(self.cost_matrix.override_keys) == 0
+        else:
+            symmetric = bool(np.array_equal(self.cost_matrix, self.cost_matrix.T))
+        self.moves = [m for m in moves if m != "2opt" or symmetric]
+        if not self.moves:
+            raise ValueError("Không còn bước chuyển hợp lệ (2-opt cần ma trận đối xứng)")
+
+        self.candidates = candidate_lists(self.cost_matrix, n_candidates) if n_candidates > 0 else None
+
+        self.cost_func_call = 0
+        self.np_rng = np.random.default_rng()
+
+
+    def temperatures(self):
+        n_levels = max(1, int(np.ceil(np.log(self.T_min / self.T_max) / np.log(self.cooling))))
+        return self.T_max * self.cooling ** np.arange(n_levels)
+
+
+    def random_target(self, chains, i):
+        """Vị trí của thành phố đích: ngẫu nhiên, hoặc 1 ứng viên của thành phố tại vị trí i"""
+        if self.candidates is None:
+            return self.np_rng.integers(0, self.n_cities, len(chains))
+        city = self.x[chains, i]
+        target = self.candidates[city, self.np_rng.integers(0, self.candidates.shape[1], len(chains))]
+        return self.pos[chains, target]
+
+
+    def propose_swap(self, chains):
+        """Đổi chỗ 2 vị trí không kề nhau (khoảng cách vòng từ 2 đến n - 2)"""
+        n, C, x = self.n_cities, self.cost_matrix, self.x
+        i = self.np_rng.integers(0, n, len(chains))
+        j = (i + self.np_rng.integers(2, n - 1, len(chains))) % n
+        lo, hi = np.minimum(i, j), np.maximum(i, j)
+
+        a, b = x[chains, lo], x[chains, hi]
+        ap, an = x[chains, lo - 1], x[chains, (lo + 1) % n]
+        bp, bn = x[chains, hi - 1], x[chains, (hi + 1) % n]
+        delta = (
+            C[ap, b] + C[b, an] + C[bp, a] + C[a, bn] -
+            C[ap, a] - C[a, an] - C[bp, b] - C[b, bn]
+        )
+        return delta, lo, hi
+
+
+    def propose_two_opt(self, chains):
+        """Đảo đoạn x[lo..hi] (1 <= hi - lo, không phải cả tour)"""
+        n, C, x = self.n_cities, self.cost_matrix, self.x
+        i = self.np_rng.integers(0, n, len(chains))
+        j = self.random_target(chains, i)
+        if self.candidates is not None:
+            # Đảo sao cho thành phố đích đứng cạnh x[i]: j > i -> đảo [i + 1, j], j < i -> đảo [j, i - 1]
+            after = j > i
+            lo, hi = np.where(after, i + 1, j), np.where(after, j, i - 1)
+        else:
+            lo, hi = np.minimum(i, j), np.maximum(i, j)
+
+        p, s = x[chains, lo - 1], x[chains, (hi + 1) % n]
+        delta = C[p, x[chains, hi]] + C[x[chains, lo], s] - C[p, x[chains, lo]] - C[x[chains, hi], s]
+        delta[(hi <= lo) | ((lo == 0) & (hi == n - 1))] = np.inf
+        return delta, lo, hi
+
+
+    def propose_insert(self, chains):
+        """Chuyển thành phố ở vị trí i ra ngay sau thành phố ở vị trí t, giữ chiều của tour"""
+        n, C, x = self.n_cities, self.cost_matrix, self.x
+        i = self.np_rng.integers(0, n, len(chains))
+        t = self.random_target(chains, i)
+
+        a = x[chains, i]
+        p, s = x[chains, i - 1], x[chains, (i + 1) % n]
+        u, v = x[chains, t], x[chains, (t + 1) % n]
+        delta = C[p, s] - C[p, a] - C[a, s] + C[u, a] + C[a, v] - C[u, v]
+        delta[(t == i) | (t == (i - 1) % n)] = np.inf
+
+        # t > i: xoay trái đoạn [i, t]; t < i: xoay phải đoạn [t + 1, i]
+        forward = t > i
+        lo = np.where(forward, i, t + 1)
+        hi = np.where(forward, t, i)
+        return delta, lo, hi, forward
+
+
+    def segments(self, chains, lo, hi):
+        lengths = hi - lo + 1
+        rows = np.repeat(chains, lengths)
+        starts = np.repeat(lo, lengths)
+        offsets = np.arange(lengths.sum()) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+        return rows, starts + offsets, starts, np.repeat(lengths, lengths)
+
+
+    def apply(self, move, chains, lo, hi, forward=None):
+        """Áp dụng các bước đã chấp nhận tại chỗ trên self.x và cập nhật self.pos"""
+        x = self.x
+        if move == "swap":
+            x[chains, lo], x[chains, hi] = x[chains, hi], x[chains, lo].copy()
+            rows = np.concatenate([chains, chains])
+            cols = np.concatenate([lo, hi])
+        else:
+            rows, cols, starts, lengths = self.segments(chains, lo, hi)
+            if move == "2opt":
+                src = np.repeat(lo + hi, hi - lo + 1) - cols
+            else:
+                shift = np.where(np.repeat(forward, hi - lo + 1), 1, -1)
+                src = starts + (cols - starts + shift) % lengths
+            x[rows, cols] = x[rows, src]
+
+        self.pos[rows, x[rows, cols]] = cols
+
+
+    def step(self, T):
+        m = self.n_chains
+        kinds = self.np_rng.integers(0, len(self.moves), m)
+        delta = np.empty(m)
+        proposals = []
+
+        for k, move in enumerate(self.moves):
+            chains = np.flatnonzero(kinds == k)
+            if len(chains) == 0:
+                continue
+            if move == "swap":
+                d, *args = self.propose_swap(chains)
+            elif move == "2opt":
+                d, *args = self.propose_two_opt(chains)
+            else:
+                d, *args = self.propose_insert(chains)
+            delta[chains] = d
+            proposals.append((move, chains, args))
+
+        self.cost_func_call += m
+
+        # Metropolis trên mọi chuỗi cùng lúc
+        with np.errstate(over="ignore", invalid="ignore"):
+            accept = (delta < 0) | (self.np_rng.random(m) < np.exp(-delta / T))
+        accept &= np.isfinite(delta)
+
+        for move, chains, args in proposals:
+            ok = accept[chains]
+            if ok.any():
+                self.apply(move, chains[ok], *(arg[ok] for arg in args))
+
+        self.costs[accept] += delta[accept]
+
+
+    def run(self, seed=None, callback=None, termination=None):
+        """
+        callback(level, best_cost, best_route) được gọi sau mỗi mức nhiệt, trả về False để dừng sớm.
+        termination: `Termination` kiểm tra sau mỗi mức nhiệt (xem core.termination).
+        """
+        if termination is not None:
+            termination.start()
+
+        self.np_rng = np.random.default_rng(seed)
+        m, n = self.n_chains, self.n_cities
+
+        self.x = self.np_rng.permuted(np.tile(np.arange(n), (m, 1)), axis=1)
+        self.pos = np.empty_like(self.x)
+        np.put_along_axis(self.pos, self.x, np.arange(n)[None, :], axis=1)
+        self.costs = batch_cost_func(self.cost_matrix, self.x)
+        self.cost_func_call = m
+
+        best_x = self.x.copy()
+        best_costs = self.costs.copy()
+        best_cost_hist, avg_cost_hist, chain_best_hist = [], [], []
+
+        for level, T in enumerate(self.temperatures()):
+            if n >= 4:
+                for _ in range(self.L):
+                    self.step(T)
+
+                    improved = self.costs < best_costs
+                    if improved.any():
+                        best_costs[improved] = self.costs[improved]
+                        best_x[improved] = self.x[improved]
+
+            best_chain = int(np.argmin(best_costs))
+            best_cost_hist.append(best_costs[best_chain])
+            avg_cost_hist.append(np.mean(self.costs))
+            chain_best_hist.append(best_costs.copy())
+
+            if callback is not None and callback(level + 1, best_costs[best_chain], best_x[best_chain]) is False:
+                break
+            if termination is not None and termination.should_stop(best_costs[best_chain], self.cost_func_call):
+                break
+
+        # Tính lại chi phí chính xác (tránh sai số cộng dồn delta)
+        best_costs = batch_cost_func(self.cost_matrix, best_x)
+        best_chain = int(np.argmin(best_costs))
+        return {
+            "avg_cost_hist": avg_cost_hist,
+            "best_cost_hist": best_cost_hist,
+            "chain_best_cost_hist": np.array(chain_best_hist).T,
+            "best_chain": best_chain,
+            "best_cost": best_costs[best_chain],
+            "best_route": best_x[best_chain]
+        }
+
+
+def run(cost_matrix: np.ndarray, T_max, T_min, L, n_candidates=0, seed=None, n_chains=8, cooling=0.9, moves=MOVES, callback=None, termination=None) -> OptimizationResult:
+    termination = as_termination(termination)
+    cost_matrix = as_cost_matrix(cost_matrix)
+    sa = SA(cost_matrix, T_max, T_min, L, n_chains, cooling, moves, n_candidates)
+
+    bench = time_memory_bench(sa.run, seed, callback, termination)
+
+    result: OptimizationResult = {
+        "avgCostHist": [float(x) for x in bench["result"]["avg_cost_hist"]],
+        "bestChain": bench["result"]["best_chain"],
+        "bestCost": float(bench["result"]["best_cost"]),
+        "bestCostHist": [float(x) for x in bench["result"]["best_cost_hist"]],
+        "bestRoute": [int(x) for x in bench["result"]["best_route"]],
+        "chainBestCostHist": [[float(x) for x in h] for h in bench["result"]["chain_best_cost_hist"]],
+        "costFuncCall": sa.cost_func_call,
         "memory": bench["memory_diff"],
         "time": bench["time"]
-    }
\ No newline at end of file
+    }
+    if termination is not None:
+        result["stopReason"] = termination.reason
+    return result
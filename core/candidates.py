@@ -0,0 +1,165 @@
+import threading
+import weakref
+import numpy as np
+
+from core.utils import CostProvider
+
+
+# Số ứng viên mặc định cho mỗi thành phố
+DEFAULT_CANDIDATES = 8
+
+# Số phần tử tối đa của mảng tạm khi tính theo khối hàng
+BLOCK_ELEMENTS = 1 << 22
+
+# id(nguồn) -> (weakref tới nguồn, {k: danh sách ứng viên}), tự xóa khi nguồn (ma trận / tọa độ) bị giải phóng.
+# weakref xác nhận đúng đối tượng khi 1 nguồn mới dùng lại id của nguồn đã bị giải phóng.
+# RLock: finalizer có thể chạy (do GC) ngay trong thread đang giữ khóa
+candidate_cache = {}
+candidate_cache_lock = threading.RLock()
+
+
+def forget_candidates(key, ref):
+    """Finalizer của nguồn: xóa mục cache của nó, trừ khi id đã được 1 nguồn mới dùng lại"""
+    with candidate_cache_lock:
+        entry = candidate_cache.get(key)
+        if entry is not None and entry[0] is ref:
+            del candidate_cache[key]
+
+
+def nearest(dist, rows, k):
+    """k cột nhỏ nhất của từng hàng trong `dist`, bỏ cột trùng với chỉ số hàng gốc `rows`"""
+    # Bỏ chính thành phố đó khỏi danh sách
+    dist[np.arange(len(rows)), rows] = np.inf
+
+    nbr = np.argpartition(dist, k - 1, axis=1)[:, :k]
+    order = np.argsort(np.take_along_axis(dist, nbr, axis=1), axis=1)
+    return np.take_along_axis(nbr, order, axis=1).astype(np.intp)
+
+
+def knn_matrix(cost_matrix, k):
+    """k láng giềng theo hàng của ma trận chi phí (argpartition theo khối hàng)"""
+    cost_matrix = np.asarray(cost_matrix, dtype=np.float64)
+    n = cost_matrix.shape[0]
+    block = max(1, BLOCK_ELEMENTS // n)
+    return np.concatenate([
+        nearest(np.array(cost_matrix[s:s + block]), np.arange(s, min(s + block, n)), k)
+        for s in range(0, n, block)
+    ])
+
+
+def knn_grid(coords, k):
+    """
+    k láng giềng Euclid gần nhất (chính xác) dùng lưới đều làm chỉ mục không gian.
+
+    Mỗi ô chứa trung bình ~k điểm. Với mỗi ô, xét các điểm trong vòng r ô xung quanh;
+    mọi điểm ngoài vòng cách điểm truy vấn ít nhất r * cell nên khi láng giềng thứ k
+    gần hơn r * cell thì kết quả là chính xác, ngược lại mở rộng r.
+    Chi phí ~ O(n * k) thay vì O(n^2) của ma trận khoảng cách.
+    """
+    coords = np.asarray(coords, dtype=np.float64)[:, :2]
+    n = len(coords)
+
+    lo = coords.min(axis=0)
+    span = np.maximum(coords.max(axis=0) - lo, 1e-12)
+    side = max(1, int(np.sqrt(n / max(k, 1))))
+    cell = span.max() / side
+    shape = np.maximum(np.ceil(span / cell).astype(int), 1)
+
+    ij = np.minimum(((coords - lo) / cell).astype(int), shape - 1)
+    cell_id = ij[:, 0] * shape[1] + ij[:, 1]
+    order = np.argsort(cell_id, kind="stable")
+    bounds = np.searchsorted(cell_id[order], np.arange(shape[0] * shape[1] + 1))
+
+    def members(ci, cj, r):
+        rows = np.arange(max(ci - r, 0), min(ci + r, shape[0] - 1) + 1)
+        starts = bounds[rows * shape[1] + max(cj - r, 0)]
+        stops = bounds[rows * shape[1] + min(cj + r, shape[1] - 1) + 1]
+        return np.concatenate([order[s:e] for s, e in zip(starts, stops)])
+
+    result = np.empty((n, k), dtype=np.intp)
+    for c in np.flatnonzero(bounds[1:] > bounds[:-1]):
+        queries = order[bounds[c]:bounds[c + 1]]
+        ci, cj = divmod(int(c), int(shape[1]))
+
+        r = 1
+        while True:
+            found = members(ci, cj, r)
+            covers = r >= shape.max()
+            if len(found) > k or covers:
+                diff = coords[queries, None, :] - coords[None, found, :]
+                dist = np.einsum("ijk,ijk->ij", diff, diff)
+                dist[found[None, :] == queries[:, None]] = np.inf
+
+                kk = min(k, len(found) - 1)
+                part = np.argpartition(dist, kk - 1, axis=1)[:, :kk]
+                part_dist = np.take_along_axis(dist, part, axis=1)
+                if covers or np.sqrt(part_dist.max()) <= r * cell:
+                    sort = np.argsort(part_dist, axis=1)
+                    result[queries] = found[np.take_along_axis(part, sort, axis=1)]
+                    break
+            r += 1
+
+    return result
+
+
+def knn_provider(provider, k):
+    """
+    Ứng viên cho CostProvider: láng giềng theo lưới trên tọa độ, sau đó xếp lại theo chi phí thật
+    (có luật bất đối xứng) từ 2k ứng viên hình học.
+    """
+    if len(provider.override_keys) == 0:
+        return knn_grid(provider.coords, k)
+
+    wide = knn_grid(provider.coords, min(2 * k, provider.n_cities - 1))
+    cost = provider.pairs(np.arange(provider.n_cities)[:, None], wide)
+    sort = np.argsort(cost, axis=1, kind="stable")[:, :k]
+    return np.take_along_axis(wide, sort, axis=1)
+
+
+def compute_candidates(source, k):
+    if isinstance(source, CostProvider):
+        return knn_provider(source, k)
+    return knn_matrix(source, k)
+
+
+def candidate_lists(source, k=DEFAULT_CANDIDATES):
+    """
+    Danh sách k ứng viên (láng giềng gần nhất) của mỗi thành phố, tăng dần theo chi phí.
+
+    Nguồn có thể là ma trận chi phí (argpartition theo hàng) hoặc CostProvider
+    (lưới không gian trên tọa độ). Kết quả được tính 1 lần cho mỗi đối tượng nguồn và k,
+    sau đó dùng chung cho mọi toán tử (đột biến GA, 2-opt, ACO, SA) và giải phóng cùng nguồn.
+
+    Returns
+    -------
+    np.ndarray
+        Mảng chỉ đọc (n_cities x k).
+    """
+    n_cities = source.shape[0]
+    k = max(1, min(k, n_cities - 1))
+    key = id(source)
+
+    with candidate_cache_lock:
+        entry = candidate_cache.get(key)
+        cached = entry[1].get(k) if entry is not None and entry[0]() is source else None
+    if cached is not None:
+        return cached
+
+    candidates = compute_candidates(source, k)
+    candidates.flags.writeable = False
+
+    try:
+        ref = weakref.ref(source)
+    except TypeError:
+        # Nguồn không hỗ trợ weakref (vd. list), không cache
+        return candidates
+
+    with candidate_cache_lock:
+        entry = candidate_cache.get(key)
+        if entry is None or entry[0]() is not source:
+            # Mục cũ (nếu có) thuộc về nguồn đã bị giải phóng có cùng id
+            entry = candidate_cache[key] = (ref, {})
+            weakref.finalize(source, forget_candidates, key, ref)
+        entry[1][k] = candidates
+
+    return candidates
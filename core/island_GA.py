@@ -0,0 +1,192 @@
+import numpy as np
+import multiprocessing as mp
+from multiprocessing import shared_memory
+
+from core.utils import OptimizationResult, time_memory_bench
+from core.GA import GA
+
+
+TOPOLOGIES = ("ring", "full")
+
+
+def migration_epochs(generations, interval):
+    """Các thế hệ (đếm từ 1) mà sau đó các đảo trao đổi cá thể"""
+    if interval <= 0:
+        return []
+    return [g for g in range(interval, generations, interval)]
+
+
+def evolve_island(shm, shape, ga_params, generations, interval, migration_size, seed, conn):
+    cost_matrix = np.ndarray(shape, dtype=np.float64, buffer=shm.buf)
+    cost_matrix.flags.writeable = False
+
+    ga = GA(cost_matrix, **ga_params)
+    ga.initialize(seed)
+    ga.cost_func_call = 0
+
+    epochs = set(migration_epochs(generations, interval))
+    best_cost_hist = []
+    avg_cost_hist = []
+
+    for gen in range(1, generations + 1):
+        ga.evolve()
+        best_cost_hist.append(float(np.min(ga.costs)))
+        avg_cost_hist.append(float(np.mean(ga.costs)))
+
+        if gen in epochs:
+            order = np.argsort(ga.costs)
+            best = order[:migration_size]
+            conn.send((ga.population[best].copy(), ga.costs[best].copy()))
+
+            # Cá thể nhập cư thay thế các cá thể tệ nhất
+            immigrants, immigrant_costs = conn.recv()
+            worst = order[::-1][:len(immigrants)]
+            ga.population[worst] = immigrants
+            ga.costs[worst] = immigrant_costs
+
+    best_route, best_cost = ga.best()
+    return {
+        "avg_cost_hist": avg_cost_hist,
+        "best_cost_hist": best_cost_hist,
+        "best_cost": float(best_cost),
+        "best_route": best_route.tolist(),
+        "cost_func_call": ga.cost_func_call
+    }
+
+
+def island_worker(shm_name, shape, ga_params, generations, interval, migration_size, seed, conn):
+    """
+    Chạy 1 đảo GA trong process con.
+    Ma trận chi phí được đọc trực tiếp từ shared memory (chỉ đọc), không pickle.
+    Sau mỗi `interval` thế hệ gửi `migration_size` cá thể tốt nhất về process chính
+    và nhận lại cá thể di cư để thay các cá thể tệ nhất.
+    """
+    shm = shared_memory.SharedMemory(name=shm_name)
+    result = evolve_island(shm, shape, ga_params, generations, interval, migration_size, seed, conn)
+    conn.send(result)
+    conn.close()
+    shm.close()
+
+
+class IslandGA:
+    """
+    Island model: K đảo GA chạy song song trên K process, dùng chung ma trận chi phí
+    qua shared memory, trao đổi cá thể tốt nhất mỗi `migration_interval` thế hệ.
+
+    Topology:
+    - "ring": đảo i nhận cá thể từ đảo i - 1
+    - "full": mỗi đảo nhận các cá thể tốt nhất trong số cá thể di cư của mọi đảo khác
+    """
+
+    def __init__(
+        self,
+        cost_matrix: np.ndarray,
+        n_islands: int = 4,
+        migration_interval: int = 10,
+        migration_size: int = 2,
+        topology: str = "ring",
+        **ga_params
+    ):
+        if topology not in TOPOLOGIES:
+            raise ValueError(f"Topology không hợp lệ: {topology}")
+
+        self.cost_matrix = np.ascontiguousarray(cost_matrix, dtype=np.float64)
+        self.n_islands = n_islands
+        self.migration_interval = migration_interval
+        self.migration_size = migration_size
+        self.topology = topology
+        self.ga_params = ga_params
+
+        self.cost_func_call = 0
+
+
+    def migrate(self, migrants):
+        """Từ danh sách (routes, costs) của từng đảo, tính danh sách cá thể nhập cư cho từng đảo"""
+        K = self.n_islands
+        if self.topology == "ring":
+            return [migrants[(i - 1) % K] for i in range(K)]
+
+        incoming = []
+        for i in range(K):
+            others = [migrants[j] for j in range(K) if j != i]
+            routes = np.concatenate([r for r, _ in others])
+            costs = np.concatenate([c for _, c in others])
+            best = np.argsort(costs)[:self.migration_size]
+            incoming.append((routes[best], costs[best]))
+        return incoming
+
+
+    def run(self, generations=100, seed=None):
+        # Seed riêng cho từng đảo, tái lập được từ 1 seed gốc
+        seeds = np.random.SeedSequence(seed).spawn(self.n_islands)
+
+        shm = shared_memory.SharedMemory(create=True, size=max(1, self.cost_matrix.nbytes))
+        processes, conns = [], []
+        try:
+            np.ndarray(self.cost_matrix.shape, dtype=np.float64, buffer=shm.buf)[:] = self.cost_matrix
+
+            ctx = mp.get_context("spawn")
+            for i in range(self.n_islands):
+                parent_conn, child_conn = ctx.Pipe()
+                process = ctx.Process(
+                    target=island_worker,
+                    args=(shm.name, self.cost_matrix.shape, self.ga_params, generations,
+                          self.migration_interval, self.migration_size, seeds[i], child_conn),
+                    daemon=True
+                )
+                process.start()
+                child_conn.close()
+                processes.append(process)
+                conns.append(parent_conn)
+
+            for _ in migration_epochs(generations, self.migration_interval):
+                migrants = [conn.recv() for conn in conns]
+                for conn, immigrants in zip(conns, self.migrate(migrants)):
+                    conn.send(immigrants)
+
+            results = [conn.recv() for conn in conns]
+            for process in processes:
+                process.join()
+        finally:
+            for process in processes:
+                if process.is_alive():
+                    process.terminate()
+            shm.close()
+            shm.unlink()
+
+        self.cost_func_call = sum(r["cost_func_call"] for r in results)
+
+        best_island = int(np.argmin([r["best_cost"] for r in results]))
+        island_best = np.array([r["best_cost_hist"] for r in results])
+        island_avg = np.array([r["avg_cost_hist"] for r in results])
+
+        return {
+            "avg_cost_hist": island_avg.mean(axis=0).tolist(),
+            "best_cost_hist": np.minimum.accumulate(island_best.min(axis=0)).tolist(),
+            "island_best_cost_hist": island_best.tolist(),
+            "best_cost": results[best_island]["best_cost"],
+            "best_route": results[best_island]["best_route"]
+        }
+
+
+def run(cost_matrix, n_islands, migration_interval, migration_size, topology, pop_size, crossover_rate, mutation_rate,
+        elite_size, tournament_size, two_opt_max, max_iter, seed, **ga_params) -> OptimizationResult:
+    cost_matrix = np.asarray(cost_matrix, dtype=np.float64)
+    islands = IslandGA(
+        cost_matrix, n_islands, migration_interval, migration_size, topology,
+        population_size=pop_size, crossover_rate=crossover_rate, mutation_rate=mutation_rate,
+        elite_size=elite_size, tournament_size=tournament_size, two_opt_max=two_opt_max, **ga_params
+    )
+
+    bench = time_memory_bench(islands.run, max_iter, seed)
+
+    return {
+        "avgCostHist": [float(x) for x in bench["result"]["avg_cost_hist"]],
+        "bestCost": float(bench["result"]["best_cost"]),
+        "bestCostHist": [float(x) for x in bench["result"]["best_cost_hist"]],
+        "bestRoute": [int(x) for x in bench["result"]["best_route"]],
+        "costFuncCall": islands.cost_func_call,
+        "islandBestCostHist": [[float(x) for x in h] for h in bench["result"]["island_best_cost_hist"]],
+        "memory": bench["memory_diff"],
+        "time": bench["time"]
+    }
@@ -0,0 +1,361 @@
+import numpy as np
+from collections import deque
+
+from core.utils import OptimizationResult, CostProvider, time_memory_bench, batch_cost_func, as_cost_matrix
+from core.candidates import candidate_lists, DEFAULT_CANDIDATES
+from core.termination import as_termination
+
+
+class LinKernighan:
+    """
+    Local search độ sâu thay đổi kiểu Lin-Kernighan trên tour dạng mảng + chỉ số vị trí.
+
+    - Bước LK (chỉ ma trận đối xứng): cố định t1, bỏ cạnh (t1, t2) rồi lặp tối đa `max_depth` lần:
+      thêm cạnh (t2, t3) với t3 là ứng viên của t2, bỏ cạnh (t4, t3) với t4 = pred(t3),
+      đảo đoạn t2..t4 để tour luôn hợp lệ và t4 trở thành t2 mới. Giữ lại tiền tố của chuỗi
+      có gain đóng tour lớn nhất, hoàn tác phần còn lại. Cạnh vừa thêm không bị bỏ lại trong cùng chuỗi.
+    - Bước Or-opt (mọi ma trận): chuyển đoạn 1..`max_segment` thành phố tới cạnh
+      có 1 đầu là ứng viên của đầu / cuối đoạn, không đảo chiều nên đúng với ma trận bất đối xứng.
+
+    Đảo / dịch đoạn dùng chỉ số vòng trên mảng NumPy, không cắt ghép lại cả tour. Bước LK đảo
+    phía ngắn hơn (đoạn hoặc phần bù, <= n / 2) và giữ 1 cờ chiều logic `flipped` thay vì đảo cả mảng. Các thành phố không có bước cải thiện được tắt (don't-look bits),
+    chỉ đầu mút của các cạnh vừa đổi được kiểm tra lại.
+    """
+
+    def __init__(
+        self,
+        cost_matrix: np.ndarray,
+        n_neighbors: int = DEFAULT_CANDIDATES,
+        max_depth: int = 5,
+        max_segment: int = 3
+    ):
+        self.cost_matrix = as_cost_matrix(cost_matrix)
+        self.n_cities = self.cost_matrix.shape[0]
+        self.max_depth = max_depth
+        self.max_segment = max_segment
+        self.neighbors = candidate_lists(self.cost_matrix, n_neighbors).tolist() if self.n_cities > 1 else [[]]
+
+        if isinstance(self.cost_matrix, CostProvider):
+            self.symmetric = len(self.cost_matrix.override_keys) == 0
+        else:
+            self.symmetric = bool(np.array_equal(self.cost_matrix, self.cost_matrix.T))
+
+        self.cost_func_call = 0
+
+
+    def succ(self, city):
+        return int(self.tour[(self.pos[city] + 1) % self.n_cities])
+
+
+    def pred(self, city):
+        return int(self.tour[self.pos[city] - 1])
+
+
+    def next_city(self, city):
+        """Thành phố sau `city` theo chiều logic của tour (ngược chiều mảng khi self.flipped)"""
+        return self.pred(city) if self.flipped else self.succ(city)
+
+
+    def prev_city(self, city):
+        return self.succ(city) if self.flipped else self.pred(city)
+
+
+    def reverse_path(self, a, b):
+        """
+        Đảo đường đi a..b (theo chiều logic). Nếu phần bù ngắn hơn thì đảo phần bù và đổi chiều
+        logic: cùng 1 chu trình (chỉ đúng với ma trận đối xứng). Trả về bước để hoàn tác.
+        """
+        n = self.n_cities
+        start, end = (int(self.pos[b]), int(self.pos[a])) if self.flipped else (int(self.pos[a]), int(self.pos[b]))
+        length = (end - start) % n + 1
+        flip = 2 * length > n
+        if flip:
+            start, length = (end + 1) % n, n - length
+            self.flipped = not self.flipped
+        self.reverse(start, length)
+        return start, length, flip
+
+
+    def undo(self, step):
+        start, length, flip = step
+        self.reverse(start, length)
+        if flip:
+            self.flipped = not self.flipped
+
+
+    def reverse(self, start, length):
+        """Đảo đoạn vòng tour[start : start + length]"""
+        idx = (start + np.arange(length)) % self.n_cities
+        self.tour[idx] = self.tour[idx[::-1]]
+        self.pos[self.tour[idx]] = idx
+
+
+    def rotate(self, start, length, shift):
+        """Xoay đoạn vòng tour[start : start + length] đi `shift` vị trí (dương: sang trái)"""
+        idx = (start + np.arange(length)) % self.n_cities
+        self.tour[idx] = np.roll(self.tour[idx], -shift)
+        self.pos[self.tour[idx]] = idx
+
+
+    def lk_chain(self, t1):
+        """1 chuỗi LK từ t1 theo chiều t2 = next_city(t1). Trả về (gain, các thành phố bị đổi cạnh)"""
+        C = self.cost_matrix
+        t2 = self.next_city(t1)
+        G = C[t1, t2]
+        added = set()
+        steps, touched = [], [t1, t2]
+        best_gain, best_k = 0.0, 0
+
+        for _ in range(self.max_depth):
+            succ_t2 = self.next_city(t2)
+            choice, choice_value = None, -np.inf
+            for t3 in self.neighbors[t2]:
+                g1 = G - C[t2, t3]
+                if g1 <= 1e-10:
+                    # Ứng viên tăng dần theo chi phí, các ứng viên sau chỉ tệ hơn
+                    break
+                if t3 == t1 or t3 == succ_t2:
+                    continue
+                t4 = self.prev_city(t3)
+                if (min(t3, t4), max(t3, t4)) in added:
+                    continue
+                self.cost_func_call += 1
+                value = g1 + C[t4, t3]
+                if value > choice_value:
+                    choice, choice_value = (t3, t4, g1), value
+
+            if choice is None:
+                break
+
+            t3, t4, g1 = choice
+            steps.append(self.reverse_path(t2, t4))
+            touched += [t3, t4]
+            added.add((min(t2, t3), max(t2, t3)))
+
+            G = g1 + C[t4, t3]
+            gain = G - C[t4, t1]
+            if gain > best_gain + 1e-10:
+                best_gain, best_k = gain, len(steps)
+            t2 = t4
+
+        for step in reversed(steps[best_k:]):
+            self.undo(step)
+        return best_gain, touched[:2 + 2 * best_k]
+
+
+    def lk_step(self, t1):
+        """Thử chuỗi LK theo cả 2 chiều của t1"""
+        gain, touched = self.lk_chain(t1)
+        if gain > 0:
+            return gain, touched
+
+        # Chiều ngược lại: chỉ đổi chiều logic (O(1)), cùng 1 chu trình vì ma trận đối xứng
+        self.flipped = not self.flipped
+        return self.lk_chain(t1)
+
+
+    def or_step(self, s1):
+        """Bước Or-opt tốt nhất cho các đoạn bắt đầu tại s1. Trả về (gain, các thành phố bị đổi cạnh)"""
+        C, n = self.cost_matrix, self.n_cities
+        best, best_gain = None, 1e-10
+        i = int(self.pos[s1])
+        p = self.pred(s1)
+
+        for L in range(1, min(self.max_segment, n - 3) + 1):
+            sL = int(self.tour[(i + L - 1) % n])
+            q = int(self.tour[(i + L) % n])
+            removed = C[p, s1] + C[sL, q] - C[p, q]
+            if removed <= best_gain:
+                continue
+
+            # Vị trí tương đối so với đầu đoạn, cạnh chèn (c, d) phải nằm ngoài đoạn [p, q]
+            inserts = [(c, self.succ(c)) for c in self.neighbors[s1]]
+            inserts += [(self.pred(d), d) for d in self.neighbors[sL]]
+            for c, d in inserts:
+                offset = (int(self.pos[c]) - i) % n
+                if offset < L or offset == n - 1:
+                    continue
+                self.cost_func_call += 1
+                gain = removed - (C[c, s1] + C[sL, d] - C[c, d])
+                if gain > best_gain:
+                    best, best_gain = (L, c, d, offset), gain
+
+        if best is None:
+            return 0.0, []
+
+        L, c, d, offset = best
+        # Đoạn [i, i + L) chuyển ra sau c: xoay trái [i, pos(c)] hoặc xoay phải [pos(d), i + L), chọn phía ngắn hơn
+        forward = offset + 1
+        backward = n - offset - 1 + L
+        if forward <= backward:
+            self.rotate(i, forward, L)
+        else:
+            self.rotate(int(self.pos[d]), backward, -L)
+        return best_gain, [p, q, s1, int(self.tour[(self.pos[s1] + L - 1) % n]), c, d]
+
+
+    def improve(self, tour: np.ndarray, max_iter: int = 10, active=None):
+        """
+        Cải thiện 1 tour tại chỗ.
+
+        Parameters
+        ----------
+        tour : np.ndarray
+            Tour (hoán vị) được sửa trực tiếp.
+        max_iter : int
+            Số lượt tối đa, mỗi lượt xét mọi thành phố đang hoạt động.
+        active : list[int] | None
+            Các thành phố cần xét ban đầu (vd. đầu mút của 1 cú kick), mặc định mọi thành phố.
+
+        Returns
+        -------
+        float
+            Tổng chi phí giảm được.
+        """
+        n = self.n_cities
+        if n < 5:
+            return 0.0
+
+        self.tour = tour
+        # Chiều logic của LK so với mảng, Or-opt luôn làm theo chiều mảng (chỉ đổi khi ma trận đối xứng)
+        self.flipped = False
+        self.pos = np.empty(n, dtype=np.intp)
+        self.pos[tour] = np.arange(n)
+
+        queued = np.zeros(n, dtype=bool)
+        queue = deque(range(n) if active is None else active)
+        queued[list(queue)] = True
+        total = 0.0
+
+        for _ in range(max_iter):
+            if not queue:
+                break
+            for _ in range(len(queue)):
+                city = queue.popleft()
+                queued[city] = False
+
+                gain, touched = self.lk_step(city) if self.symmetric else (0.0, [])
+                if gain <= 0:
+                    gain, touched = self.or_step(city)
+                if gain <= 0:
+                    continue
+
+                total += gain
+                for c in touched:
+                    if not queued[c]:
+                        queued[c] = True
+                        queue.append(c)
+
+        return total
+
+
+    def improve_population(self, population: np.ndarray, max_iter: int = 10, inplace: bool = False):
+        pop = population if inplace else population.copy()
+        for tour in pop:
+            # improve sửa trên mảng intp, ghi lại vào hàng của quần thể (có thể là int16 / int32)
+            work = tour.astype(np.intp)
+            self.improve(work, max_iter)
+            tour[:] = work
+        return pop
+
+
+    def nearest_neighbor_tour(self, start=0):
+        """Tour tham lam theo ứng viên, hết ứng viên thì chọn thành phố chưa đi gần nhất"""
+        n = self.n_cities
+        visited = np.zeros(n, dtype=bool)
+        tour = np.empty(n, dtype=np.intp)
+        city = start
+        for k in range(n):
+            tour[k] = city
+            visited[city] = True
+            if k == n - 1:
+                break
+            nxt = next((c for c in self.neighbors[city] if not visited[c]), None)
+            if nxt is None:
+                row = np.where(visited, np.inf, np.asarray(self.cost_matrix[city], dtype=np.float64))
+                nxt = int(np.argmin(row))
+                if visited[nxt]:
+                    nxt = int(np.argmin(visited))
+            city = nxt
+        return tour
+
+
+    def double_bridge(self, tour, np_rng, window=100):
+        """Kick double-bridge cục bộ (A B C D -> A C B D trong 1 cửa sổ), giữ chiều của tour"""
+        n = self.n_cities
+        w = min(n, window)
+        shift = int(np_rng.integers(0, n))
+        rolled = np.roll(tour, -shift)
+        a, b, c = np.sort(np_rng.choice(np.arange(1, w), 3, replace=False))
+        kicked = np.concatenate([rolled[:a], rolled[b:c], rolled[a:b], rolled[c:]])
+        touched = [int(x) for x in rolled[[a - 1, a, b - 1, b, c - 1, c % n]]]
+        return kicked, touched
+
+
+    def run(self, iters=100, seed=None, callback=None, termination=None):
+        """
+        Chained LK: tour tham lam + LK, sau đó mỗi vòng lặp kick double-bridge tour tốt nhất,
+        cải thiện lại từ các đầu mút bị kick và giữ nếu tốt hơn.
+        callback(iter, best_cost, best_route) được gọi sau mỗi vòng lặp, trả về False để dừng sớm.
+        """
+        if termination is not None:
+            termination.start()
+
+        np_rng = np.random.default_rng(seed)
+        n = self.n_cities
+        self.cost_func_call = 0
+
+        best_route = self.nearest_neighbor_tour(int(np_rng.integers(0, n)) if n > 0 else 0)
+        self.improve(best_route, max_iter=n)
+        best_cost = batch_cost_func(self.cost_matrix, best_route[None, :])[0]
+        best_cost_hist = [best_cost]
+
+        for it in range(iters if n >= 8 else 0):
+            candidate, touched = self.double_bridge(best_route, np_rng)
+            self.improve(candidate, max_iter=n, active=touched)
+            cost = batch_cost_func(self.cost_matrix, candidate[None, :])[0]
+            if cost < best_cost - 1e-10:
+                best_route, best_cost = candidate, cost
+            best_cost_hist.append(best_cost)
+
+            if callback is not None and callback(it + 1, best_cost, best_route) is False:
+                break
+            if termination is not None and termination.should_stop(best_cost, self.cost_func_call):
+                break
+
+        return {
+            "best_cost_hist": best_cost_hist,
+            "best_cost": best_cost,
+            "best_route": best_route
+        }
+
+
+def lk_population(population: np.ndarray, cost_matrix: np.ndarray, max_iter: int = 10, inplace: bool = False, engine=None):
+    """
+    LK + Or-opt với `LinKernighan` cho mọi tour trong quần thể (chữ ký của LOCAL_SEARCH).
+    `engine`: LinKernighan dựng sẵn cho `cost_matrix`, tránh kiểm tra đối xứng O(n^2)
+    và dựng danh sách ứng viên lại mỗi lần gọi (xem `local_search_op`).
+    """
+    if engine is None:
+        engine = LinKernighan(cost_matrix)
+    return engine.improve_population(population, max_iter, inplace)
+
+
+def run(cost_matrix, max_iter=100, n_neighbors=DEFAULT_CANDIDATES, max_depth=5, seed=None, callback=None, termination=None) -> OptimizationResult:
+    termination = as_termination(termination)
+    cost_matrix = as_cost_matrix(cost_matrix)
+    lk = LinKernighan(cost_matrix, n_neighbors, max_depth)
+
+    bench = time_memory_bench(lk.run, max_iter, seed, callback, termination)
+
+    result: OptimizationResult = {
+        "bestCost": float(bench["result"]["best_cost"]),
+        "bestCostHist": [float(x) for x in bench["result"]["best_cost_hist"]],
+        "bestRoute": [int(x) for x in bench["result"]["best_route"]],
+        "costFuncCall": lk.cost_func_call,
+        "memory": bench["memory_diff"],
+        "time": bench["time"]
+    }
+    if termination is not None:
+        result["stopReason"] = termination.reason
+    return result
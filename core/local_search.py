@@ -0,0 +1,187 @@
+import numpy as np
+from functools import partial
+
+from core.two_opt import two_opt_population, neighbor_lists
+from core.lin_kernighan import LinKernighan, lk_population
+
+
+def relocate(tour: np.ndarray, i: int, length: int, j: int):
+    """Chuyển đoạn tour[i : i + length] (vòng) ra sau thành phố tour[j], giữ nguyên chiều."""
+    n = len(tour)
+    rolled = np.roll(tour, -i)
+    seg, rest = rolled[:length], rolled[length:]
+    # Vị trí của tour[j] trong phần còn lại
+    at = (j - i - length) % n
+    return np.concatenate([rest[:at + 1], seg, rest[at + 1:]])
+
+
+def or_opt_population(population: np.ndarray, cost_matrix: np.ndarray, max_iter: int = 10, max_segment: int = 3, inplace: bool = False):
+    """
+    Or-opt vector hóa cho tất cả tour trong quần thể.
+
+    Mỗi bước chuyển 1 đoạn dài 1..max_segment sang vị trí khác mà không đảo chiều,
+    nên delta đúng cho cả ma trận bất đối xứng.
+
+    Parameters
+    ----------
+    population : np.ndarray
+        Mảng 2D (pop_size x n_cities) chứa các tour.
+    cost_matrix : np.ndarray
+        Ma trận chi phí (n_cities x n_cities), có thể bất đối xứng.
+    max_iter : int
+        Số vòng lặp tối đa để cải thiện tour.
+    max_segment : int
+        Độ dài tối đa của đoạn được di chuyển.
+    inplace : bool
+        Sửa trực tiếp trên `population` thay vì tạo bản copy.
+
+    Returns
+    -------
+    np.ndarray
+        Quần thể đã cải thiện bằng Or-opt.
+    """
+    pop_size, n_cities = population.shape
+    pop = population if inplace else population.copy()
+    if n_cities < 4:
+        return pop
+
+    max_segment = min(max_segment, n_cities - 2)
+    pos = np.arange(n_cities)
+
+    # Với mỗi độ dài L: ma trận (i, j) các vị trí chèn hợp lệ, j không thuộc [i - 1, i + L - 1]
+    valid = []
+    for L in range(1, max_segment + 1):
+        offset = (pos[None, :] - pos[:, None]) % n_cities
+        valid.append((offset >= L) & (offset != n_cities - 1))
+
+    for tour_idx in range(pop_size):
+        tour = pop[tour_idx]
+
+        for _ in range(max_iter):
+            nxt = np.roll(tour, -1)
+            edge = cost_matrix[tour, nxt] # edge[j] = cost(tour[j], tour[j + 1])
+
+            best_delta, best_move = 0.0, None
+            for L in range(1, max_segment + 1):
+                p = np.roll(tour, 1)             # thành phố trước đoạn
+                s0 = tour                         # đầu đoạn
+                sl = np.roll(tour, -(L - 1))      # cuối đoạn
+                q = np.roll(tour, -L)             # thành phố sau đoạn
+
+                # Bỏ đoạn ra khỏi vị trí i
+                removed = cost_matrix[p, q] - cost_matrix[p, s0] - cost_matrix[sl, q]
+                # Chèn đoạn vào giữa tour[j] và tour[j + 1]
+                inserted = (
+                    cost_matrix[tour[None, :], s0[:, None]] +
+                    cost_matrix[sl[:, None], nxt[None, :]] -
+                    edge[None, :]
+                )
+                delta = np.where(valid[L - 1], removed[:, None] + inserted, np.inf)
+
+                idx = np.argmin(delta)
+                if delta.flat[idx] < best_delta - 1e-10:
+                    best_delta = delta.flat[idx]
+                    best_move = (*divmod(idx, n_cities), L)
+
+            if best_move is None:
+                break
+
+            i, j, L = best_move
+            tour = relocate(tour, i, L, j)
+
+        pop[tour_idx] = tour
+
+    return pop
+
+
+def three_opt_population(population: np.ndarray, cost_matrix: np.ndarray, max_iter: int = 10, n_neighbors: int = 8, inplace: bool = False):
+    """
+    3-opt dạng chèn đoạn (segment insertion) cho tất cả tour trong quần thể.
+
+    Tour A B C được đổi thành A C B với B = tour[i+1 : j+1], C = tour[j+1 : k+1].
+    Không đoạn nào bị đảo chiều nên delta đúng cho ma trận bất đối xứng.
+    Cạnh mới (tour[i], tour[j + 1]) chỉ được xét khi tour[j + 1] thuộc `n_neighbors`
+    láng giềng gần nhất của tour[i], giảm mỗi bước từ O(n^3) xuống O(n^2 * k).
+
+    Parameters
+    ----------
+    population : np.ndarray
+        Mảng 2D (pop_size x n_cities) chứa các tour.
+    cost_matrix : np.ndarray
+        Ma trận chi phí (n_cities x n_cities), có thể bất đối xứng.
+    max_iter : int
+        Số vòng lặp tối đa để cải thiện tour.
+    n_neighbors : int
+        Số láng giềng gần nhất được xét cho cạnh mới đầu tiên.
+    inplace : bool
+        Sửa trực tiếp trên `population` thay vì tạo bản copy.
+
+    Returns
+    -------
+    np.ndarray
+        Quần thể đã cải thiện bằng 3-opt.
+    """
+    pop_size, n_cities = population.shape
+    pop = population if inplace else population.copy()
+    if n_cities < 4:
+        return pop
+
+    neighbors = neighbor_lists(cost_matrix, n_neighbors)
+    pos_k = np.arange(n_cities)
+
+    for tour_idx in range(pop_size):
+        tour = pop[tour_idx]
+
+        for _ in range(max_iter):
+            pos = np.empty(n_cities, dtype=np.intp)
+            pos[tour] = np.arange(n_cities)
+            nxt = np.roll(tour, -1)
+            edge = cost_matrix[tour, nxt]
+
+            # Cặp (i, j) với tour[j + 1] là láng giềng của tour[i]
+            i = np.repeat(np.arange(n_cities), neighbors.shape[1])
+            j = pos[neighbors[tour].ravel()] - 1
+            keep = j > i
+            i, j = i[keep], j[keep]
+            if len(i) == 0:
+                break
+
+            # delta[c, k] cho mọi k > j
+            first = cost_matrix[tour[i], tour[j + 1]] - edge[i] - edge[j]
+            close = (
+                cost_matrix[tour[None, :], tour[i + 1][:, None]] +
+                cost_matrix[tour[j][:, None], nxt[None, :]] -
+                edge[None, :]
+            )
+            delta = np.where(pos_k[None, :] > j[:, None], first[:, None] + close, np.inf)
+
+            idx = np.argmin(delta)
+            if not delta.flat[idx] < -1e-10:
+                break
+
+            c, k = divmod(idx, n_cities)
+            a, b = i[c], j[c]
+            tour = np.concatenate([tour[:a + 1], tour[b + 1:k + 1], tour[a + 1:b + 1], tour[k + 1:]])
+
+        pop[tour_idx] = tour
+
+    return pop
+
+
+# Các toán tử local search dùng chung chữ ký (population, cost_matrix, max_iter, inplace=False)
+LOCAL_SEARCH = {
+    "2opt": two_opt_population,
+    "or_opt": or_opt_population,
+    "3opt": three_opt_population,
+    "lk": lk_population,
+}
+
+
+def local_search_op(name: str, cost_matrix):
+    """
+    Toán tử LOCAL_SEARCH[name] cho 1 ma trận cố định, dùng trong solver gọi lặp lại mỗi thế hệ.
+    "lk" được gắn sẵn 1 engine `LinKernighan` dựng 1 lần cho ma trận.
+    """
+    if name == "lk":
+        return partial(lk_population, engine=LinKernighan(cost_matrix))
+    return LOCAL_SEARCH[name]
@@ -0,0 +1,117 @@
+import hashlib
+import json
+import os
+import uuid
+import numpy as np
+
+from config.settings import MATRIX_CACHE_DIR, MATRIX_CACHE_MAX_BYTES
+from core.utils import CostProvider
+
+
+def instance_key(coords, rules=None, **extra):
+    """
+    Khóa (sha1) của 1 bài toán: tọa độ, các luật bất đối xứng và tham số dựng ma trận khác.
+    Cùng tọa độ + luật + tham số luôn cho cùng khóa.
+    """
+    h = hashlib.sha1()
+    coords = np.ascontiguousarray(coords, dtype=np.float64)
+    h.update(str(coords.shape).encode())
+    h.update(coords.tobytes())
+    h.update(json.dumps([rules or [], extra], sort_keys=True, default=str).encode())
+    return h.hexdigest()
+
+
+class MatrixCache:
+    """
+    Cache ma trận chi phí trên đĩa, mỗi bài toán 1 file `<key>.npy`.
+
+    Ma trận được mở lại bằng `np.load(mmap_mode="r")` nên không phải dựng lại,
+    và các process cùng đọc 1 file dùng chung page cache của hệ điều hành.
+    Khi tổng dung lượng vượt `max_bytes`, các file dùng lâu nhất (theo mtime) bị xóa.
+    """
+
+    def __init__(self, cache_dir=MATRIX_CACHE_DIR, max_bytes=MATRIX_CACHE_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+
+
+    def path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.npy")
+
+
+    def get(self, key):
+        """Ma trận chỉ đọc (memmap) nếu đã có trong cache, ngược lại None"""
+        path = self.path(key)
+        try:
+            matrix = np.load(path, mmap_mode="r")
+        except (FileNotFoundError, ValueError, OSError):
+            return None
+
+        # Đánh dấu vừa dùng cho việc xóa theo LRU
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return matrix
+
+
+    def put(self, key, matrix):
+        """Ghi ma trận vào cache và trả về bản memmap chỉ đọc của nó"""
+        os.makedirs(self.cache_dir, exist_ok=True)
+        path = self.path(key)
+
+        # Ghi ra file tạm rồi đổi tên để process khác không bao giờ đọc phải file ghi dở
+        tmp = os.path.join(self.cache_dir, f".{key}.{uuid.uuid4().hex}.tmp")
+        with open(tmp, "wb") as f:
+            np.save(f, np.ascontiguousarray(matrix, dtype=np.float64))
+        os.replace(tmp, path)
+
+        self.evict(keep=path)
+        return np.load(path, mmap_mode="r")
+
+
+    def get_or_build(self, key, build):
+        """Lấy ma trận theo khóa, nếu chưa có thì gọi `build()` để dựng và lưu lại"""
+        matrix = self.get(key)
+        if matrix is None:
+            matrix = self.put(key, build())
+        return matrix
+
+
+    def evict(self, keep=None):
+        """Xóa các file cũ nhất cho đến khi tổng dung lượng không vượt `max_bytes`"""
+        entries = []
+        for entry in os.scandir(self.cache_dir):
+            if entry.name.endswith(".npy") and entry.is_file():
+                stat = entry.stat()
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            if path == keep:
+                continue
+            try:
+                os.remove(path)
+                total -= size
+            except OSError:
+                # File đang được map trên Windows, bỏ qua lần này
+                pass
+
+
+    def clear(self):
+        if not os.path.isdir(self.cache_dir):
+            return
+        for entry in os.scandir(self.cache_dir):
+            if entry.name.endswith(".npy"):
+                try:
+                    os.remove(entry.path)
+                except OSError:
+                    pass
+
+
+def distance_matrix(coords, cache=None):
+    """Ma trận khoảng cách Euclid của `coords`, đọc từ cache nếu đã dựng trước đó"""
+    cache = cache or MatrixCache()
+    return cache.get_or_build(instance_key(coords), lambda: CostProvider(coords).dense())
@@ -0,0 +1,170 @@
+import os
+import sys
+import time
+import threading
+import tracemalloc
+from contextlib import contextmanager
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+
+# Chế độ đo của time_memory_bench:
+# - "time": chỉ đo thời gian, không có chi phí phụ
+# - "rss": lấy mẫu RSS của process bằng 1 thread nền, gần như không làm chậm solver
+# - "tracemalloc": đo chính xác bộ nhớ Python / numpy cấp phát, nhưng làm chậm rõ rệt các solver cấp phát nhiều
+BENCH_MODES = ("time", "rss", "tracemalloc")
+
+
+def rss_bytes():
+    """RSS hiện tại của process (byte), 0 nếu không đọc được"""
+    if psutil is not None:
+        return psutil.Process().memory_info().rss
+
+    if sys.platform.startswith("linux"):
+        try:
+            with open("/proc/self/statm", "rb") as f:
+                return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+        except (OSError, ValueError, IndexError):
+            return 0
+
+    if sys.platform == "win32":
+        import ctypes
+        from ctypes import wintypes
+
+        class PROCESS_MEMORY_COUNTERS(ctypes.Structure):
+            _fields_ = [
+                ("cb", wintypes.DWORD),
+                ("PageFaultCount", wintypes.DWORD),
+                ("PeakWorkingSetSize", ctypes.c_size_t),
+                ("WorkingSetSize", ctypes.c_size_t),
+                ("QuotaPeakPagedPoolUsage", ctypes.c_size_t),
+                ("QuotaPagedPoolUsage", ctypes.c_size_t),
+                ("QuotaPeakNonPagedPoolUsage", ctypes.c_size_t),
+                ("QuotaNonPagedPoolUsage", ctypes.c_size_t),
+                ("PagefileUsage", ctypes.c_size_t),
+                ("PeakPagefileUsage", ctypes.c_size_t),
+            ]
+
+        counters = PROCESS_MEMORY_COUNTERS()
+        counters.cb = ctypes.sizeof(counters)
+        handle = ctypes.windll.kernel32.GetCurrentProcess()
+        if ctypes.windll.psapi.GetProcessMemoryInfo(handle, ctypes.byref(counters), counters.cb):
+            return counters.WorkingSetSize
+        return 0
+
+    # macOS / BSD: ru_maxrss là đỉnh RSS (byte trên macOS), dùng tạm làm giá trị hiện tại
+    try:
+        import resource
+        usage = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return usage if sys.platform == "darwin" else usage * 1024
+    except (ImportError, OSError):
+        return 0
+
+
+class RSSSampler:
+    """
+    Lấy mẫu RSS mỗi `interval` giây trên 1 thread nền, giữ giá trị lớn nhất.
+
+    RSS là của cả process: khi nhiều solver chạy đồng thời (các thread của GUI)
+    đỉnh đo được gồm cả bộ nhớ của các solver khác.
+    """
+
+    def __init__(self, interval=0.005):
+        self.interval = interval
+        self.stop_event = threading.Event()
+        self.thread = threading.Thread(target=self.sample, daemon=True)
+        self.baseline = 0
+        self.peak = 0
+
+
+    def sample(self):
+        while not self.stop_event.wait(self.interval):
+            self.peak = max(self.peak, rss_bytes())
+
+
+    def start(self):
+        self.baseline = rss_bytes()
+        self.peak = self.baseline
+        self.thread.start()
+
+
+    def stop(self):
+        self.stop_event.set()
+        self.thread.join()
+        self.peak = max(self.peak, rss_bytes())
+        return self.baseline, self.peak
+
+
+# tracemalloc là trạng thái toàn cục: khi nhiều solver chạy đồng thời (vd. các thread của GUI)
+# chỉ lần đo đầu tiên bật và lần đo cuối cùng tắt tracing
+tracemalloc_lock = threading.Lock()
+tracemalloc_users = 0
+
+
+class TracemallocSampler:
+    """Đỉnh bộ nhớ cấp phát theo tracemalloc trong lúc chạy (chính xác nhưng chậm)"""
+
+    def start(self):
+        global tracemalloc_users
+        with tracemalloc_lock:
+            if tracemalloc_users == 0 and not tracemalloc.is_tracing():
+                tracemalloc.start()
+            tracemalloc_users += 1
+            self.baseline = tracemalloc.get_traced_memory()[0]
+            # Đỉnh tính từ lúc bắt đầu đo (đặt lại cả đỉnh của các lần đo đang chạy đồng thời)
+            tracemalloc.reset_peak()
+
+
+    def stop(self):
+        global tracemalloc_users
+        with tracemalloc_lock:
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc_users -= 1
+            if tracemalloc_users == 0:
+                tracemalloc.stop()
+        return self.baseline, peak
+
+
+class NullSampler:
+    def start(self):
+        pass
+
+
+    def stop(self):
+        return 0, 0
+
+
+def memory_sampler(mode):
+    if mode not in BENCH_MODES:
+        raise ValueError(f"Chế độ đo không hợp lệ: {mode}")
+    return {"time": NullSampler, "rss": RSSSampler, "tracemalloc": TracemallocSampler}[mode]()
+
+
+class PhaseTimer:
+    """
+    Cộng dồn thời gian (giây) của từng pha trong vòng lặp solver:
+
+        with self.timer.phase("crossover"):
+            ...
+
+    Chi phí ~1 µs mỗi lần vào pha, đủ nhỏ để luôn bật.
+    """
+
+    def __init__(self):
+        self.totals = {}
+
+
+    def reset(self):
+        self.totals = {}
+
+
+    @contextmanager
+    def phase(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.totals[name] = self.totals.get(name, 0.0) + time.perf_counter() - start
@@ -0,0 +1,76 @@
+import time
+import numpy as np
+
+
+STOP_REASONS = ("max_iter", "stagnation", "target", "time", "evals")
+
+
+class Termination:
+    """
+    Điều kiện dừng chung cho các solver, kiểm tra sau mỗi vòng lặp (thế hệ, mức nhiệt của SA).
+
+    Solver dừng ngay khi 1 trong các điều kiện sau thỏa, lý do dừng lưu ở `reason`:
+    - stagnation: best cost không giảm quá `tol` trong `stagnation` vòng lặp liên tiếp.
+    - target: best cost <= `target`.
+    - time: thời gian chạy (tính từ `start()`) >= `time_limit` giây.
+    - evals: số lần đánh giá chi phí (`cost_func_call` của solver) >= `max_evals`.
+
+    Nếu không điều kiện nào thỏa, solver chạy hết max_iter và `reason` là "max_iter".
+    Mỗi lần chạy dùng 1 đối tượng riêng vì trạng thái được lưu trong đối tượng.
+
+    Parameters
+    ----------
+    stagnation : int | None
+        Số vòng lặp tối đa không cải thiện.
+    target : float | None
+        Chi phí mục tiêu (vd. lời giải tối ưu đã biết).
+    time_limit : float | None
+        Giới hạn thời gian (giây).
+    max_evals : int | None
+        Giới hạn số lần đánh giá chi phí.
+    tol : float
+        Mức giảm tối thiểu được tính là cải thiện.
+    """
+
+    def __init__(self, stagnation=None, target=None, time_limit=None, max_evals=None, tol=0.0):
+        self.stagnation = stagnation
+        self.target = target
+        self.time_limit = time_limit
+        self.max_evals = max_evals
+        self.tol = tol
+        self.start()
+
+
+    def start(self):
+        self.start_time = time.perf_counter()
+        self.iteration = 0
+        self.best_cost = np.inf
+        self.last_improvement = 0
+        self.reason = "max_iter"
+
+
+    def should_stop(self, best_cost, cost_func_call=0):
+        """Gọi sau mỗi vòng lặp với best cost và số lần đánh giá hiện tại, trả về True nếu cần dừng"""
+        self.iteration += 1
+        if best_cost < self.best_cost - self.tol:
+            self.best_cost = best_cost
+            self.last_improvement = self.iteration
+
+        if self.target is not None and best_cost <= self.target:
+            self.reason = "target"
+        elif self.max_evals is not None and cost_func_call >= self.max_evals:
+            self.reason = "evals"
+        elif self.time_limit is not None and time.perf_counter() - self.start_time >= self.time_limit:
+            self.reason = "time"
+        elif self.stagnation is not None and self.iteration - self.last_improvement >= self.stagnation:
+            self.reason = "stagnation"
+        else:
+            return False
+        return True
+
+
+def as_termination(termination):
+    """Termination | dict tham số (vd. từ file cấu hình sweep) | None -> Termination | None"""
+    if termination is None or isinstance(termination, Termination):
+        return termination
+    return Termination(**termination)
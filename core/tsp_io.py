@@ -0,0 +1,377 @@
+import json
+import math
+import os
+import re
+import numpy as np
+from typing import TypedDict
+
+
+class TSPInstance(TypedDict):
+    name: str
+    type: str                       # TSP / ATSP
+    dimension: int
+    edge_weight_type: str
+    coords: np.ndarray | None       # (n x d) nếu file có NODE_COORD_SECTION
+    matrix: np.ndarray | None       # (n x n) float64, None nếu không dựng ma trận dày
+
+
+# Đọc file theo khối để không phải tách cả ma trận lớn thành list theo từng dòng
+CHUNK_BYTES = 1 << 23
+
+# Dòng bắt đầu bằng từ khóa (vd. "EOF", "DISPLAY_DATA_SECTION") kết thúc 1 section số
+KEYWORD = re.compile(rb"^[ \t]*[A-Za-z_]{2,}", re.MULTILINE)
+
+# Số phần tử tối đa của mảng tạm khi tính ma trận từ tọa độ
+BLOCK_ELEMENTS = 1 << 22
+
+COORD_TYPES = ("EUC_2D", "EUC_3D", "CEIL_2D", "MAN_2D", "MAN_3D", "MAX_2D", "MAX_3D", "ATT", "GEO")
+
+
+class TSPLIBReader:
+    """Đọc file TSPLIB dạng nhị phân theo khối: header theo dòng, các section số theo khối lớn."""
+
+    def __init__(self, f):
+        self.f = f
+        self.buffer = b""
+        self.eof = False
+
+
+    def fill(self):
+        chunk = self.f.read(CHUNK_BYTES)
+        if not chunk:
+            self.eof = True
+            return False
+        self.buffer += chunk
+        return True
+
+
+    def readline(self):
+        while b"\n" not in self.buffer and self.fill():
+            pass
+        if not self.buffer:
+            return None
+
+        line, sep, rest = self.buffer.partition(b"\n")
+        self.buffer = rest
+        return line.decode("utf-8", errors="replace")
+
+
+    def read_numbers(self, count=None):
+        """
+        Đọc các số cho đến dòng từ khóa kế tiếp hoặc hết file.
+        Nếu biết trước `count` thì ghi thẳng vào mảng cấp phát sẵn.
+        """
+        parts = []
+        out = np.empty(count, dtype=np.float64) if count is not None else None
+        filled = 0
+
+        while True:
+            if not self.buffer and not self.fill():
+                break
+
+            stop = KEYWORD.search(self.buffer)
+            if stop is not None:
+                text, self.buffer = self.buffer[:stop.start()], self.buffer[stop.start():]
+            elif self.eof:
+                text, self.buffer = self.buffer, b""
+            else:
+                # Giữ lại token có thể bị cắt đôi ở cuối khối
+                cut = max(self.buffer.rfind(b" "), self.buffer.rfind(b"\n"), self.buffer.rfind(b"\t"))
+                if cut < 0:
+                    self.fill()
+                    continue
+                text, self.buffer = self.buffer[:cut + 1], self.buffer[cut + 1:]
+
+            if text.strip():
+                values = np.fromstring(text.decode(), dtype=np.float64, sep=" ")
+                if out is not None:
+                    take = min(len(values), count - filled)
+                    out[filled:filled + take] = values[:take]
+                    filled += take
+                else:
+                    parts.append(values)
+
+            if stop is not None or (out is not None and filled == count):
+                break
+            if not self.buffer and not self.fill():
+                break
+
+        if out is None:
+            return np.concatenate(parts) if parts else np.empty(0)
+        if filled < count:
+            raise ValueError(f"Thiếu dữ liệu: cần {count} số, chỉ đọc được {filled}")
+        return out
+
+
+def explicit_count(edge_weight_format, n):
+    """Số phần tử của EDGE_WEIGHT_SECTION theo định dạng"""
+    if edge_weight_format == "FULL_MATRIX":
+        return n * n
+    if "DIAG" in edge_weight_format:
+        return n * (n + 1) // 2
+    return n * (n - 1) // 2
+
+
+def explicit_matrix(weights, edge_weight_format, n):
+    """Dựng ma trận (n x n) từ EDGE_WEIGHT_SECTION"""
+    if edge_weight_format == "FULL_MATRIX":
+        return weights.reshape(n, n)
+
+    # Liệt kê theo cột của tam giác trên = liệt kê theo hàng của tam giác dưới (và ngược lại)
+    diag = 0 if "DIAG" in edge_weight_format else 1
+    if edge_weight_format.startswith("UPPER") == edge_weight_format.endswith("ROW"):
+        rows, cols = np.triu_indices(n, diag)
+    else:
+        rows, cols = np.tril_indices(n, -diag)
+
+    matrix = np.zeros((n, n))
+    matrix[rows, cols] = weights
+    matrix[cols, rows] = weights
+    return matrix
+
+
+def nint(x):
+    return np.floor(x + 0.5)
+
+
+def geo_radians(coords):
+    """Tọa độ GEO (độ.phút) -> radian theo định nghĩa của TSPLIB"""
+    deg = np.trunc(coords)
+    minutes = coords - deg
+    return 3.141592 * (deg + 5.0 * minutes / 3.0) / 180.0
+
+
+def coord_distances(a, b, edge_weight_type):
+    """Khoảng cách TSPLIB giữa mọi cặp (a[i], b[j]), kết quả (len(a) x len(b))"""
+    if edge_weight_type == "GEO":
+        a, b = geo_radians(a), geo_radians(b)
+        q1 = np.cos(a[:, None, 1] - b[None, :, 1])
+        q2 = np.cos(a[:, None, 0] - b[None, :, 0])
+        q3 = np.cos(a[:, None, 0] + b[None, :, 0])
+        cos = np.clip(0.5 * ((1.0 + q1) * q2 - (1.0 - q1) * q3), -1.0, 1.0)
+        return np.trunc(6378.388 * np.arccos(cos) + 1.0)
+
+    diff = np.abs(a[:, None, :] - b[None, :, :])
+
+    if edge_weight_type.startswith("MAN"):
+        return nint(diff.sum(axis=-1))
+    if edge_weight_type.startswith("MAX"):
+        return np.max(nint(diff), axis=-1)
+
+    squared = np.einsum("ijk,ijk->ij", diff, diff)
+    if edge_weight_type == "ATT":
+        r = np.sqrt(squared / 10.0)
+        t = nint(r)
+        return np.where(t < r, t + 1.0, t)
+
+    dist = np.sqrt(squared)
+    if edge_weight_type == "CEIL_2D":
+        return np.ceil(dist)
+    return nint(dist)
+
+
+def coord_matrix(coords, edge_weight_type):
+    """Ma trận khoảng cách (n x n) từ tọa độ, tính theo khối hàng để giới hạn bộ nhớ tạm"""
+    n, d = coords.shape
+    matrix = np.empty((n, n))
+    block = max(1, BLOCK_ELEMENTS // max(1, n * d))
+    for s in range(0, n, block):
+        matrix[s:s + block] = coord_distances(coords[s:s + block], coords, edge_weight_type)
+    np.fill_diagonal(matrix, 0.0)
+    return matrix
+
+
+def read_tsplib(path, dense=True) -> TSPInstance:
+    """
+    Đọc file TSPLIB `.tsp` / `.atsp` thành mảng NumPy.
+
+    Hỗ trợ EDGE_WEIGHT_TYPE: EXPLICIT (FULL_MATRIX, UPPER_ROW, LOWER_DIAG_ROW, ...)
+    và các kiểu tọa độ EUC_2D, EUC_3D, CEIL_2D, MAN_2D, MAN_3D, MAX_2D, MAX_3D, ATT, GEO
+    (làm tròn đúng như định nghĩa của TSPLIB).
+
+    Parameters
+    ----------
+    path : str
+        Đường dẫn tới file.
+    dense : bool
+        Dựng ma trận (n x n) cho các bài toán theo tọa độ. Với n rất lớn nên đặt False
+        và dùng `core.utils.CostProvider(instance["coords"])` thay cho ma trận.
+
+    Returns
+    -------
+    TSPInstance
+    """
+    header = {}
+    coords = None
+    weights = None
+
+    with open(path, "rb") as f:
+        reader = TSPLIBReader(f)
+        while (line := reader.readline()) is not None:
+            line = line.strip()
+            if not line:
+                continue
+            if line == "EOF":
+                break
+
+            key, sep, value = line.partition(":")
+            key = key.strip().upper()
+            if not key.endswith("SECTION"):
+                header[key] = value.strip()
+                continue
+
+            n = int(header["DIMENSION"])
+            if key == "NODE_COORD_SECTION":
+                threed = header.get("NODE_COORD_TYPE") == "THREED_COORDS" or header.get("EDGE_WEIGHT_TYPE", "").endswith("3D")
+                width = 4 if threed else 3
+                data = reader.read_numbers(n * width).reshape(n, width)
+                coords = data[np.argsort(data[:, 0], kind="stable"), 1:]
+            elif key == "EDGE_WEIGHT_SECTION":
+                fmt = header.get("EDGE_WEIGHT_FORMAT", "FULL_MATRIX")
+                weights = reader.read_numbers(explicit_count(fmt, n))
+            elif key == "DISPLAY_DATA_SECTION" and coords is None:
+                data = reader.read_numbers(n * 3).reshape(n, 3)
+                coords = data[np.argsort(data[:, 0], kind="stable"), 1:]
+            else:
+                # FIXED_EDGES_SECTION, TOUR_SECTION, ... không dùng
+                reader.read_numbers()
+
+    if "DIMENSION" not in header:
+        raise ValueError(f"File TSPLIB thiếu DIMENSION: {path}")
+
+    n = int(header["DIMENSION"])
+    edge_weight_type = header.get("EDGE_WEIGHT_TYPE", "EXPLICIT").upper()
+
+    matrix = None
+    if edge_weight_type == "EXPLICIT":
+        if weights is None:
+            raise ValueError(f"File TSPLIB thiếu EDGE_WEIGHT_SECTION: {path}")
+        matrix = explicit_matrix(weights, header.get("EDGE_WEIGHT_FORMAT", "FULL_MATRIX").upper(), n)
+    elif edge_weight_type in COORD_TYPES:
+        if coords is None:
+            raise ValueError(f"File TSPLIB thiếu NODE_COORD_SECTION: {path}")
+        if dense:
+            matrix = coord_matrix(coords, edge_weight_type)
+    else:
+        raise ValueError(f"EDGE_WEIGHT_TYPE chưa hỗ trợ: {edge_weight_type}")
+
+    return {
+        "name": header.get("NAME", os.path.splitext(os.path.basename(path))[0]),
+        "type": header.get("TYPE", "TSP").upper(),
+        "dimension": n,
+        "edge_weight_type": edge_weight_type,
+        "coords": coords,
+        "matrix": matrix
+    }
+
+
+def to_jsonable(value):
+    """Chuyển kiểu NumPy (số, mảng) và inf/nan sang kiểu JSON hợp lệ"""
+    if isinstance(value, dict):
+        return {k: to_jsonable(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [to_jsonable(v) for v in value]
+    if isinstance(value, np.ndarray):
+        return to_jsonable(value.tolist())
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, float) and not math.isfinite(value):
+        return None
+    return value
+
+
+class ResultWriter:
+    """
+    Ghi kết quả (OptimizationResult hoặc bản ghi bất kỳ) ra file JSON Lines,
+    mỗi bản ghi 1 dòng được ghi ngay để không mất kết quả khi chương trình dừng giữa chừng.
+
+    with ResultWriter("results.jsonl") as writer:
+        writer.write({"instance": "berlin52", "result": result})
+    """
+
+    def __init__(self, path, fsync=False):
+        self.path = path
+        self.fsync = fsync
+        self.file = open(path, "a", encoding="utf-8")
+
+
+    def write(self, record):
+        self.file.write(json.dumps(to_jsonable(record)) + "\n")
+        self.file.flush()
+        if self.fsync:
+            os.fsync(self.file.fileno())
+
+
+    def close(self):
+        self.file.close()
+
+
+    def __enter__(self):
+        return self
+
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def read_jsonl(path):
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def flatten(record, prefix=""):
+    """{"result": {"bestCost": 1}} -> {"result.bestCost": 1}"""
+    flat = {}
+    for key, value in record.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            flat.update(flatten(value, f"{name}."))
+        else:
+            flat[name] = value
+    return flat
+
+
+def write_columnar(path, records):
+    """
+    Ghi danh sách bản ghi ra file `.npz` dạng cột.
+
+    Mỗi trường (dict lồng nhau được làm phẳng thành "a.b") là 1 mảng dài len(records).
+    Trường dạng list (vd. bestCostHist) được lưu thành `<tên>.values` (nối liền) và
+    `<tên>.offsets` (len(records) + 1), đọc 1 cột không cần parse toàn bộ file.
+    """
+    rows = [flatten(to_jsonable(r)) for r in records]
+    names = sorted({name for row in rows for name in row})
+
+    columns = {}
+    for name in names:
+        values = [row.get(name) for row in rows]
+        if any(isinstance(v, list) for v in values):
+            lists = [np.asarray(v if v is not None else [], dtype=np.float64).ravel() for v in values]
+            columns[f"{name}.values"] = np.concatenate(lists) if lists else np.empty(0)
+            columns[f"{name}.offsets"] = np.concatenate([[0], np.cumsum([len(v) for v in lists])])
+        elif all(isinstance(v, (int, float)) and not isinstance(v, bool) or v is None for v in values):
+            columns[name] = np.array([np.nan if v is None else v for v in values], dtype=np.float64)
+        else:
+            columns[name] = np.array(["" if v is None else str(v) for v in values])
+
+    np.savez_compressed(path, **columns)
+
+
+def read_columnar(path, columns=None):
+    """
+    Đọc file của `write_columnar`. Cột dạng list được trả về là list các mảng.
+    `columns`: chỉ đọc các cột này (tên đã làm phẳng).
+    """
+    data = {}
+    with np.load(path) as npz:
+        keys = set(npz.files)
+        names = {k.rsplit(".", 1)[0] if k.endswith((".values", ".offsets")) else k for k in keys}
+        for name in sorted(names):
+            if columns is not None and name not in columns:
+                continue
+            if name in keys:
+                data[name] = npz[name]
+            else:
+                values, offsets = npz[f"{name}.values"], npz[f"{name}.offsets"]
+                data[name] = [values[offsets[i]:offsets[i + 1]] for i in range(len(offsets) - 1)]
+    return data
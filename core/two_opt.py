@@ -1,7 +1,58 @@
+import threading
+import weakref
 import numpy as np
+from bisect import bisect_left
 
+from core.utils import CostProvider, as_cost_matrix
+from core.candidates import candidate_lists, DEFAULT_CANDIDATES
 
-def two_opt_population(population: np.ndarray, cost_matrix: np.ndarray, max_iter: int = 10):
+
+# id(ma trận chi phí) -> (weakref tới ma trận, chỉ số cặp), giải phóng cùng ma trận.
+# RLock: finalizer có thể chạy (do GC) ngay trong thread đang giữ khóa
+pair_cache = {}
+pair_cache_lock = threading.RLock()
+
+
+def forget_pairs(key, ref):
+    with pair_cache_lock:
+        entry = pair_cache.get(key)
+        if entry is not None and entry[0] is ref:
+            del pair_cache[key]
+
+
+def pair_indices(cost_matrix):
+    """
+    Các cặp (i, j), i < j và (i - 1, j + 1) cho ma trận chi phí, chỉ số int32.
+    Chỉ tạo 1 lần cho mỗi ma trận và được giải phóng cùng ma trận (~2 n^2 int32).
+    """
+    n_cities = cost_matrix.shape[0]
+    key = id(cost_matrix)
+    with pair_cache_lock:
+        entry = pair_cache.get(key)
+        if entry is not None and entry[0]() is cost_matrix:
+            return entry[1]
+
+    i_idx, j_idx = np.triu_indices(n_cities, k=1)
+    i_idx, j_idx = i_idx.astype(np.int32), j_idx.astype(np.int32)
+    i_prev = (i_idx - 1) % n_cities
+    j_next = (j_idx + 1) % n_cities
+    pairs = (i_idx, j_idx, i_prev, j_next)
+    for arr in pairs:
+        arr.flags.writeable = False
+
+    try:
+        ref = weakref.ref(cost_matrix)
+    except TypeError:
+        # Ma trận không hỗ trợ weakref, không cache
+        return pairs
+
+    with pair_cache_lock:
+        pair_cache[key] = (ref, pairs)
+        weakref.finalize(cost_matrix, forget_pairs, key, ref)
+    return pairs
+
+
+def two_opt_population(population: np.ndarray, cost_matrix: np.ndarray, max_iter: int = 10, inplace: bool = False, n_neighbors: int = 0):
     """
     Áp dụng 2-opt vector hóa cho tất cả tour trong quần thể.
     
@@ -9,20 +60,34 @@ def two_opt_population(population: np.ndarray, cost_matrix: np.ndarray, max_iter
     ----------
     population : np.ndarray
         Mảng 2D (pop_size x n_cities) chứa các tour.
-    cost_matrix : np.ndarrayW
+    cost_matrix : np.ndarray | CostProvider
         Ma trận chi phí (n_cities x n_cities).
     max_iter : int
         Số vòng lặp tối đa để cải thiện tour.
+    inplace : bool
+        Sửa trực tiếp trên `population` thay vì tạo bản copy.
+    n_neighbors : int
+        > 0: chỉ xét cạnh mới tới `n_neighbors` ứng viên gần nhất (xem `TwoOpt`),
+        mỗi pass O(n * k) thay vì O(n^2). Với CostProvider luôn dùng danh sách láng giềng
+        (mặc định DEFAULT_CANDIDATES) để không tạo các mảng O(n^2).
     
     Returns
     -------
     np.ndarray
         Quần thể đã cải thiện bằng 2-opt.
     """
+    if n_neighbors <= 0 and isinstance(cost_matrix, CostProvider):
+        n_neighbors = DEFAULT_CANDIDATES
+    if n_neighbors > 0:
+        return TwoOpt(cost_matrix, n_neighbors).improve_population(population, max_iter, inplace)
+
     pop_size, n_cities = population.shape
     
     # Tạo bản copy quần thể để sửa
-    pop = population.copy()
+    pop = population if inplace else population.copy()
+
+    # Tất cả cặp i,j (i < j), dùng chung cho mọi tour
+    i_idx, j_idx, i_prev, j_next = pair_indices(cost_matrix)
     
     for tour_idx in range(pop_size):
         tour = pop[tour_idx]
@@ -33,13 +98,7 @@ def two_opt_population(population: np.ndarray, cost_matrix: np.ndarray, max_iter
             improved = False
             iter_count += 1
 
-            # Tạo tất cả cặp i,j (i < j)
-            i_idx, j_idx = np.triu_indices(n_cities, k=1)
-            
             # Tính chi phí 2-opt delta vectorized
-            i_prev = (i_idx - 1) % n_cities
-            j_next = (j_idx + 1) % n_cities
-            
             delta = (
                 cost_matrix[tour[i_prev], tour[j_idx]] +
                 cost_matrix[tour[i_idx], tour[j_next]] -
@@ -61,4 +120,119 @@ def two_opt_population(population: np.ndarray, cost_matrix: np.ndarray, max_iter
         # Lưu lại tour cải thiện
         pop[tour_idx] = tour
     
-    return pop
\ No newline at end of file
+    return pop
+
+
+def neighbor_lists(cost_matrix: np.ndarray, k: int):
+    """
+    Danh sách k láng giềng gần nhất của mỗi thành phố (theo hàng ma trận chi phí).
+    Dùng chung cache của `core.candidates.candidate_lists`.
+
+    Returns
+    -------
+    np.ndarray
+        Mảng 2D (n_cities x k), hàng i chứa k thành phố gần i nhất, tăng dần theo chi phí.
+    """
+    return candidate_lists(cost_matrix, k)
+
+
+class TwoOpt:
+    """
+    2-opt dùng danh sách láng giềng và don't-look bits.
+
+    Mỗi pass đánh giá delta O(1) cho mọi cặp (thành phố, láng giềng) còn hoạt động,
+    sau đó áp dụng nhiều bước cải thiện không chồng lấn nhau cùng lúc.
+    Danh sách láng giềng được tính 1 lần khi khởi tạo cho mỗi ma trận chi phí.
+    """
+
+    def __init__(self, cost_matrix: np.ndarray, n_neighbors: int = 8):
+        self.cost_matrix = as_cost_matrix(cost_matrix)
+        self.n_cities = self.cost_matrix.shape[0]
+        self.neighbors = neighbor_lists(self.cost_matrix, n_neighbors)
+        self.n_neighbors = self.neighbors.shape[1]
+
+        # Chỉ số thành phố gốc của từng cặp (thành phố, láng giềng)
+        self.cand_from = np.repeat(np.arange(self.n_cities), self.n_neighbors)
+        self.cand_to = self.neighbors.ravel()
+
+
+    def candidate_moves(self, tour, pos, active):
+        """
+        Sinh các bước 2-opt (e1, e2) với delta < 0, cạnh e = (tour[e], tour[e + 1]).
+        Bước (e1, e2) thay 2 cạnh e1, e2 bằng (tour[e1], tour[e2]), (tour[e1 + 1], tour[e2 + 1])
+        và đảo đoạn tour[e1 + 1 : e2 + 1].
+        """
+        n = self.n_cities
+        C = self.cost_matrix
+
+        sel = active[self.cand_from]
+        a = self.cand_from[sel]
+        c = self.cand_to[sel]
+
+        # Nối a với c qua cạnh sau (succ) hoặc cạnh trước (pred) của cả hai
+        e1 = np.concatenate([pos[a], (pos[a] - 1) % n])
+        e2 = np.concatenate([pos[c], (pos[c] - 1) % n])
+        lo = np.minimum(e1, e2)
+        hi = np.maximum(e1, e2)
+
+        t1, t2 = tour[lo], tour[(lo + 1) % n]
+        t3, t4 = tour[hi], tour[(hi + 1) % n]
+        delta = C[t1, t3] + C[t2, t4] - C[t1, t2] - C[t3, t4]
+
+        improving = (delta < -1e-10) & (hi - lo >= 2)
+        return lo[improving], hi[improving], delta[improving], np.concatenate([a, a])[improving]
+
+
+    def improve(self, tour: np.ndarray, max_iter: int = 10):
+        """Cải thiện 1 tour tại chỗ, tối đa `max_iter` pass."""
+        n = self.n_cities
+        if n < 4:
+            return tour
+
+        pos = np.empty(n, dtype=np.intp)
+        pos[tour] = np.arange(n)
+        active = np.ones(n, dtype=bool)
+
+        for _ in range(max_iter):
+            if not active.any():
+                break
+
+            lo, hi, delta, origin = self.candidate_moves(tour, pos, active)
+
+            # Thành phố không có bước cải thiện nào thì bật don't-look bit
+            found = np.zeros(n, dtype=bool)
+            found[origin] = True
+            active &= found
+            if len(delta) == 0:
+                break
+
+            # Chọn tham lam các bước không chồng lấn, ưu tiên delta nhỏ nhất.
+            # starts/stops giữ các đoạn [i, j + 1] đã chọn, sắp xếp tăng dần
+            order = np.argsort(delta, kind="stable")
+            starts, stops, chosen = [], [], []
+            for i, j in zip(lo[order].tolist(), hi[order].tolist()):
+                k = bisect_left(starts, i)
+                if k < len(starts) and starts[k] <= j + 1:
+                    continue
+                if k > 0 and stops[k - 1] >= i:
+                    continue
+                starts.insert(k, i)
+                stops.insert(k, j + 1)
+                chosen.append((i, j))
+
+            for i, j in chosen:
+                ends = tour[[i, i + 1, j, (j + 1) % n]]
+                tour[i + 1:j + 1] = tour[i + 1:j + 1][::-1]
+                pos[tour[i + 1:j + 1]] = np.arange(i + 1, j + 1)
+                # Các đầu mút của cạnh mới được kiểm tra lại
+                active[ends] = True
+
+        return tour
+
+
+    def improve_population(self, population: np.ndarray, max_iter: int = 10, inplace: bool = False):
+        """Giống `two_opt_population` nhưng dùng danh sách láng giềng."""
+        pop = population if inplace else population.copy()
+        for tour in pop:
+            self.improve(tour, max_iter)
+        return pop
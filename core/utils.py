@@ -1,17 +1,28 @@
 import time, math
-import tracemalloc
+import threading
 import numpy as np
+from collections import OrderedDict
 from typing import TypedDict, NotRequired
 
+from config.settings import BENCH_MODE
+from core.profiling import memory_sampler
+
 
 class OptimizationResult(TypedDict):
     avgCostHist: NotRequired[list[float]]
+    bestChain: NotRequired[int]
     bestCost: float
     bestCostHist: NotRequired[list[float]]
     bestRoute: list[int]
+    chainBestCostHist: NotRequired[list[list[float]]]
     costFuncCall: int
+    islandBestCostHist: NotRequired[list[list[float]]]
+    lowerBound: NotRequired[float]
     memory: float
+    optimal: NotRequired[bool]
+    phaseTimes: NotRequired[dict[str, float]]
     routeHist: NotRequired[list[int]]
+    stopReason: NotRequired[str]
     time: float
 
 
@@ -19,10 +30,152 @@ def euclid(a, b):
     return math.sqrt((a["x"] - b["x"])**2 + (a["y"] - b["y"])**2)
 
 
-def batch_cost_func(cost_matrix, routes):
+class CostProvider:
+    """
+    Chi phí tính theo yêu cầu từ tọa độ, thay cho ma trận dày (n x n) khi n rất lớn.
+
+    - Khoảng cách Euclid được tính lúc truy vấn, không lưu ma trận.
+    - Các luật bất đối xứng được lưu trong bảng thưa {(i, j): chi phí} (khóa i * n + j đã sắp xếp).
+    - Các hàng được truy vấn nhiều (`provider[i]`) được giữ trong cache LRU.
+
+    Hỗ trợ cách đánh chỉ số mà các solver dùng với ndarray:
+    `provider[a, b]` (a, b là số nguyên hoặc mảng chỉ số, broadcast như numpy) và `provider[i]`.
+    Bộ nhớ O(n + số luật + cache_rows * n) thay vì O(n^2).
+
+    Parameters
+    ----------
+    coords : array-like
+        Tọa độ các thành phố (n x d).
+    overrides : dict[tuple[int, int], float] | None
+        Chi phí thay thế cho cạnh (i, j), vd. khoảng cách + trọng số, hoặc inf nếu bị cấm.
+    cache_rows : int
+        Số hàng tối đa giữ trong cache LRU.
+    """
+
+    def __init__(self, coords, overrides=None, cache_rows=256):
+        self.coords = np.ascontiguousarray(coords, dtype=np.float64)
+        self.n_cities = len(self.coords)
+        self.shape = (self.n_cities, self.n_cities)
+        self.cache_rows = cache_rows
+        self.rows = OrderedDict()
+        self.rows_lock = threading.Lock()
+        self.set_overrides(overrides or {})
+
+
+    def set_overrides(self, overrides):
+        n = self.n_cities
+        keys = np.array([i * n + j for i, j in overrides], dtype=np.int64)
+        values = np.array(list(overrides.values()), dtype=np.float64)
+        order = np.argsort(keys)
+        self.override_keys = keys[order]
+        self.override_values = values[order]
+        with self.rows_lock:
+            self.rows.clear()
+
+
+    def __len__(self):
+        return self.n_cities
+
+
+    def pairs(self, a, b):
+        """Chi phí của các cạnh (a, b), a và b được broadcast với nhau"""
+        a, b = np.broadcast_arrays(np.asarray(a, dtype=np.intp), np.asarray(b, dtype=np.intp))
+
+        # Cộng dồn từng trục để không tạo mảng tạm (... x d)
+        cost = np.zeros(a.shape)
+        for axis in range(self.coords.shape[1]):
+            x = self.coords[:, axis]
+            diff = x[a] - x[b]
+            diff *= diff
+            cost += diff
+        np.sqrt(cost, out=cost)
+
+        if len(self.override_keys):
+            # atleast_1d: a, b vô hướng cho mảng 0 chiều, view 1 phần tử để gán theo mặt nạ
+            query = np.atleast_1d(a * self.n_cities + b)
+            at = np.minimum(np.searchsorted(self.override_keys, query), len(self.override_keys) - 1)
+            hit = self.override_keys[at] == query
+            np.atleast_1d(cost)[hit] = self.override_values[at[hit]]
+
+        # Chỉ số vô hướng trả về số vô hướng như ma trận dày
+        return cost if cost.ndim else cost[()]
+
+
+    def block(self, start, stop):
+        """Chi phí từ các thành phố start..stop-1 đến mọi thành phố (stop - start x n), không cache"""
+        cost = np.zeros((stop - start, self.n_cities))
+        for axis in range(self.coords.shape[1]):
+            x = self.coords[:, axis]
+            diff = np.subtract.outer(x[start:stop], x)
+            diff *= diff
+            cost += diff
+        np.sqrt(cost, out=cost)
+
+        # Các luật có hàng nằm trong khối
+        n = self.n_cities
+        lo, hi = np.searchsorted(self.override_keys, [start * n, stop * n])
+        keys = self.override_keys[lo:hi]
+        cost[keys // n - start, keys % n] = self.override_values[lo:hi]
+        return cost
+
+
+    def row(self, i):
+        """Chi phí từ thành phố i đến mọi thành phố, có cache LRU"""
+        i = int(i)
+        with self.rows_lock:
+            cached = self.rows.get(i)
+            if cached is not None:
+                self.rows.move_to_end(i)
+                return cached
+
+        cached = self.block(i, i + 1)[0]
+        cached.flags.writeable = False
+        with self.rows_lock:
+            self.rows[i] = cached
+            while len(self.rows) > self.cache_rows:
+                self.rows.popitem(last=False)
+        return cached
+
+
+    def __getitem__(self, key):
+        if isinstance(key, tuple):
+            if len(key) != 2:
+                raise IndexError("CostProvider chỉ hỗ trợ chỉ số [a, b] hoặc [i]")
+            return self.pairs(*key)
+        if np.ndim(key) == 0:
+            return self.row(key)
+        return np.stack([self.row(i) for i in np.asarray(key).ravel()]).reshape(np.shape(key) + (self.n_cities,))
+
+
+    def dense(self):
+        """Ma trận dày (n x n), chỉ nên dùng khi n nhỏ (vd. Held-Karp, ACO, SA)"""
+        return self.block(0, self.n_cities)
+
+
+    def __array__(self, dtype=None, copy=None):
+        matrix = self.dense()
+        return matrix if dtype is None else matrix.astype(dtype, copy=False)
+
+
+def as_cost_matrix(cost_matrix):
+    """Giữ nguyên CostProvider, các kiểu khác chuyển thành ndarray float64 (không copy nếu đã đúng kiểu)"""
+    if isinstance(cost_matrix, CostProvider):
+        return cost_matrix
+    return np.asarray(cost_matrix, dtype=np.float64)
+
+
+def batch_cost_func(cost_matrix, routes, out=None):
     idx1 = routes[:, :-1] # [[0, 1, 2], [0, 2, 3]]
     idx2 = routes[:, 1:]  # [[1, 2, 3], [2, 3, 4]]
 
+    if out is not None:
+        # Ghi thẳng vào buffer có sẵn (pop_size,), tính theo khối hàng để giới hạn bộ nhớ tạm
+        step = max(1, (1 << 15) // max(1, routes.shape[1]))
+        for s in range(0, len(routes), step):
+            np.sum(cost_matrix[idx1[s:s + step], idx2[s:s + step]], axis=1, out=out[s:s + step])
+        out += cost_matrix[routes[:, -1], routes[:, 0]]
+        return out
+
     costs = cost_matrix[idx1, idx2].sum(axis=1) \
         + cost_matrix[routes[:, -1], routes[:, 0]] # Chi phí điểm cuối và điểm đầu     
         
@@ -35,19 +188,42 @@ def cost_func(cost_matrix, route) -> float:
     return batch_cost_func(cost_matrix, routes)[0]
 
 
-def time_memory_bench(func, *params, **dict_params):    
-    tracemalloc.start()
-    start_time = time.perf_counter()
+# Chế độ đo mặc định của time_memory_bench (xem core.profiling.BENCH_MODES)
+default_bench_mode = BENCH_MODE
+
 
-    result = func(*params, **dict_params)
+def set_bench_mode(mode):
+    """Đổi chế độ đo mặc định cho mọi lần gọi time_memory_bench sau đó"""
+    global default_bench_mode
+    memory_sampler(mode)
+    default_bench_mode = mode
+
+
+def time_memory_bench(func, *params, bench_mode=None, **dict_params):
+    """
+    Chạy func(*params, **dict_params), đo thời gian và đỉnh bộ nhớ.
+
+    Returns
+    -------
+    dict
+        result: kết quả của func.
+        time: thời gian chạy (giây).
+        memory_diff: đỉnh bộ nhớ tăng thêm so với lúc bắt đầu (byte), 0 ở chế độ "time".
+        memory_total: đỉnh bộ nhớ tuyệt đối (RSS hoặc tracemalloc, byte).
+    """
+    sampler = memory_sampler(bench_mode or default_bench_mode)
+    sampler.start()
+    start_time = time.perf_counter()
 
-    current, peak = tracemalloc.get_traced_memory()
-    tracemalloc.stop()
-    end_time = time.perf_counter()
+    try:
+        result = func(*params, **dict_params)
+    finally:
+        end_time = time.perf_counter()
+        baseline, peak = sampler.stop()
 
     return {
         "result": result,
         "time": end_time - start_time,
-        "memory_diff": current,
+        "memory_diff": max(peak - baseline, 0),
         "memory_total": peak
     }
\ No newline at end of file
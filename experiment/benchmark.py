@@ -0,0 +1,292 @@
+import argparse
+import json
+import platform
+import sys
+import numpy as np
+
+from core.utils import CostProvider, set_bench_mode
+from core.tsp_io import ResultWriter, to_jsonable
+from experiment.sweep import run_job
+
+
+# Tham số cố định của từng solver trong bộ benchmark (keyword của hàm run)
+SUITE = {
+    "GA": {
+        "pop_size": 100, "crossover_rate": 0.9, "mutation_rate": 0.02, "elite_size": 2,
+        "tournament_size": 3, "two_opt_max": 0, "max_iter": 100, "verbose": False
+    },
+    "PSO": {
+        "n_particles": 50, "init_velocity": 0.5, "w": 0.7, "c1": 1.5, "c2": 1.5, "v_max": 0.05,
+        "max_iter": 100, "mode": "swap"
+    },
+    "BCO": {"n_bees": 50, "max_iter": 100},
+    "ACO": {"size_pop": 20, "max_iter": 20, "alpha": 1.0, "beta": 2.0, "rho": 0.1, "n_candidates": 16},
+    "SA": {"T_max": 100, "T_min": 1e-3, "L": 100, "n_candidates": 8},
+    "LK": {"max_iter": 100},
+    "Held_Karp": {},
+}
+
+# Số thành phố tối đa của solver (Held-Karp tốn O(2^n * n) bộ nhớ: n = 20 ~ 3 s, ~ 200 MB),
+# các kích thước <= mức này có gap so với lời giải chính xác
+MAX_CITIES = {"Held_Karp": 20}
+
+DEFAULT_SIZES = (10, 20, 50, 100, 200, 500, 1000, 2000, 5000)
+
+# Từ kích thước này trở lên dùng CostProvider thay cho ma trận dày
+PROVIDER_MIN_CITIES = 3000
+
+# Ngưỡng mặc định khi so với baseline: tỉ lệ tăng cho phép của thời gian / bộ nhớ,
+# mức tăng tuyệt đối cho phép của gap. "min_time": thay đổi time_per_iter / evals_per_sec chỉ
+# tính là hồi quy khi tổng thời gian chạy (tốt nhất) cũng tăng ít nhất chừng này giây,
+# vì các lần chạy ngắn (< vài ms mỗi vòng lặp) dao động hơn 25% giữa 2 lần đo liên tiếp.
+# Tỉ lệ 50% cho thời gian: trên máy dùng chung (CI) cả lần chạy vài giây cũng lệch ~30%
+DEFAULT_TOLERANCE = {"time_per_iter": 0.5, "evals_per_sec": 0.5, "memory": 0.5, "gap": 0.02, "min_time": 0.1}
+
+
+def generate_instance(n_cities, seed=0):
+    """Tọa độ ngẫu nhiên đều trong [0, 1000]^2, cùng (n_cities, seed) luôn cho cùng bài toán"""
+    return np.random.default_rng([seed, n_cities]).random((n_cities, 2)) * 1000
+
+
+def instance_matrix(coords):
+    provider = CostProvider(coords)
+    if len(coords) >= PROVIDER_MIN_CITIES:
+        return provider
+    return provider.dense()
+
+
+def run_solver(solver, matrix, seed, params=None):
+    """Chạy 1 solver với tham số của SUITE (ghi đè bằng `params`), trả về OptimizationResult"""
+    return run_job(solver, {**SUITE.get(solver, {}), **(params or {})}, seed, matrix)
+
+
+def metrics(result):
+    iterations = max(len(result.get("bestCostHist", [])), 1)
+    elapsed = max(result["time"], 1e-12)
+    return {
+        "cost": float(result["bestCost"]),
+        "time": result["time"],
+        "iterations": iterations,
+        "time_per_iter": result["time"] / iterations,
+        "evals_per_sec": result["costFuncCall"] / elapsed,
+        "memory": result["memory"]
+    }
+
+
+def run_suite(
+    sizes=DEFAULT_SIZES,
+    solvers=tuple(SUITE),
+    repeats=3,
+    seed=0,
+    best_known=None,
+    output_path=None,
+    bench_mode="rss",
+    params=None,
+    warmup=1,
+    verbose=True
+):
+    """
+    Chạy mọi solver trên các bài toán sinh ngẫu nhiên, mỗi cặp (solver, n) `repeats` lần với seed cố định.
+
+    Gap được tính so với chi phí tham chiếu của từng bài toán:
+    lời giải chính xác của Held-Karp (n <= MAX_CITIES["Held_Karp"]), `best_known[n]` nếu có,
+    ngược lại là chi phí tốt nhất mà mọi solver tìm được trong lần chạy này.
+
+    Parameters
+    ----------
+    sizes : list[int]
+        Các số thành phố.
+    solvers : list[str]
+        Tên solver trong SUITE.
+    repeats : int
+        Số lần chạy lặp lại, seed của lần thứ r là seed + r.
+    seed : int
+        Seed sinh bài toán và seed gốc của các lần chạy.
+    best_known : dict[int, float] | None
+        Chi phí tốt nhất đã biết theo số thành phố.
+    output_path : str | None
+        File JSONL ghi từng lần chạy ngay khi xong.
+    bench_mode : str
+        Chế độ đo của time_memory_bench ("time", "rss", "tracemalloc").
+    params : dict[str, dict] | None
+        Tham số ghi đè SUITE theo solver.
+    warmup : int
+        Số lần chạy bỏ kết quả trước khi đo mỗi cặp (solver, n): import, cache danh sách
+        ứng viên / chỉ số cặp của ma trận và cấp phát lần đầu không bị tính vào lần đo.
+
+    Returns
+    -------
+    dict
+        "runs": các bản ghi từng lần chạy, "summary": chỉ số tổng hợp theo "solver/n".
+    """
+    set_bench_mode(bench_mode)
+    best_known = best_known or {}
+    params = params or {}
+    writer = ResultWriter(output_path) if output_path is not None else None
+
+    runs = []
+    try:
+        for n in sizes:
+            matrix = instance_matrix(generate_instance(n, seed))
+            instance_runs = []
+
+            for solver in solvers:
+                if n > MAX_CITIES.get(solver, n):
+                    continue
+                for _ in range(warmup if solver != "Held_Karp" else 0):
+                    try:
+                        run_solver(solver, matrix, seed, params.get(solver))
+                    except Exception:
+                        # Lỗi được ghi lại ở các lần chạy đo bên dưới
+                        break
+
+                for r in range(repeats if solver != "Held_Karp" else 1):
+                    record = {"solver": solver, "n_cities": n, "seed": seed + r}
+                    try:
+                        record.update(metrics(run_solver(solver, matrix, seed + r, params.get(solver))))
+                    except Exception as e:
+                        record["error"] = repr(e)
+                    instance_runs.append(record)
+
+                    if verbose:
+                        status = record.get("error") or f"cost {record['cost']:.2f}, {record['time']:.3f} s"
+                        print(f"{solver:>10} | n = {n:5d} | seed {seed + r} | {status}", flush=True)
+
+            exact = [r["cost"] for r in instance_runs if r["solver"] == "Held_Karp" and "cost" in r]
+            found = [r["cost"] for r in instance_runs if "cost" in r]
+            if exact:
+                reference, kind = exact[0], "exact"
+            elif n in best_known:
+                reference, kind = best_known[n], "best_known"
+            else:
+                reference, kind = min(found, default=np.nan), "best_found"
+
+            for record in instance_runs:
+                record["reference"], record["reference_kind"] = reference, kind
+                if "cost" in record:
+                    record["gap"] = (record["cost"] - reference) / reference if reference > 0 else 0.0
+                if writer is not None:
+                    writer.write(record)
+            runs.extend(instance_runs)
+    finally:
+        if writer is not None:
+            writer.close()
+
+    return {"runs": runs, "summary": summarize(runs)}
+
+
+def summarize(runs):
+    """
+    Gộp các lần lặp: thời gian / tốc độ tốt nhất (nhiễu của máy chỉ làm chậm đi nên lần nhanh nhất
+    ổn định hơn trung vị), đỉnh bộ nhớ lớn nhất, gap trung bình và tốt nhất
+    """
+    groups = {}
+    for record in runs:
+        if "cost" in record:
+            groups.setdefault(f"{record['solver']}/{record['n_cities']}", []).append(record)
+
+    summary = {}
+    for key, records in groups.items():
+        summary[key] = {
+            "solver": records[0]["solver"],
+            "n_cities": records[0]["n_cities"],
+            "repeats": len(records),
+            "time": float(np.min([r["time"] for r in records])),
+            "time_per_iter": float(np.min([r["time_per_iter"] for r in records])),
+            "evals_per_sec": float(np.max([r["evals_per_sec"] for r in records])),
+            "memory": float(np.max([r["memory"] for r in records])),
+            "gap": float(np.mean([r["gap"] for r in records])),
+            "best_gap": float(np.min([r["gap"] for r in records])),
+            "reference_kind": records[0]["reference_kind"]
+        }
+    return summary
+
+
+def environment():
+    return {
+        "python": sys.version.split()[0],
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "machine": platform.machine()
+    }
+
+
+def save_baseline(path, summary, meta=None):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(to_jsonable({"environment": environment(), "meta": meta or {}, "summary": summary}), f, indent=2, sort_keys=True)
+
+
+def load_baseline(path):
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)["summary"]
+
+
+def compare(summary, baseline, tolerance=None):
+    """
+    So chỉ số hiện tại với baseline, trả về danh sách hồi quy.
+
+    Hồi quy khi: time_per_iter hoặc memory tăng quá tỉ lệ cho phép, evals_per_sec giảm quá
+    tỉ lệ cho phép, hoặc gap tăng quá mức tuyệt đối cho phép. Thay đổi về thời gian chỉ được
+    tính khi tổng thời gian chạy tăng ít nhất tol["min_time"] giây. Các cặp (solver, n) chỉ có
+    ở 1 bên được bỏ qua.
+    """
+    tol = {**DEFAULT_TOLERANCE, **(tolerance or {})}
+    regressions = []
+
+    def flag(key, metric, base, current):
+        regressions.append({"key": key, "metric": metric, "baseline": base, "current": current})
+
+    for key, current in summary.items():
+        base = baseline.get(key)
+        if base is None:
+            continue
+
+        # Baseline cũ không có "time": không áp ngưỡng tuyệt đối
+        slower = current.get("time", np.inf) - base.get("time", -np.inf) >= tol["min_time"]
+        if slower and current["time_per_iter"] > base["time_per_iter"] * (1 + tol["time_per_iter"]):
+            flag(key, "time_per_iter", base["time_per_iter"], current["time_per_iter"])
+        if slower and current["evals_per_sec"] < base["evals_per_sec"] / (1 + tol["evals_per_sec"]):
+            flag(key, "evals_per_sec", base["evals_per_sec"], current["evals_per_sec"])
+        # Đỉnh bộ nhớ nhỏ (< 1 MB) dao động nhiều theo lần lấy mẫu, không so
+        if current["memory"] > max(base["memory"], 1 << 20) * (1 + tol["memory"]):
+            flag(key, "memory", base["memory"], current["memory"])
+        if current["gap"] > base["gap"] + tol["gap"]:
+            flag(key, "gap", base["gap"], current["gap"])
+
+    return regressions
+
+
+def print_summary(summary):
+    print(f"{'solver':>10} {'n':>6} {'time/iter (ms)':>15} {'evals/s':>12} {'memory (MB)':>12} {'gap (%)':>9}")
+    for s in sorted(summary.values(), key=lambda s: (s["n_cities"], s["solver"])):
+        print(
+            f"{s['solver']:>10} {s['n_cities']:>6} {s['time_per_iter'] * 1e3:>15.3f} "
+            f"{s['evals_per_sec']:>12.0f} {s['memory'] / 2**20:>12.2f} {s['gap'] * 100:>9.2f}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark các solver TSP trên bài toán sinh ngẫu nhiên")
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(DEFAULT_SIZES))
+    parser.add_argument("--solvers", nargs="+", default=list(SUITE))
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--warmup", type=int, default=1, help="Số lần chạy khởi động (không đo) mỗi cặp solver / n")
+    parser.add_argument("--bench-mode", default="rss", choices=["time", "rss", "tracemalloc"])
+    parser.add_argument("--output", help="File JSONL ghi từng lần chạy")
+    parser.add_argument("--save-baseline", help="Ghi chỉ số tổng hợp ra file JSON này")
+    parser.add_argument("--compare", help="File baseline JSON cần so sánh")
+    parser.add_argument("--tolerance", type=json.loads, default=None, help='vd. \'{"time_per_iter": 0.5}\'')
+    args = parser.parse_args()
+
+    report = run_suite(args.sizes, args.solvers, args.repeats, args.seed, output_path=args.output, bench_mode=args.bench_mode, warmup=args.warmup)
+    print_summary(report["summary"])
+
+    if args.save_baseline:
+        save_baseline(args.save_baseline, report["summary"], {"sizes": args.sizes, "repeats": args.repeats, "seed": args.seed, "warmup": args.warmup})
+
+    if args.compare:
+        regressions = compare(report["summary"], load_baseline(args.compare), args.tolerance)
+        for r in regressions:
+            print(f"REGRESSION {r['key']} {r['metric']}: {r['baseline']:.6g} -> {r['current']:.6g}")
+        sys.exit(1 if regressions else 0)
@@ -1,21 +1,23 @@
 import numpy as np
 import matplotlib.pyplot as plt
 
-from core.GA import run as run_GA
+from experiment.sweep import sweep
 from sko.GA import GA_TSP
 from core.utils import time_memory_bench, cost_func
+from core.matrix_cache import distance_matrix
 from experiment.plot import plot_route, plot_convergence
 
 
-def euclidean_distance_matrix(coords):
-    n = len(coords)
-    dist_matrix = np.zeros((n, n))
-    for i in range(n):
-        for j in range(i+1, n):
-            dist = np.linalg.norm(coords[i] - coords[j])
-            dist_matrix[i, j] = dist
-            dist_matrix[j, i] = dist  # đối xứng
-    return dist_matrix
+def best_costs(records):
+    """bestCost của từng lần chạy theo thứ tự lưới, lần chạy lỗi là np.nan để các điểm không bị lệch"""
+    costs = []
+    for r in records:
+        if "error" in r:
+            print(f"Lỗi với {r['params']}: {r['error']}")
+            costs.append(np.nan)
+        else:
+            costs.append(r["result"]["bestCost"])
+    return costs
 
 
 if __name__ == "__main__":
@@ -43,23 +45,21 @@ if __name__ == "__main__":
         [60, 35]
     ])
 
-    dist_matrix = euclidean_distance_matrix(coords)
+    dist_matrix = distance_matrix(coords)
 
     N = 10
+    # Các tham số cố định của GA, mỗi giá trị là 1 danh sách 1 phần tử trong lưới
+    base = {"pop_size": [50], "elite_size": [1], "tournament_size": [3], "two_opt_max": [0], "max_iter": [100]}
 
     mutation_range = [0.01, 0.05]
-    mutation_converg = []
-    for i in range(N):
-        mutation_rate = mutation_range[0] + i * (mutation_range[1] - mutation_range[0]) / (N - 1)
-        ga = run_GA(dist_matrix, 50, 0.1, mutation_rate, 1, 3, 0, 100, None, False)
-        mutation_converg.append(ga["bestCost"])
+    mutation_values = [mutation_range[0] + i * (mutation_range[1] - mutation_range[0]) / (N - 1) for i in range(N)]
+    records = sweep(dist_matrix, "GA", {**base, "crossover_rate": [0.1], "mutation_rate": mutation_values}, [None])
+    mutation_converg = best_costs(records)
 
     crossover_range = [0.5, 0.9]
-    crossover_converg = []
-    for i in range(N):
-        crossover_rate = crossover_range[0] + i * (crossover_range[1] - crossover_range[0]) / (N - 1)
-        ga = run_GA(dist_matrix, 50, crossover_rate, 0.03, 1, 3, 0, 100, None, False)
-        crossover_converg.append(ga["bestCost"])
+    crossover_values = [crossover_range[0] + i * (crossover_range[1] - crossover_range[0]) / (N - 1) for i in range(N)]
+    records = sweep(dist_matrix, "GA", {**base, "crossover_rate": crossover_values, "mutation_rate": [0.03]}, [None])
+    crossover_converg = best_costs(records)
         
     # Nhãn
     labels = ["Mutation", "Crossover"]
@@ -0,0 +1,205 @@
+import hashlib
+import importlib
+import inspect
+import itertools
+import json
+import os
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import get_context, shared_memory
+
+
+# Tên ngắn -> module chứa hàm run(cost_matrix, ...) -> OptimizationResult
+SOLVERS = {
+    "GA": "core.GA",
+    "PSO": "core.PSO",
+    "ACO": "core.ACO",
+    "SA": "core.SA",
+    "BCO": "core.BCO",
+    "Held_Karp": "core.Held_Karp",
+    "Branch_Bound": "core.Branch_Bound",
+    "LK": "core.lin_kernighan",
+    "island_GA": "core.island_GA",
+}
+
+HISTORY_KEYS = ("avgCostHist", "bestCostHist", "routeHist", "islandBestCostHist", "chainBestCostHist")
+
+# Trạng thái của mỗi process worker, được gán 1 lần trong init_worker
+worker_state = {}
+
+
+def expand_grid(grid):
+    """{"a": [1, 2], "b": [3]} -> [{"a": 1, "b": 3}, {"a": 2, "b": 3}]"""
+    keys = list(grid)
+    return [dict(zip(keys, values)) for values in itertools.product(*(grid[k] for k in keys))]
+
+
+def job_id(solver, params, seed):
+    """Khóa ổn định của 1 lần chạy, dùng để bỏ qua các lần chạy đã có khi resume"""
+    key = json.dumps([solver, params, seed], sort_keys=True, default=str)
+    return hashlib.sha1(key.encode()).hexdigest()[:16]
+
+
+def repair_tail(path):
+    """Cắt dòng cuối bị ghi dở (process chết giữa chừng) để file JSONL luôn hợp lệ"""
+    with open(path, "rb+") as f:
+        data = f.read()
+        if data and not data.endswith(b"\n"):
+            f.truncate(data.rfind(b"\n") + 1)
+
+
+def load_results(path):
+    """Đọc toàn bộ kết quả đã ghi trong file JSONL"""
+    if not os.path.exists(path):
+        return []
+
+    records = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                records.append(json.loads(line))
+            except json.JSONDecodeError:
+                continue
+    return records
+
+
+def init_worker(shm_name, shape, matrix_path=None):
+    if matrix_path is not None:
+        # Ma trận đã nằm trong file .npy (vd. từ MatrixCache): các worker map cùng 1 file, dùng chung page cache
+        worker_state["matrix"] = np.load(matrix_path, mmap_mode="r")
+        return
+
+    # Ma trận chi phí chỉ được gửi 1 lần qua shared memory, các lần chạy dùng chung view chỉ đọc
+    shm = shared_memory.SharedMemory(name=shm_name)
+    matrix = np.ndarray(shape, dtype=np.float64, buffer=shm.buf)
+    matrix.flags.writeable = False
+    worker_state["shm"] = shm
+    worker_state["matrix"] = matrix
+
+
+def run_job(solver, params, seed, matrix):
+    func = importlib.import_module(SOLVERS.get(solver, solver)).run
+    kwargs = dict(params)
+
+    accepted = inspect.signature(func).parameters
+    if "seed" in accepted:
+        kwargs["seed"] = seed
+    if "verbose" in accepted:
+        kwargs.setdefault("verbose", False)
+
+    return func(matrix, **kwargs)
+
+
+def run_chunk(jobs, keep_history):
+    records = []
+    for jid, solver, params, seed in jobs:
+        record = {"id": jid, "solver": solver, "params": params, "seed": seed}
+        try:
+            result = dict(run_job(solver, params, seed, worker_state["matrix"]))
+            if not keep_history:
+                for key in HISTORY_KEYS:
+                    result.pop(key, None)
+            record["result"] = result
+        except Exception as e:
+            record["error"] = repr(e)
+        records.append(record)
+    return records
+
+
+def sweep(
+    cost_matrix,
+    solver,
+    grid,
+    seeds,
+    output_path=None,
+    max_workers=None,
+    chunk_size=None,
+    keep_history=True
+):
+    """
+    Chạy 1 solver trên mọi tổ hợp tham số của `grid` x `seeds` bằng process pool.
+
+    Parameters
+    ----------
+    cost_matrix : array-like
+        Ma trận chi phí (n x n), được đặt 1 lần vào shared memory cho mọi worker.
+        Nếu là memmap của 1 file .npy (vd. `core.matrix_cache.distance_matrix`) thì các worker
+        map trực tiếp file đó, không copy.
+    solver : str
+        Tên trong SOLVERS (vd. "GA") hoặc đường dẫn module có hàm `run`.
+    grid : dict[str, list]
+        Tham số keyword của `run` và danh sách giá trị cần thử.
+    seeds : list[int | None]
+        Các seed, chỉ truyền cho solver có tham số `seed`.
+    output_path : str | None
+        File JSONL, mỗi lần chạy xong ghi 1 dòng ngay. Nếu file đã có,
+        các lần chạy đã hoàn tất được bỏ qua (resume sau khi crash).
+    max_workers : int | None
+        Số process, mặc định bằng số CPU.
+    chunk_size : int | None
+        Số lần chạy trong 1 task gửi cho worker, mặc định chia ~4 chunk mỗi worker.
+    keep_history : bool
+        Giữ các lịch sử hội tụ (*Hist) trong kết quả.
+
+    Returns
+    -------
+    list[dict]
+        Các bản ghi mới chạy trong lần gọi này, theo thứ tự của lưới tham số.
+    """
+    matrix_path = None
+    if isinstance(cost_matrix, np.memmap) and cost_matrix.filename and cost_matrix.dtype == np.float64 \
+            and str(cost_matrix.filename).endswith(".npy"):
+        matrix_path = str(cost_matrix.filename)
+    cost_matrix = np.ascontiguousarray(cost_matrix, dtype=np.float64)
+    max_workers = max_workers or os.cpu_count() or 1
+
+    jobs = []
+    for params in expand_grid(grid):
+        for seed in seeds:
+            jobs.append((job_id(solver, params, seed), solver, params, seed))
+
+    done = set()
+    if output_path is not None and os.path.exists(output_path):
+        repair_tail(output_path)
+        done = {r["id"] for r in load_results(output_path) if "result" in r}
+    pending = [job for job in jobs if job[0] not in done]
+    if not pending:
+        return []
+
+    if chunk_size is None:
+        chunk_size = max(1, len(pending) // (max_workers * 4))
+    chunks = [pending[i:i + chunk_size] for i in range(0, len(pending), chunk_size)]
+
+    shm = None
+    if matrix_path is None:
+        shm = shared_memory.SharedMemory(create=True, size=max(1, cost_matrix.nbytes))
+    out = open(output_path, "a", encoding="utf-8") if output_path is not None else None
+    records = {}
+    try:
+        if shm is not None:
+            np.ndarray(cost_matrix.shape, dtype=np.float64, buffer=shm.buf)[:] = cost_matrix
+
+        with ProcessPoolExecutor(
+            max_workers=max_workers,
+            mp_context=get_context("spawn"),
+            initializer=init_worker,
+            initargs=(shm.name if shm is not None else None, cost_matrix.shape, matrix_path)
+        ) as pool:
+            futures = [pool.submit(run_chunk, chunk, keep_history) for chunk in chunks]
+
+            for future in as_completed(futures):
+                for record in future.result():
+                    records[record["id"]] = record
+                    if out is not None:
+                        out.write(json.dumps(record) + "\n")
+                if out is not None:
+                    out.flush()
+                    os.fsync(out.fileno())
+    finally:
+        if out is not None:
+            out.close()
+        if shm is not None:
+            shm.close()
+            shm.unlink()
+
+    return [records[jid] for jid, *_ in pending if jid in records]
@@ -4,20 +4,10 @@ import matplotlib.pyplot as plt
 from core.GA import run as run_GA
 from sko.GA import GA_TSP
 from core.utils import time_memory_bench, cost_func
+from core.matrix_cache import distance_matrix
 from experiment.plot import plot_route, plot_convergence
 
 
-def euclidean_distance_matrix(coords):
-    n = len(coords)
-    dist_matrix = np.zeros((n, n))
-    for i in range(n):
-        for j in range(i+1, n):
-            dist = np.linalg.norm(coords[i] - coords[j])
-            dist_matrix[i, j] = dist
-            dist_matrix[j, i] = dist  # đối xứng
-    return dist_matrix
-
-
 if __name__ == "__main__":
     # Đầu vào bài toán
     coords = np.array([
@@ -43,7 +33,7 @@ if __name__ == "__main__":
         [60, 35]
     ])
 
-    dist_matrix = euclidean_distance_matrix(coords)
+    dist_matrix = distance_matrix(coords)
     
     # Khởi tạo các thuật toán
     ga = run_GA(dist_matrix, 50, 0.1, 0.03, 1, 3, 0, 100, None)
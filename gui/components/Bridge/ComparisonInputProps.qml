@@ -9,13 +9,8 @@ QtObject {
     property int gaEliteSize: 1
     property int gaTournament: 3
 
-    property int psoSwarmSize: 50
-    property int psoIterations: 100
-    property real psoInitVelocity: 10
-    property real psoInertiaWeight: 0.8
-    property real psoCognitiveCoef: 0.05
-    property real psoSocialCoef: 0.05
-    property real psoVelocityClamping: 0.05
+    property int bcoBeeNumber: 50
+    property int bcoIterations: 100
 
     property int acoPopSize: 100
     property int acoIterations: 100
@@ -14,11 +14,6 @@ QtObject {
     property int gaTwoOptMaxIter: 5
     property bool gaTwoOptCheck
 
-    property int psoSwarmSize: 50
-    property int psoIterations: 100
-    property real psoInitVelocity: 10
-    property real psoInertiaWeight: 0.8
-    property real psoCognitiveCoef: 0.05
-    property real psoSocialCoef: 0.05
-    property real psoVelocityClamping: 0.05
+    property int bcoBeeNumber: 50
+    property int bcoIterations: 100
 }
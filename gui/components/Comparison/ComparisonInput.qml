@@ -129,22 +129,22 @@ ColumnLayout {
                     spacing: 20
 
                     ListModel {
-                        id: psoParams
+                        id: bcoParams
                     }
 
                     Component.onCompleted: {
-                        psoParams.append({
-                            "prop": "psoSwarmSize",
+                        bcoParams.append({
+                            "prop": "bcoBeeNumber",
                             "name": "Bees number",
-                            "value": ComparisonInputProps.psoSwarmSize,
+                            "value": ComparisonInputProps.bcoBeeNumber,
                             "from": 1,
                             "to": 1000,
                             "step": 1
                         });
-                        psoParams.append({
-                            "prop": "psoIterations",
+                        bcoParams.append({
+                            "prop": "bcoIterations",
                             "name": "Number of iterations",
-                            "value": ComparisonInputProps.psoIterations,
+                            "value": ComparisonInputProps.bcoIterations,
                             "from": 1,
                             "to": 100000,
                             "step": 1
@@ -152,7 +152,7 @@ ColumnLayout {
                     }
 
                     Repeater {
-                        model: psoParams
+                        model: bcoParams
                         delegate: ColumnLayout {
                             width: 130
                             spacing: 0
@@ -335,9 +335,9 @@ ColumnLayout {
                     return;
                 }
             }
-            for (let i = 0; i < psoParams.count; i++) {
-                if (psoParams.get(i).prop === prop) {
-                    psoParams.setProperty(i, "value", v);
+            for (let i = 0; i < bcoParams.count; i++) {
+                if (bcoParams.get(i).prop === prop) {
+                    bcoParams.setProperty(i, "value", v);
                     return;
                 }
             }
@@ -362,13 +362,8 @@ ColumnLayout {
         onGaEliteSizeChanged: onAnyUpdate("gaEliteSize", ComparisonInputProps.gaEliteSize)
         onGaTournamentChanged: onAnyUpdate("gaTournament", ComparisonInputProps.gaTournament)
 
-        onPsoSwarmSizeChanged: onAnyUpdate("psoSwarmSize", ComparisonInputProps.psoSwarmSize)
-        onPsoIterationsChanged: onAnyUpdate("psoIterations", ComparisonInputProps.psoIterations)
-        onPsoInitVelocityChanged: onAnyUpdate("psoInitVelocity", ComparisonInputProps.psoInitVelocity)
-        onPsoInertiaWeightChanged: onAnyUpdate("psoInertiaWeight", ComparisonInputProps.psoInertiaWeight)
-        onPsoCognitiveCoefChanged: onAnyUpdate("psoCognitiveCoef", ComparisonInputProps.psoCognitiveCoef)
-        onPsoSocialCoefChanged: onAnyUpdate("psoSocialCoef", ComparisonInputProps.psoSocialCoef)
-        onPsoVelocityClampingChanged: onAnyUpdate("psoVelocityClamping", ComparisonInputProps.psoVelocityClamping)
+        onBcoBeeNumberChanged: onAnyUpdate("bcoBeeNumber", ComparisonInputProps.bcoBeeNumber)
+        onBcoIterationsChanged: onAnyUpdate("bcoIterations", ComparisonInputProps.bcoIterations)
 
         onAcoPopSizeChanged: onAnyUpdate("acoPopSize", ComparisonInputProps.acoPopSize)
         onAcoIterationsChanged: onAnyUpdate("acoIterations", ComparisonInputProps.acoIterations)
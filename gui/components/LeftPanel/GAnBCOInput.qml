@@ -159,22 +159,22 @@ DropPanel {
             spacing: 40
 
             ListModel {
-                id: psoParams
+                id: bcoParams
             }
 
             Component.onCompleted: {
-                psoParams.append({
-                    "prop": "psoSwarmSize",
+                bcoParams.append({
+                    "prop": "bcoBeeNumber",
                     "name": "Bee number",
-                    "value": VariablesProps.psoSwarmSize,
+                    "value": VariablesProps.bcoBeeNumber,
                     "from": 1,
                     "to": 1000,
                     "step": 1
                 });
-                psoParams.append({
-                    "prop": "psoIterations",
+                bcoParams.append({
+                    "prop": "bcoIterations",
                     "name": "Number of iterations",
-                    "value": VariablesProps.psoIterations,
+                    "value": VariablesProps.bcoIterations,
                     "from": 1,
                     "to": 100000,
                     "step": 1
@@ -182,7 +182,7 @@ DropPanel {
             }
 
             Repeater {
-                model: psoParams
+                model: bcoParams
                 delegate: Column {
                     width: 100
 
@@ -213,9 +213,9 @@ DropPanel {
                         return;
                     }
                 }
-                for (let i = 0; i < psoParams.count; i++) {
-                    if (psoParams.get(i).prop === prop) {
-                        psoParams.setProperty(i, "value", v);
+                for (let i = 0; i < bcoParams.count; i++) {
+                    if (bcoParams.get(i).prop === prop) {
+                        bcoParams.setProperty(i, "value", v);
                         return;
                     }
                 }
@@ -233,13 +233,8 @@ DropPanel {
             onGaTwoOptMaxIterChanged: twoOptMaxIterSpin.value = VariablesProps.gaTwoOptMaxIter
             onGaTwoOptCheckChanged: twoOptCheck.checked = VariablesProps.gaTwoOptCheck
 
-            onPsoSwarmSizeChanged: onAnyUpdate("psoSwarmSize", VariablesProps.psoSwarmSize)
-            onPsoIterationsChanged: onAnyUpdate("psoIterations", VariablesProps.psoIterations)
-            onPsoInitVelocityChanged: onAnyUpdate("psoInitVelocity", VariablesProps.psoInitVelocity)
-            onPsoInertiaWeightChanged: onAnyUpdate("psoInertiaWeight", VariablesProps.psoInertiaWeight)
-            onPsoCognitiveCoefChanged: onAnyUpdate("psoCognitiveCoef", VariablesProps.psoCognitiveCoef)
-            onPsoSocialCoefChanged: onAnyUpdate("psoSocialCoef", VariablesProps.psoSocialCoef)
-            onPsoVelocityClampingChanged: onAnyUpdate("psoVelocityClamping", VariablesProps.psoVelocityClamping)
+            onBcoBeeNumberChanged: onAnyUpdate("bcoBeeNumber", VariablesProps.bcoBeeNumber)
+            onBcoIterationsChanged: onAnyUpdate("bcoIterations", VariablesProps.bcoIterations)
         }
     }
 }
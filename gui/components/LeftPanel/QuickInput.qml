@@ -48,7 +48,7 @@ ColumnLayout {
                 Layout.fillWidth: true
             }
 
-            GAnPSOInput {
+            GAnBCOInput {
                 Layout.fillWidth: true
             }
         }
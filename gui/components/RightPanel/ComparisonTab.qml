@@ -9,6 +9,48 @@ Column {
     id: root
     signal editClicked
 
+    // taskId -> chỉ số thuật toán (0: Genetic, 1: BCO, 2: ACO, 3: SA, 4: Held-Karp)
+    property var tasks: ({})
+    property var results: []
+    property var liveCostHists: [[], [], [], []]
+
+    function finishTask(taskId, result) {
+        if (!(taskId in tasks))
+            return;
+
+        results[tasks[taskId]] = result;
+
+        const remaining = Object.assign({}, tasks);
+        delete remaining[taskId];
+        tasks = remaining;
+
+        if (Object.keys(tasks).length === 0 && results.every(r => r))
+            showResults(results);
+    }
+
+    function showResults(results) {
+        const [ga, bco, aco, sa, heldKarp] = results;
+
+        const bestCosts = [ga.bestCost, bco.bestCost, aco.bestCost, sa.bestCost, heldKarp.bestCost];
+        const bestCostsFixed = bestCosts.map(v => v.toFixed(3));
+        const costFuncCalls = [ga.costFuncCall, bco.costFuncCall, aco.costFuncCall, sa.costFuncCall, heldKarp.costFuncCall];
+        const timeOfAlgos = [ga.time, bco.time, aco.time, sa.time, heldKarp.time].map(v => v.toFixed(4));
+        const memoryOfAlgos = [ga.memory, bco.memory, aco.memory, sa.memory, heldKarp.memory];
+
+        bestCostNFuncCallChart.values = [bestCostsFixed, costFuncCalls];
+        timeAndMemoryChart.values = [timeOfAlgos, memoryOfAlgos];
+        passAlgoList.bestRoutes = [ga.bestRoute, bco.bestRoute, aco.bestRoute, sa.bestRoute, heldKarp.bestRoute];
+        passAlgoList.col1 = bestCostsFixed;
+        passAlgoList.col2 = bestCosts.map(v => (Math.abs(v - heldKarp.bestCost) / heldKarp.bestCost).toFixed(2));
+
+        costConvergence.values = [ga.bestCostHist, bco.bestCostHist, aco.bestCostHist, sa.bestCostHist].map(arr => arr.map((c, i) => ({
+                        x: i,
+                        y: c
+                    }))       // chuyển thành object {x, y}
+            .filter(p => Number.isFinite(p.y))     // loại bỏ NaN/Infinity
+        );
+    }
+
     RowLayout {
         anchors.left: parent.left
         anchors.right: parent.right
@@ -226,43 +268,35 @@ Column {
                     Layout.preferredWidth: 4
 
                     RunButton {
+                        id: runButton
                         anchors.centerIn: parent
+                        currentState: Object.keys(root.tasks).length > 0
 
                         onRun: {
                             const cities = CitiesInputProps.cities;
                             if (cities.length < 3)
                                 return;
 
-                            const pMatrix = costMatrixBridge.buildPrototypeMatrix(cities, AsymmetricRulesInputProps.rules || []);
-                            let fMatrix = costMatrixBridge.buildFinalMatrix(pMatrix);
-                            fMatrix = fMatrix.map(r => r.map(c => Number.isFinite(c) ? c : 1e6));
-
-                            const algo = ["Genetic", "BCO", "ACO", "SA", "Held-Karp"];
-                            const ga = optimizationBridge.runGA(fMatrix, ComparisonInputProps.gaPopSize, ComparisonInputProps.gaCrossover, ComparisonInputProps.gaMutation, ComparisonInputProps.gaEliteSize, ComparisonInputProps.gaTournament, 5, ComparisonInputProps.gaGenerations, -1);
-                            const pso = optimizationBridge.runBCO(fMatrix, ComparisonInputProps.psoSwarmSize, ComparisonInputProps.psoInitVelocity, ComparisonInputProps.psoInertiaWeight, ComparisonInputProps.psoCognitiveCoef, ComparisonInputProps.psoSocialCoef, ComparisonInputProps.psoVelocityClamping, ComparisonInputProps.psoIterations, -1);
-                            const aco = optimizationBridge.runACO(fMatrix, ComparisonInputProps.acoPopSize, ComparisonInputProps.acoIterations, ComparisonInputProps.acoAlpha, ComparisonInputProps.acoBeta, ComparisonInputProps.acoRho);
-                            const sa = optimizationBridge.runSA(fMatrix, ComparisonInputProps.saTmax, ComparisonInputProps.saTmin, ComparisonInputProps.saL);
-                            const heldKarp = optimizationBridge.runHeldKarp(fMatrix);
-
-                            const bestCosts = [ga.bestCost, pso.bestCost, aco.bestCost, sa.bestCost, heldKarp.bestCost];
-                            const bestCostsFixed = bestCosts.map(v => v.toFixed(3));
-                            const costFuncCalls = [ga.costFuncCall, pso.costFuncCall, aco.costFuncCall, sa.costFuncCall, heldKarp.costFuncCall];
-                            const timeOfAlgos = [ga.time, pso.time, aco.time, sa.time, heldKarp.time].map(v => v.toFixed(4));
-                            const memoryOfAlgos = [ga.memory, pso.memory, aco.memory, sa.memory, heldKarp.memory];
-
-                            bestCostNFuncCallChart.values = [bestCostsFixed, costFuncCalls];
-                            timeAndMemoryChart.values = [timeOfAlgos, memoryOfAlgos];
-                            passAlgoList.bestRoutes = [ga.bestRoute, pso.bestRoute, aco.bestRoute, sa.bestRoute, heldKarp.bestRoute];
-                            passAlgoList.col1 = bestCostsFixed;
-                            passAlgoList.col2 = bestCosts.map(v => (Math.abs(v - heldKarp.bestCost) / heldKarp.bestCost).toFixed(2));
-
-                            console.log([ga.bestCostHist, pso.bestCostHist, aco.bestCostHist, sa.bestCostHist].map(r => r.filter(c => Number.isFinite(c))));
-                            costConvergence.values = [ga.bestCostHist, pso.bestCostHist, aco.bestCostHist, sa.bestCostHist].map(arr => arr.map((c, i) => ({
-                                            x: i,
-                                            y: c
-                                        }))       // chuyển thành object {x, y}
-                                .filter(p => Number.isFinite(p.y))     // loại bỏ NaN/Infinity
-                            );
+                            // Các cạnh bị cấm được thay bằng chi phí rất lớn để mọi thuật toán đều tìm được tour
+                            const matrixId = costMatrixBridge.createMatrix(cities, AsymmetricRulesInputProps.rules || [], 1e6);
+
+                            // Các thuật toán chạy đồng thời trên thread pool, kết quả về qua signal của optimizationBridge
+                            root.results = [null, null, null, null, null];
+                            root.liveCostHists = [[], [], [], []];
+                            costConvergence.values = root.liveCostHists;
+
+                            const tasks = {};
+                            tasks[optimizationBridge.startGA(matrixId, ComparisonInputProps.gaPopSize, ComparisonInputProps.gaCrossover, ComparisonInputProps.gaMutation, ComparisonInputProps.gaEliteSize, ComparisonInputProps.gaTournament, 5, ComparisonInputProps.gaGenerations, -1)] = 0;
+                            tasks[optimizationBridge.startBCO(matrixId, ComparisonInputProps.bcoBeeNumber, ComparisonInputProps.bcoIterations, -1)] = 1;
+                            tasks[optimizationBridge.startACO(matrixId, ComparisonInputProps.acoPopSize, ComparisonInputProps.acoIterations, ComparisonInputProps.acoAlpha, ComparisonInputProps.acoBeta, ComparisonInputProps.acoRho)] = 2;
+                            tasks[optimizationBridge.startSA(matrixId, ComparisonInputProps.saTmax, ComparisonInputProps.saTmin, ComparisonInputProps.saL)] = 3;
+                            tasks[optimizationBridge.startHeldKarp(matrixId)] = 4;
+                            root.tasks = tasks;
+                            costMatrixBridge.releaseMatrix(matrixId);
+                        }
+
+                        onStop: {
+                            Object.keys(root.tasks).forEach(taskId => optimizationBridge.cancel(taskId));
                         }
                     }
                 }
@@ -349,6 +383,31 @@ Column {
 
     Connections {
         target: optimizationBridge
+
+        // Đường hội tụ được vẽ dần trong khi các thuật toán đang chạy
+        function onProgress(taskId, iteration, bestCost, bestRoute) {
+            if (!(taskId in root.tasks) || root.tasks[taskId] > 3 || !Number.isFinite(bestCost))
+                return;
+
+            root.liveCostHists[root.tasks[taskId]].push({
+                x: iteration - 1,
+                y: bestCost
+            });
+            costConvergence.values = root.liveCostHists;
+        }
+
+        function onFinished(taskId, result) {
+            root.finishTask(taskId, result);
+        }
+
+        function onFailed(taskId, message) {
+            console.log(message);
+            root.finishTask(taskId, null);
+        }
+
+        function onCancelled(taskId) {
+            root.finishTask(taskId, null);
+        }
     }
 
     Connections {
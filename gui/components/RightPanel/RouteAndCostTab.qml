@@ -9,6 +9,9 @@ Column {
 
     property bool medium: width < 900
     property var costChartValues: [[], []]
+    // Task đang chạy trên optimizationBridge, rỗng khi không chạy
+    property string taskId: ""
+    property var liveBestCosts: []
 
     signal editClicked
 
@@ -107,18 +110,55 @@ Column {
             radius: 8
 
             RunAlgoPanel {
+                id: runAlgoPanel
                 anchors.fill: parent
                 anchors.margins: 20
+                running: root.taskId !== ""
+
+                function showRoute(route) {
+                    routeMap.setRoute(route);
+
+                    if (showDirectionBtn.value)
+                        routeMap.direction.show();
+                    else
+                        routeMap.direction.off();
+                }
+
+                function showResult(result) {
+                    const finiteAvgCosts = result.avgCostHist.filter(v => Number.isFinite(v));
+                    const maxAvgCost = Math.max(...finiteAvgCosts);
+
+                    const finiteBestCosts = result.bestCostHist.filter(v => Number.isFinite(v));
+                    const maxBestCost = Math.max(...finiteAvgCosts);
+
+                    const avgCost = result.avgCostHist.map((c, i) => ({
+                                x: i,
+                                y: c === Infinity ? Math.max(maxBestCost, maxAvgCost) : c
+                            }));
+                    const bestCost = result.bestCostHist.map((c, i) => ({
+                                x: i,
+                                y: c === Infinity ? Math.max(maxBestCost, maxAvgCost) : c
+                            }));
+
+                    root.costChartValues = [avgCost, bestCost];
+                    showRoute(result.bestRoute);
+
+                    runAlgoPanel.bestCosts = result.bestCostHist;
+                    runAlgoPanel.time = result.time;
+                    runAlgoPanel.memory = result.memory;
+                }
 
                 onRun: {
                     const cities = CitiesInputProps.cities;
                     if (cities.length < 3)
                         return;
 
-                    const pMatrix = costMatrixBridge.buildPrototypeMatrix(cities, AsymmetricRulesInputProps.rules || []);
-                    const fMatrix = costMatrixBridge.buildFinalMatrix(pMatrix);
+                    // Ma trận chỉ nằm ở phía Python, QML giữ id; task đang chạy vẫn giữ ma trận sau khi release
+                    const matrixId = costMatrixBridge.createMatrix(cities, AsymmetricRulesInputProps.rules || [], Infinity);
+
+                    root.liveBestCosts = [];
+                    root.costChartValues = [[], []];
 
-                    let result;
                     if (VariablesProps.algoIndex === 0) {
                         const popSize = VariablesProps.gaPopSize;
                         const crossover = VariablesProps.gaCrossover;
@@ -129,50 +169,22 @@ Column {
                         const generations = VariablesProps.gaGenerations;
                         const seed = useSeed ? this.seed : -1;
 
-                        result = optimizationBridge.runGA(fMatrix, popSize, crossover, mutation, eliteSize, tournament, twoOptMaxIter, generations, seed);
+                        root.taskId = optimizationBridge.startGA(matrixId, popSize, crossover, mutation, eliteSize, tournament, twoOptMaxIter, generations, seed);
                         title.text = "Genetic's Optimization";
                     } else if (VariablesProps.algoIndex === 1) {
-                        const swarmSize = VariablesProps.psoSwarmSize;
-                        const initV = VariablesProps.psoInitVelocity;
-                        const inertiaW = VariablesProps.psoInertiaWeight;
-                        const cognitiveCoef = VariablesProps.psoCognitiveCoef;
-                        const socialCoef = VariablesProps.psoSocialCoef;
-                        const velocityClamp = VariablesProps.psoVelocityClamping;
-                        const iters = VariablesProps.psoIterations;
+                        const beeNumber = VariablesProps.bcoBeeNumber;
+                        const iters = VariablesProps.bcoIterations;
                         const seed = useSeed ? this.seed : -1;
 
-                        result = optimizationBridge.runBCO(fMatrix, swarmSize, initV, inertiaW, cognitiveCoef, socialCoef, velocityClamp, iters, seed);
+                        root.taskId = optimizationBridge.startBCO(matrixId, beeNumber, iters, seed);
                         title.text = "BCO's Optimization";
                     }
 
-                    const finiteAvgCosts = result.avgCostHist.filter(v => Number.isFinite(v));
-                    const maxAvgCost = Math.max(...finiteAvgCosts);
-
-                    const finiteBestCosts = result.bestCostHist.filter(v => Number.isFinite(v));
-                    const maxBestCost = Math.max(...finiteAvgCosts);
-
-                    const avgCost = result.avgCostHist.map((c, i) => ({
-                                x: i,
-                                y: c === Infinity ? Math.max(maxBestCost, maxAvgCost) : c
-                            }));
-                    const bestCost = result.bestCostHist.map((c, i) => ({
-                                x: i,
-                                y: c === Infinity ? Math.max(maxBestCost, maxAvgCost) : c
-                            }));
-
-                    root.costChartValues = [avgCost, bestCost];
-                    routeMap.setRoute(result.bestRoute);
-
-                    if (showDirectionBtn.value)
-                        routeMap.direction.show();
-                    else
-                        routeMap.direction.off();
-
-                    this.bestCosts = result.bestCostHist;
-                    this.time = result.time;
-                    this.memory = result.memory;
+                    costMatrixBridge.releaseMatrix(matrixId);
                 }
 
+                onStop: optimizationBridge.cancel(root.taskId)
+
                 onClear: {
                     routeMap.chart.lineSeries.clear();
                     root.costChartValues = [[], []];
@@ -183,6 +195,40 @@ Column {
 
     Connections {
         target: optimizationBridge
+
+        // Cập nhật trực tiếp biểu đồ và bản đồ trong khi solver đang chạy
+        function onProgress(taskId, iteration, bestCost, bestRoute) {
+            if (taskId !== root.taskId)
+                return;
+
+            root.liveBestCosts.push({
+                x: iteration - 1,
+                y: bestCost
+            });
+            root.costChartValues = [[], root.liveBestCosts.filter(p => Number.isFinite(p.y))];
+            runAlgoPanel.showRoute(bestRoute);
+        }
+
+        function onFinished(taskId, result) {
+            if (taskId !== root.taskId)
+                return;
+
+            root.taskId = "";
+            runAlgoPanel.showResult(result);
+        }
+
+        function onFailed(taskId, message) {
+            if (taskId !== root.taskId)
+                return;
+
+            root.taskId = "";
+            console.log(message);
+        }
+
+        function onCancelled(taskId) {
+            if (taskId === root.taskId)
+                root.taskId = "";
+        }
     }
 
     Connections {
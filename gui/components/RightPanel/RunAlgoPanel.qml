@@ -16,8 +16,10 @@ GridLayout {
     property real time
     property real memory
     property int sliderValue: Math.round(slider.value)
+    property bool running: false
 
     signal run
+    signal stop
     signal clear
 
     Item {
@@ -34,13 +36,13 @@ GridLayout {
             anchors.centerIn: parent
 
             Label {
-                text: "Solve"
+                text: root.running ? "Stop" : "Solve"
                 color: "white"
                 font.bold: true
                 anchors.centerIn: parent
             }
 
-            onClicked: root.run()
+            onClicked: root.running ? root.stop() : root.run()
         }
     }
 
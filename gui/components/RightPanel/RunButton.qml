@@ -15,14 +15,10 @@ MaterialButton {
     signal stop
 
     onClicked: {
-        run();
-
-        // currentState = !currentState;
-        // if (currentState) {
-        //     run();
-        // } else {
-        //     stop();
-        // }
+        if (currentState)
+            stop();
+        else
+            run();
     }
 
     RowLayout {
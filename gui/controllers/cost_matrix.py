@@ -1,77 +1,213 @@
 from PySide6.QtCore import QObject, Slot
+import itertools
+import threading
 import numpy as np
 import math
 
-from core.utils import euclid
+from core.matrix_cache import MatrixCache, instance_key
+
+
+# Mỗi ô của ma trận nguyên mẫu:
+# - dist: khoảng cách Euclid
+# - weight: trọng số cộng thêm theo luật (0 nếu ô không có luật)
+# - forbidden: cạnh bị cấm theo luật (chi phí vô hạn)
+# - ruled: ô bị ràng buộc bởi 1 luật
+PROTOTYPE_DTYPE = np.dtype([
+    ("dist", np.float64),
+    ("weight", np.float64),
+    ("forbidden", np.bool_),
+    ("ruled", np.bool_),
+])
 
 
 def distance_matrix_np(points):
-    points = np.array(points)
-    diff = points[:, np.newaxis, :] - points[np.newaxis, :, :]
-    dist = np.sqrt(np.sum(diff ** 2, axis=-1))
-    return dist
+    points = np.asarray(points, dtype=np.float64)
+    # Cộng dồn từng trục tại chỗ, tránh mảng tạm (n x n x d)
+    dist = np.zeros((len(points), len(points)))
+    for axis in range(points.shape[1]):
+        diff = np.subtract.outer(points[:, axis], points[:, axis])
+        diff *= diff
+        dist += diff
+    return np.sqrt(dist, out=dist)
 
 
-class CostMatrixBridge(QObject):
+def prototype_matrix(cities, rules):
+    """
+    Dựng ma trận nguyên mẫu (n x n) dạng structured array `PROTOTYPE_DTYPE`.
+
+    Khoảng cách được tính 1 lần bằng broadcast, các luật được ghi bằng scatter
+    vào các cột weight / forbidden. Luật tham chiếu thành phố theo `order`;
+    nếu nhiều luật cùng 1 cặp thành phố (bất kể chiều) thì luật sau cùng được dùng.
+
+    directionType:
+    - 0: chỉ cho phép từ start -> end
+    - 1: chỉ cho phép từ end -> start
+    - 2: cho phép cả 2 hướng
+    - 3: cấm cả 2 hướng
+
+    Parameters
+    ----------
+    cities : list[dict]
+        Danh sách thành phố {"x", "y", "order"}.
+    rules : list[dict]
+        Danh sách luật {"start", "end", "directionType", "forwardWeight", "backwardWeight"}.
+
+    Returns
+    -------
+    np.ndarray
+        Structured array (n x n).
+    """
+    n = len(cities)
+    proto = np.zeros((n, n), dtype=PROTOTYPE_DTYPE)
+    if n == 0:
+        return proto
+
+    points = np.array([(c["x"], c["y"]) for c in cities], dtype=np.float64)
+    proto["dist"] = distance_matrix_np(points)
+    np.fill_diagonal(proto["dist"], 0.0)
+
+    if not rules:
+        return proto
+
+    # order -> chỉ số hàng/cột
+    orders = np.array([c["order"] for c in cities])
+    sorter = np.argsort(orders, kind="stable")
+
+    def index_of(values):
+        at = np.clip(np.searchsorted(orders, values, sorter=sorter), 0, n - 1)
+        idx = sorter[at]
+        return idx, orders[idx] == values
+
+    start = np.array([r["start"] for r in rules])
+    end = np.array([r["end"] for r in rules])
+    direction = np.array([r["directionType"] for r in rules])
+    forward = np.array([r["forwardWeight"] for r in rules], dtype=np.float64)
+    backward = np.array([r["backwardWeight"] for r in rules], dtype=np.float64)
+
+    s_idx, s_ok = index_of(start)
+    e_idx, e_ok = index_of(end)
+
+    # Mỗi luật ghi 2 ô: (start, end) dùng backwardWeight, (end, start) dùng forwardWeight
+    rows = np.stack([s_idx, e_idx], axis=1).ravel()
+    cols = np.stack([e_idx, s_idx], axis=1).ravel()
+    weight = np.stack([backward, forward], axis=1).ravel()
+    allowed = np.stack([np.isin(direction, (0, 2)), np.isin(direction, (1, 2))], axis=1).ravel()
+    valid = np.repeat(s_ok & e_ok, 2) & (rows != cols)
+
+    rows, cols, weight, allowed = rows[valid], cols[valid], weight[valid], allowed[valid]
+
+    # Giữ luật sau cùng cho mỗi ô
+    keys = rows * n + cols
+    _, last = np.unique(keys[::-1], return_index=True)
+    last = len(keys) - 1 - last
+    rows, cols = rows[last], cols[last]
+
+    proto["weight"][rows, cols] = weight[last]
+    proto["forbidden"][rows, cols] = ~allowed[last]
+    proto["ruled"][rows, cols] = True
+
+    return proto
+
+
+def prototype_to_list(proto):
+    """Ma trận nguyên mẫu dạng list cho QML: số với ô thường, {"dist", "weight"} với ô có luật"""
+    matrix = proto["dist"].tolist()
+
+    weight = np.where(proto["forbidden"], math.inf, proto["weight"])
+    for i, j in zip(*np.nonzero(proto["ruled"])):
+        matrix[i][j] = {"dist": float(proto["dist"][i, j]), "weight": float(weight[i, j])}
+
+    return matrix
+
+
+class CostMatrixHandle:
+    """
+    Ma trận chi phí giữ ở phía Python dưới dạng 1 mảng float64 liên tục, chỉ đọc.
+    QML chỉ giữ `id` (chuỗi), các solver nhận trực tiếp handle:
+    `np.asarray(handle, dtype=np.float64)` trả về chính mảng, không copy.
+    """
+
+    def __init__(self, handle_id, matrix):
+        self.id = handle_id
+        self.matrix = np.ascontiguousarray(matrix, dtype=np.float64)
+        self.matrix.flags.writeable = False
+
+
+    def __array__(self, dtype=None, copy=None):
+        if copy:
+            return np.array(self.matrix, dtype=dtype)
+        if dtype is None or np.dtype(dtype) == self.matrix.dtype:
+            return self.matrix
+        return self.matrix.astype(dtype)
 
-    @Slot(list, list, result=list)
-    def buildPrototypeMatrix(self, cities, rules):
-        n = len(cities)
-
-        # rules_map[(start, end)] = rule
-        rules_map = {}
-        for r in rules:
-            s, e = r["start"], r["end"]
-            rules_map[(s, e)] = r
-            rules_map[(e, s)] = r  # Cùng rule nhưng hướng khác
-
-        # Ma trận rỗng
-        matrix = [[None]*n for _ in range(n)]
-
-        for i, ci in enumerate(cities):
-            for j, cj in enumerate(cities):
-                if i == j:
-                    matrix[i][j] = 0.0
-                    continue
-
-                dist = euclid(ci, cj)
-                oi, oj = ci["order"], cj["order"]
-
-                rule = rules_map.get((oi, oj))
-
-                # Ô không bị ràng buộc bởi luật, bỏ qua
-                if rule is None:
-                    matrix[i][j] = dist
-                    continue
-
-                direction = rule["directionType"]
-                # directionType:
-                # 0: chỉ cho phép từ start -> end
-                # 1: chỉ cho phép từ end -> start
-                # 2: cho phép cả 2 hướng
-                # 3: cấm cả 2 hướng
-
-                if direction == 3:
-                    matrix[i][j] = {"dist": dist, "weight": math.inf}
-                    continue
-
-                going_start_to_end = (oi == rule["start"] and oj == rule["end"])
-                going_end_to_start = not going_start_to_end
-
-                # Chọn weight theo hướng
-                if going_start_to_end:
-                    weight = rule["backwardWeight"]  # start -> end
-                    allowed = direction in (0, 2)
-                else:
-                    weight = rule["forwardWeight"]   # end -> start
-                    allowed = direction in (1, 2)
 
-                if not allowed:
-                    weight = math.inf
+    def __len__(self):
+        return len(self.matrix)
 
-                matrix[i][j] = {"dist": dist, "weight": weight}
 
-        return matrix
+    @property
+    def shape(self):
+        return self.matrix.shape
+
+
+# id -> CostMatrixHandle, dùng chung giữa các bridge (vd. RunAlgorithmsBridge lấy ma trận theo id)
+matrix_store = {}
+matrix_store_lock = threading.Lock()
+matrix_counter = itertools.count(1)
+
+
+def register_matrix(matrix):
+    handle = CostMatrixHandle(f"matrix-{next(matrix_counter)}", matrix)
+    with matrix_store_lock:
+        matrix_store[handle.id] = handle
+    return handle
+
+
+def get_matrix(handle_id):
+    with matrix_store_lock:
+        handle = matrix_store.get(handle_id)
+    if handle is None:
+        raise KeyError(f"Không tìm thấy ma trận: {handle_id}")
+    return handle
+
+
+def release_matrix(handle_id):
+    with matrix_store_lock:
+        matrix_store.pop(handle_id, None)
+
+
+def final_matrix(prototype):
+    """
+    Chuyển ma trận nguyên mẫu thành mảng float64 (n x n).
+    Nhận structured array của `prototype_matrix` hoặc list (số hoặc {"dist", "weight"}).
+    """
+    if isinstance(prototype, np.ndarray) and prototype.dtype == PROTOTYPE_DTYPE:
+        return np.where(prototype["forbidden"], math.inf, prototype["dist"] + prototype["weight"])
+
+    n = len(prototype)
+    matrix = np.empty((n, n), dtype=np.float64)
+
+    for i, row in enumerate(prototype):
+        for j, cell in enumerate(row):
+            if isinstance(cell, (int, float)):
+                matrix[i, j] = cell
+            elif isinstance(cell, dict):
+                matrix[i, j] = cell.get("dist", 0) + cell.get("weight", 0)
+            else:
+                raise ValueError("Kiểu dữ liệu không hợp lệ")
+
+    return matrix
+
+
+class CostMatrixBridge(QObject):
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.cache = MatrixCache()
+
+    @Slot(list, list, result=list)
+    def buildPrototypeMatrix(self, cities, rules):
+        return prototype_to_list(prototype_matrix(cities, rules))
     
 
     @Slot(list, result=list)
@@ -94,4 +230,45 @@ class CostMatrixBridge(QObject):
 
             normalized.append(new_row)
 
-        return normalized
\ No newline at end of file
+        return normalized
+
+
+    @Slot(list, list, float, result=str)
+    def createMatrix(self, cities, rules, inf_value):
+        """
+        Dựng ma trận chi phí cuối cùng và giữ nó ở phía Python.
+
+        Parameters
+        ----------
+        cities : list[dict]
+            Danh sách thành phố {"x", "y", "order"}.
+        rules : list[dict]
+            Các luật bất đối xứng.
+        inf_value : float
+            Giá trị thay cho các ô vô hạn (cạnh bị cấm), truyền Infinity để giữ nguyên.
+
+        Returns
+        -------
+        str
+            Id của ma trận, dùng cho các slot start* của optimizationBridge.
+        """
+        def build():
+            matrix = final_matrix(prototype_matrix(cities, rules))
+            if math.isfinite(inf_value):
+                matrix[~np.isfinite(matrix)] = inf_value
+            return matrix
+
+        # Cùng thành phố + luật thì đọc lại ma trận đã lưu (memmap) thay vì dựng lại
+        coords = [(c["x"], c["y"]) for c in cities]
+        key = instance_key(coords, rules, orders=[c["order"] for c in cities], inf_value=inf_value)
+        return register_matrix(self.cache.get_or_build(key, build)).id
+
+
+    @Slot(str, result=int)
+    def matrixSize(self, handle_id):
+        return len(get_matrix(handle_id))
+
+
+    @Slot(str)
+    def releaseMatrix(self, handle_id):
+        release_matrix(handle_id)
@@ -1,31 +1,156 @@
-from PySide6.QtCore import QObject, Slot
+from PySide6.QtCore import QObject, QRunnable, QThreadPool, Signal, Slot
+import inspect
+import itertools
+import threading
+import time
 
 from core.GA import run as run_GA
-from core.PSO import run as run_BCO
+from core.BCO import run as run_BCO
 from core.ACO import run as run_ACO
 from core.SA import run as run_SA
 from core.Held_Karp import run as run_Held_Karp
+from gui.controllers.cost_matrix import get_matrix
+
+
+class SolverTask(QRunnable):
+    """
+    Chạy 1 solver trên thread của QThreadPool.
+    Tiến trình (best cost, route hiện tại) được gửi qua signal của bridge, tối đa 1 lần
+    mỗi `interval` giây. Solver nhận `callback` sẽ dừng ngay khi bị hủy,
+    các solver khác chỉ bị hủy trước khi bắt đầu hoặc bỏ kết quả khi chạy xong.
+    """
+
+    def __init__(self, bridge, task_id, func, args, interval):
+        super().__init__()
+        self.bridge = bridge
+        self.task_id = task_id
+        self.func = func
+        self.args = args
+        self.interval = interval
+        self.cancel_event = threading.Event()
+
+
+    def run(self):
+        bridge, task_id = self.bridge, self.task_id
+        last_emit = 0.0
+
+        def callback(iteration, best_cost, best_route):
+            nonlocal last_emit
+            if self.cancel_event.is_set():
+                return False
+
+            now = time.monotonic()
+            if now - last_emit >= self.interval:
+                last_emit = now
+                bridge.progress.emit(task_id, int(iteration), float(best_cost), [int(x) for x in best_route])
+
+        try:
+            if self.cancel_event.is_set():
+                bridge.cancelled.emit(task_id)
+                return
+
+            kwargs = {}
+            if "callback" in inspect.signature(self.func).parameters:
+                kwargs["callback"] = callback
+
+            result = self.func(*self.args, **kwargs)
+
+            if self.cancel_event.is_set():
+                bridge.cancelled.emit(task_id)
+            else:
+                bridge.finished.emit(task_id, dict(result))
+        except Exception as e:
+            bridge.failed.emit(task_id, repr(e))
+        finally:
+            bridge.forget(task_id)
 
 
 class RunAlgorithmsBridge(QObject):
+    # taskId, iteration, bestCost, bestRoute
+    progress = Signal(str, int, float, list)
+    # taskId, OptimizationResult
+    finished = Signal(str, dict)
+    # taskId, thông báo lỗi
+    failed = Signal(str, str)
+    cancelled = Signal(str)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.pool = QThreadPool(self)
+        self.tasks = {}
+        self.tasks_lock = threading.Lock()
+        self.task_counter = itertools.count(1)
+        # Khoảng thời gian tối thiểu (giây) giữa 2 lần gửi progress của cùng 1 task
+        self.progress_interval = 0.1
+
+
+    def start(self, func, *args):
+        task_id = f"task-{next(self.task_counter)}"
+        task = SolverTask(self, task_id, func, args, self.progress_interval)
+        with self.tasks_lock:
+            self.tasks[task_id] = task
+        self.pool.start(task)
+        return task_id
+
+
+    def forget(self, task_id):
+        with self.tasks_lock:
+            self.tasks.pop(task_id, None)
+
 
     @Slot(list, int, float, float, int, int, int, int, int, result=dict)
     def runGA(self, matrix, pop_size, crossover_rate, mutation_rate, elite_size, tournament_size, two_opt_max, generations, seed):
         return run_GA(matrix, pop_size, crossover_rate, mutation_rate, elite_size, tournament_size, two_opt_max, generations, seed if seed >= 0 else None)
-    
-    @Slot(list, int, float, float, float, float, float, int, int, result=dict)
-    def runBCO(self, matrix, n_particles, init_velocity, w, c1, c2, v_max, max_iter, seed):
-        return run_BCO(matrix, n_particles, init_velocity, w, c1, c2, v_max, max_iter, seed if seed >= 0 else None)
+
+    @Slot(list, int, int, int, result=dict)
+    def runBCO(self, matrix, n_bees, max_iter, seed):
+        return run_BCO(matrix, n_bees, max_iter, seed if seed >= 0 else None)
 
     @Slot(list, int, int, float, float, float, result=dict)
     def runACO(self, matrix, pop_size, max_iter, alpha, beta, rho):
         return run_ACO(matrix, pop_size, max_iter, alpha, beta, rho)
-    
+
     @Slot(list, int, float, int, result=dict)
     def runSA(self, matrix, T_max, T_min, L):
         return run_SA(matrix, T_max, T_min, L)
-    
+
     @Slot(list, result=dict)
     def runHeldKarp(self, matrix):
         return run_Held_Karp(matrix)
-    
\ No newline at end of file
+
+    # Các phiên bản bất đồng bộ: nhận id ma trận từ costMatrixBridge.createMatrix,
+    # trả về taskId ngay, kết quả đến qua signal finished/failed/cancelled
+
+    @Slot(str, int, float, float, int, int, int, int, int, result=str)
+    def startGA(self, matrix_id, pop_size, crossover_rate, mutation_rate, elite_size, tournament_size, two_opt_max, generations, seed):
+        return self.start(run_GA, get_matrix(matrix_id), pop_size, crossover_rate, mutation_rate, elite_size, tournament_size, two_opt_max, generations, seed if seed >= 0 else None, False)
+
+    @Slot(str, int, int, int, result=str)
+    def startBCO(self, matrix_id, n_bees, max_iter, seed):
+        return self.start(run_BCO, get_matrix(matrix_id), n_bees, max_iter, seed if seed >= 0 else None)
+
+    @Slot(str, int, int, float, float, float, result=str)
+    def startACO(self, matrix_id, pop_size, max_iter, alpha, beta, rho):
+        return self.start(run_ACO, get_matrix(matrix_id), pop_size, max_iter, alpha, beta, rho)
+
+    @Slot(str, int, float, int, result=str)
+    def startSA(self, matrix_id, T_max, T_min, L):
+        return self.start(run_SA, get_matrix(matrix_id), T_max, T_min, L)
+
+    @Slot(str, result=str)
+    def startHeldKarp(self, matrix_id):
+        return self.start(run_Held_Karp, get_matrix(matrix_id))
+
+    @Slot(str)
+    def cancel(self, task_id):
+        with self.tasks_lock:
+            task = self.tasks.get(task_id)
+        if task is not None:
+            task.cancel_event.set()
+
+    @Slot()
+    def cancelAll(self):
+        with self.tasks_lock:
+            tasks = list(self.tasks.values())
+        for task in tasks:
+            task.cancel_event.set()
@@ -0,0 +1,23 @@
+import numpy as np
+
+from core.Branch_Bound import run
+
+
+def test_asymmetric_three_cities_picks_cheaper_direction():
+    cost = np.array([
+        [0.0, 100.0, 1.0],
+        [1.0, 0.0, 100.0],
+        [100.0, 1.0, 0.0],
+    ])
+    result = run(cost, initial_ga=False)
+
+    assert result["optimal"]
+    assert result["bestRoute"] == [0, 2, 1]
+    assert result["bestCost"] == 3.0
+
+
+def test_empty_matrix():
+    result = run(np.zeros((0, 0)), initial_ga=False)
+
+    assert result["bestRoute"] == []
+    assert result["bestCost"] == 0.0